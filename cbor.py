@@ -38,6 +38,14 @@ def _cbor_dumps(obj):
     pass
 
 
+@native_c("_cbor_head",[])
+def _cbor_head(buf,pos,kind,value):
+    pass
+
+@native_c("_cbor_event",[])
+def _cbor_event(buf,start,end):
+    pass
+
 def loads(buf):
     """
 .. function:: loads(data)
@@ -110,3 +118,318 @@ def init_lib():
 
 init_lib()
 
+
+new_exception(CBOREndOfStream, IOError)
+
+_HEAD_INT = 0
+_HEAD_BYTES = 1
+_HEAD_STRING = 2
+_HEAD_ARRAY = 3
+_HEAD_MAP = 4
+_HEAD_TAG = 5
+_HEAD_INDEF_BYTES = 6
+_HEAD_INDEF_STRING = 7
+_HEAD_INDEF_ARRAY = 8
+_HEAD_INDEF_MAP = 9
+_HEAD_BREAK = 10
+_HEAD_FLOAT = 11
+_HEAD_SIMPLE = 12
+
+class Encoder():
+    """
+=============
+Encoder class
+=============
+
+.. class:: Encoder(stream, chunk=128)
+
+    Create a streaming CBOR encoder writing to *stream*, that can be any object with a ``write`` method (e.g. a :class:`streams.FileStream`)
+    or a socket (``sendall`` is used).
+
+    Items are encoded one at a time, without building their representation in memory: heads are collected in a buffer of *chunk* bytes,
+    flushed to *stream* when full, while big strings and bytes are written directly. Call :meth:`flush` to write pending bytes.
+    *chunk* must be at least 9, the size of the biggest head, otherwise ``ValueError`` is raised.
+
+    Besides complete objects, indefinite length arrays, maps, strings and bytes can be written incrementally: ::
+
+        enc = cbor.Encoder(logfile)
+        enc.start_array()
+        for sample in samples:
+            enc.encode(sample)
+        enc.end()
+        enc.flush()
+
+    """
+    def __init__(self, stream, chunk=128):
+        if chunk<9:
+            raise ValueError
+        self.buf = bytearray(chunk)
+        self.size = chunk
+        self.pos = 0
+        if hasattr(stream,"write"):
+            self.out = stream.write
+        else:
+            self.out = stream.sendall
+        self.written = 0
+
+    def _head(self, kind, value=None):
+        if self.pos+9 > self.size:
+            self.flush()
+        self.pos = _cbor_head(self.buf, self.pos, kind, value)
+
+    def _raw(self, data):
+        lb = len(data)
+        npos = self.pos+lb
+        if npos <= self.size:
+            self.buf[self.pos:npos] = data
+            self.pos = npos
+            return
+        self.flush()
+        if lb >= self.size:
+            self.out(data)
+            self.written += lb
+        else:
+            self.buf[0:lb] = data
+            self.pos = lb
+
+    def flush(self):
+        """
+.. method:: flush()
+
+    Write the pending bytes to the stream and return the number of bytes written since the creation of the encoder.
+        """
+        if self.pos:
+            __elements_set(self.buf,self.pos)
+            self.out(self.buf)
+            __elements_set(self.buf,self.size)
+            self.written += self.pos
+            self.pos = 0
+        return self.written
+
+    def encode(self, obj):
+        """
+.. method:: encode(obj)
+
+    Encode *obj* with the same rules of :func:`dumps`: containers are always encoded with definite length, :class:`Tag` and :class:`Undefined`
+    instances are encoded as CBOR tags and undefined values, and non serializable objects as undefined.
+        """
+        t = type(obj)
+        if t == PSMALLINT or t == PINTEGER:
+            self._head(_HEAD_INT, obj)
+        elif t == PFLOAT:
+            self._head(_HEAD_FLOAT, obj)
+        elif t == PSTRING:
+            self._head(_HEAD_STRING, len(obj))
+            self._raw(obj)
+        elif t == PBYTES or t == PBYTEARRAY:
+            self._head(_HEAD_BYTES, len(obj))
+            self._raw(obj)
+        elif t == PLIST or t == PTUPLE:
+            self._head(_HEAD_ARRAY, len(obj))
+            for x in obj:
+                self.encode(x)
+        elif t == PDICT:
+            self._head(_HEAD_MAP, len(obj))
+            for k,v in obj.items():
+                self.encode(k)
+                self.encode(v)
+        elif t == PINSTANCE and isinstance(obj, Tag):
+            self._head(_HEAD_TAG, obj.tag)
+            self.encode(obj.value)
+        else:
+            # bool, None, Undefined and non serializable objects
+            self._head(_HEAD_SIMPLE, obj)
+
+    def start_array(self, n=-1):
+        """
+.. method:: start_array(n=-1)
+
+    Start an array of *n* items, to be followed by *n* calls to :meth:`encode`. If *n* is negative, an indefinite length array is started
+    and must be terminated by :meth:`end`.
+        """
+        if n < 0:
+            self._head(_HEAD_INDEF_ARRAY)
+        else:
+            self._head(_HEAD_ARRAY, n)
+
+    def start_map(self, n=-1):
+        """
+.. method:: start_map(n=-1)
+
+    Start a map of *n* pairs, to be followed by *2n* calls to :meth:`encode` alternating keys and values. If *n* is negative, an indefinite length map is started
+    and must be terminated by :meth:`end`.
+        """
+        if n < 0:
+            self._head(_HEAD_INDEF_MAP)
+        else:
+            self._head(_HEAD_MAP, n)
+
+    def start_string(self):
+        """
+.. method:: start_string()
+
+    Start an indefinite length string: it is made of the strings passed to :meth:`encode` until :meth:`end` is called.
+        """
+        self._head(_HEAD_INDEF_STRING)
+
+    def start_bytes(self):
+        """
+.. method:: start_bytes()
+
+    Start an indefinite length byte string: it is made of the bytes passed to :meth:`encode` until :meth:`end` is called.
+        """
+        self._head(_HEAD_INDEF_BYTES)
+
+    def end(self):
+        """
+.. method:: end()
+
+    Terminate the innermost indefinite length item.
+        """
+        self._head(_HEAD_BREAK)
+
+
+_EVT_VALUE = 0
+_EVT_BYTES_START = 1
+_EVT_STRING_START = 2
+_EVT_ARRAY = 3
+_EVT_INDEF_ARRAY = 4
+_EVT_MAP = 5
+_EVT_INDEF_MAP = 6
+_EVT_TAG = 7
+_EVT_BREAK = 8
+
+class Decoder():
+    """
+=============
+Decoder class
+=============
+
+.. class:: Decoder(stream, size=128)
+
+    Create a streaming CBOR decoder reading from *stream*, that can be any object with a ``read`` method (e.g. a :class:`streams.FileStream`,
+    a :class:`streams.SocketStream` or a serial port).
+
+    A CBOR sequence of any length is decoded one item at a time with :meth:`decode`, or by iterating on the decoder: ::
+
+        for item in cbor.Decoder(streams.FileStream("log.cbor")):
+            print(item)
+
+    Bytes are read in a buffer of *size* bytes, that is reused for every item and enlarged only when a single string or byte string does not fit.
+    Both definite and indefinite length items are supported, and decoded items are the same returned by :func:`loads`.
+
+    """
+    def __init__(self, stream, size=128):
+        self.inp = stream.read
+        if hasattr(stream,"available"):
+            self.avail = stream.available
+        else:
+            self.avail = None
+        self.buf = bytearray(size)
+        self.size = size
+        self.pos = 0
+        self.end = 0
+
+    def _fill(self):
+        if self.pos:
+            # keep the unread bytes at the start of the buffer
+            n = self.end-self.pos
+            if n:
+                self.buf[0:n] = self.buf[self.pos:self.end]
+            self.pos = 0
+            self.end = n
+        if self.end == self.size:
+            self.buf.extend(bytearray(self.size))
+            self.size *= 2
+        n = self.size-self.end
+        if self.avail:
+            # do not block waiting for more bytes than needed
+            n = min(n,max(1,self.avail()))
+        data = self.inp(n)
+        lb = len(data)
+        if lb:
+            self.buf[self.end:self.end+lb] = data
+            self.end += lb
+        return lb
+
+    def _event(self):
+        while True:
+            r = _cbor_event(self.buf, self.pos, self.end)
+            if r is not None:
+                self.pos += r[0]
+                return r
+            if not self._fill():
+                raise ValueError
+
+    def _item(self, evt, val):
+        if evt == _EVT_VALUE:
+            return val
+        elif evt == _EVT_ARRAY:
+            res = []
+            for i in range(val):
+                n, evt, val = self._event()
+                res.append(self._item(evt,val))
+            return res
+        elif evt == _EVT_MAP:
+            res = {}
+            for i in range(val):
+                n, evt, val = self._event()
+                k = self._item(evt,val)
+                n, evt, val = self._event()
+                res[k] = self._item(evt,val)
+            return res
+        elif evt == _EVT_TAG:
+            n, evt, tval = self._event()
+            return Tag(val,self._item(evt,tval))
+        elif evt == _EVT_INDEF_ARRAY:
+            res = []
+            while True:
+                n, evt, val = self._event()
+                if evt == _EVT_BREAK:
+                    return res
+                res.append(self._item(evt,val))
+        elif evt == _EVT_INDEF_MAP:
+            res = {}
+            while True:
+                n, evt, val = self._event()
+                if evt == _EVT_BREAK:
+                    return res
+                k = self._item(evt,val)
+                n, evt, val = self._event()
+                res[k] = self._item(evt,val)
+        elif evt == _EVT_BYTES_START or evt == _EVT_STRING_START:
+            res = bytearray()
+            while True:
+                n, cevt, val = self._event()
+                if cevt == _EVT_BREAK:
+                    break
+                if cevt != _EVT_VALUE:
+                    raise ValueError
+                res.extend(val)
+            if evt == _EVT_STRING_START:
+                return str(res)
+            return bytes(res)
+        raise ValueError
+
+    def decode(self):
+        """
+.. method:: decode()
+
+    Return the next item of the sequence.
+
+    Raises ``CBOREndOfStream`` when the stream ends between two items, and ``ValueError`` when the stream ends inside an item or contains bad or unsupported CBOR.
+        """
+        if self.pos == self.end and not self._fill():
+            raise CBOREndOfStream
+        n, evt, val = self._event()
+        return self._item(evt,val)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.decode()
+        except CBOREndOfStream:
+            raise StopIteration
+
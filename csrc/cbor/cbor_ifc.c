@@ -372,3 +372,184 @@ C_NATIVE(_cbor_dumps)
 
 
 
+
+/* ########### Streaming */
+
+#define CBOR_HEAD_INT          0
+#define CBOR_HEAD_BYTES        1
+#define CBOR_HEAD_STRING       2
+#define CBOR_HEAD_ARRAY        3
+#define CBOR_HEAD_MAP          4
+#define CBOR_HEAD_TAG          5
+#define CBOR_HEAD_INDEF_BYTES  6
+#define CBOR_HEAD_INDEF_STRING 7
+#define CBOR_HEAD_INDEF_ARRAY  8
+#define CBOR_HEAD_INDEF_MAP    9
+#define CBOR_HEAD_BREAK        10
+#define CBOR_HEAD_FLOAT        11
+#define CBOR_HEAD_SIMPLE       12
+
+//max size of a head: initial byte + 8 bytes argument
+#define CBOR_HEAD_MAX          9
+
+C_NATIVE(_cbor_head)
+{
+    NATIVE_UNWARN();
+    CHECK_ARG(args[0], PBYTEARRAY);
+    CHECK_ARG(args[1], PSMALLINT);
+    CHECK_ARG(args[2], PSMALLINT);
+    int32_t pos = PSMALLINT_VALUE(args[1]);
+    int32_t kind = PSMALLINT_VALUE(args[2]);
+    PObject *val = args[3];
+    size_t n = 0;
+    int64_t v = 0;
+
+    if (pos<0 || pos+CBOR_HEAD_MAX>PSEQUENCE_ELEMENTS(args[0])) return ERR_INDEX_EXC;
+    unsigned char *buf = PSEQUENCE_BYTES(args[0])+pos;
+
+    if (kind<=CBOR_HEAD_TAG) {
+        if (!IS_INTEGER_TYPE(PTYPE(val))) return ERR_TYPE_EXC;
+        v = INTEGER_VALUE(val);
+        if (v<0 && kind!=CBOR_HEAD_INT) return ERR_VALUE_EXC;
+    }
+    switch (kind) {
+        case CBOR_HEAD_INT:
+            n = (v<0) ? cbor_encode_negint(-v-1,buf,CBOR_HEAD_MAX):cbor_encode_uint(v,buf,CBOR_HEAD_MAX);
+            break;
+        case CBOR_HEAD_BYTES: n = cbor_encode_bytestring_start(v,buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_STRING: n = cbor_encode_string_start(v,buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_ARRAY: n = cbor_encode_array_start(v,buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_MAP: n = cbor_encode_map_start(v,buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_TAG: n = cbor_encode_tag(v,buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_INDEF_BYTES: n = cbor_encode_indef_bytestring_start(buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_INDEF_STRING: n = cbor_encode_indef_string_start(buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_INDEF_ARRAY: n = cbor_encode_indef_array_start(buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_INDEF_MAP: n = cbor_encode_indef_map_start(buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_BREAK: n = cbor_encode_break(buf,CBOR_HEAD_MAX); break;
+        case CBOR_HEAD_FLOAT:
+            if (PTYPE(val)!=PFLOAT) return ERR_TYPE_EXC;
+            //same representation used by dumps
+            n = cbor_encode_double(FLOAT_VALUE(val),buf,CBOR_HEAD_MAX);
+            break;
+        case CBOR_HEAD_SIMPLE:
+            if (PTYPE(val)==PBOOL) n = cbor_encode_bool(val==PBOOL_TRUE(),buf,CBOR_HEAD_MAX);
+            else if (PTYPE(val)==PNONE) n = cbor_encode_null(buf,CBOR_HEAD_MAX);
+            else n = cbor_encode_undef(buf,CBOR_HEAD_MAX);
+            break;
+        default:
+            return ERR_UNSUPPORTED_EXC;
+    }
+    if (!n) return ERR_RUNTIME_EXC;
+    *res = PSMALLINT_NEW(pos+n);
+    return ERR_OK;
+}
+
+
+#define CBOR_EVT_VALUE         0
+#define CBOR_EVT_BYTES_START   1
+#define CBOR_EVT_STRING_START  2
+#define CBOR_EVT_ARRAY         3
+#define CBOR_EVT_INDEF_ARRAY   4
+#define CBOR_EVT_MAP           5
+#define CBOR_EVT_INDEF_MAP     6
+#define CBOR_EVT_TAG           7
+#define CBOR_EVT_BREAK         8
+
+typedef struct _cbor_stream_ctx {
+    int32_t evt;
+    PObject *val;
+} cbor_stream_ctx;
+
+#define CBOR_CTX(ctx) ((cbor_stream_ctx*)(ctx))
+
+static void _cbs_value(void *ctx, PObject *val){
+    CBOR_CTX(ctx)->evt = CBOR_EVT_VALUE;
+    CBOR_CTX(ctx)->val = val;
+}
+static void _cbs_uint8(void *ctx, uint8_t v){ _cbs_value(ctx,PSMALLINT_NEW(v)); }
+static void _cbs_uint16(void *ctx, uint16_t v){ _cbs_value(ctx,PSMALLINT_NEW(v)); }
+static void _cbs_uint32(void *ctx, uint32_t v){ _cbs_value(ctx,pinteger_new(v)); }
+static void _cbs_uint64(void *ctx, uint64_t v){ _cbs_value(ctx,pinteger_new(v)); }
+static void _cbs_negint8(void *ctx, uint8_t v){ _cbs_value(ctx,PSMALLINT_NEW(-(int32_t)v-1)); }
+static void _cbs_negint16(void *ctx, uint16_t v){ _cbs_value(ctx,PSMALLINT_NEW(-(int32_t)v-1)); }
+static void _cbs_negint32(void *ctx, uint32_t v){ _cbs_value(ctx,pinteger_new(-(int64_t)v-1)); }
+static void _cbs_negint64(void *ctx, uint64_t v){ _cbs_value(ctx,pinteger_new(-(int64_t)v-1)); }
+static void _cbs_bytes(void *ctx, cbor_data data, size_t len){ _cbs_value(ctx,(PObject*)pbytes_new(len,(uint8_t*)data)); }
+static void _cbs_string(void *ctx, cbor_data data, size_t len){ _cbs_value(ctx,(PObject*)pstring_new(len,(uint8_t*)data)); }
+static void _cbs_float(void *ctx, float v){ _cbs_value(ctx,(PObject*)pfloat_new(v)); }
+static void _cbs_double(void *ctx, double v){ _cbs_value(ctx,(PObject*)pfloat_new(v)); }
+static void _cbs_null(void *ctx){ _cbs_value(ctx,MAKE_NONE()); }
+static void _cbs_undefined(void *ctx){ _cbs_value(ctx,(PObject*)pinstance_new(UndefinedClass)); }
+static void _cbs_boolean(void *ctx, bool v){ _cbs_value(ctx,(v) ? PBOOL_TRUE():PBOOL_FALSE()); }
+static void _cbs_event(void *ctx, int32_t evt, PObject *val){
+    CBOR_CTX(ctx)->evt = evt;
+    CBOR_CTX(ctx)->val = val;
+}
+static void _cbs_bytes_start(void *ctx){ _cbs_event(ctx,CBOR_EVT_BYTES_START,MAKE_NONE()); }
+static void _cbs_string_start(void *ctx){ _cbs_event(ctx,CBOR_EVT_STRING_START,MAKE_NONE()); }
+static void _cbs_array_start(void *ctx, size_t n){ _cbs_event(ctx,CBOR_EVT_ARRAY,pinteger_new(n)); }
+static void _cbs_indef_array_start(void *ctx){ _cbs_event(ctx,CBOR_EVT_INDEF_ARRAY,MAKE_NONE()); }
+static void _cbs_map_start(void *ctx, size_t n){ _cbs_event(ctx,CBOR_EVT_MAP,pinteger_new(n)); }
+static void _cbs_indef_map_start(void *ctx){ _cbs_event(ctx,CBOR_EVT_INDEF_MAP,MAKE_NONE()); }
+static void _cbs_tag(void *ctx, uint64_t v){ _cbs_event(ctx,CBOR_EVT_TAG,pinteger_new(v)); }
+static void _cbs_break(void *ctx){ _cbs_event(ctx,CBOR_EVT_BREAK,MAKE_NONE()); }
+
+static const struct cbor_callbacks _cbor_stream_callbacks = {
+    .uint8 = _cbs_uint8,
+    .uint16 = _cbs_uint16,
+    .uint32 = _cbs_uint32,
+    .uint64 = _cbs_uint64,
+    .negint64 = _cbs_negint64,
+    .negint32 = _cbs_negint32,
+    .negint16 = _cbs_negint16,
+    .negint8 = _cbs_negint8,
+    .byte_string_start = _cbs_bytes_start,
+    .byte_string = _cbs_bytes,
+    .string = _cbs_string,
+    .string_start = _cbs_string_start,
+    .indef_array_start = _cbs_indef_array_start,
+    .array_start = _cbs_array_start,
+    .indef_map_start = _cbs_indef_map_start,
+    .map_start = _cbs_map_start,
+    .tag = _cbs_tag,
+    .float2 = _cbs_float,
+    .float4 = _cbs_float,
+    .float8 = _cbs_double,
+    .undefined = _cbs_undefined,
+    .null = _cbs_null,
+    .boolean = _cbs_boolean,
+    .indef_break = _cbs_break,
+};
+
+/*
+ * _cbor_event(buf, start, end)
+ * decodes the head of the next CBOR item in buf[start:end] (a definite string is decoded as a whole).
+ * Returns None if more bytes are needed, otherwise a tuple (bytes read, event, value)
+ */
+C_NATIVE(_cbor_event)
+{
+    NATIVE_UNWARN();
+    CHECK_ARG(args[1], PSMALLINT);
+    CHECK_ARG(args[2], PSMALLINT);
+    if (!IS_BYTE_PSEQUENCE_TYPE(PTYPE(args[0]))) return ERR_TYPE_EXC;
+    int32_t start = PSMALLINT_VALUE(args[1]);
+    int32_t end = PSMALLINT_VALUE(args[2]);
+    if (start<0 || end<start || end>PSEQUENCE_ELEMENTS(args[0])) return ERR_INDEX_EXC;
+
+    cbor_stream_ctx ctx;
+    ctx.evt = CBOR_EVT_VALUE;
+    ctx.val = MAKE_NONE();
+    *res = MAKE_NONE();
+    if (end==start) return ERR_OK;
+
+    struct cbor_decoder_result dr = cbor_stream_decode(PSEQUENCE_BYTES(args[0])+start, end-start, &_cbor_stream_callbacks, &ctx);
+    if (dr.status==CBOR_DECODER_NEDATA || dr.status==CBOR_DECODER_EBUFFER) return ERR_OK;
+    if (dr.status!=CBOR_DECODER_FINISHED) return ERR_VALUE_EXC;
+
+    PTuple *tpl = ptuple_new(3,NULL);
+    PTUPLE_SET_ITEM(tpl,0,PSMALLINT_NEW(dr.read));
+    PTUPLE_SET_ITEM(tpl,1,PSMALLINT_NEW(ctx.evt));
+    PTUPLE_SET_ITEM(tpl,2,ctx.val);
+    *res = (PObject*)tpl;
+    return ERR_OK;
+}
@@ -17,6 +17,13 @@
 /* Definitions of physical drive number for each drive */
 #define SPISD	0	/* Example: Map ATA harddisk to physical drive 0 */
 #define SDIO    1
+#define RAMDISK 2
+
+#define RAMDISK_SECTOR 512
+
+/* sectors transferred by disk_read and disk_write, for all the drives */
+static uint32_t disk_sectors_read = 0;
+static uint32_t disk_sectors_written = 0;
 
 
 
@@ -37,6 +44,30 @@ C_NATIVE(__update_disks_dict) {
     return ERR_OK;
 }
 
+C_NATIVE(__disk_stats) {
+    NATIVE_UNWARN();
+    PTuple *tpl = ptuple_new(2, NULL);
+    PTUPLE_SET_ITEM(tpl, 0, pinteger_new_u(disk_sectors_read));
+    PTUPLE_SET_ITEM(tpl, 1, pinteger_new_u(disk_sectors_written));
+    if (args[0] == PBOOL_TRUE()) {
+        disk_sectors_read = 0;
+        disk_sectors_written = 0;
+    }
+    *res = (PObject*)tpl;
+    return ERR_OK;
+}
+
+/* RAM disk: the sectors are the bytes of the bytearray given at mount */
+static uint32_t ram_disk_sectors(PObject *disk_args) {
+    return PSEQUENCE_ELEMENTS(PLIST_ITEM(disk_args, 1)) / RAMDISK_SECTOR;
+}
+
+static uint8_t *ram_disk_sector(PObject *disk_args, DWORD sector, UINT count) {
+    if (sector + count > ram_disk_sectors(disk_args))
+        return NULL;
+    return PSEQUENCE_BYTES(PLIST_ITEM(disk_args, 1)) + sector * RAMDISK_SECTOR;
+}
+
 /*-----------------------------------------------------------------------*/
 /* Get Drive Status                                                      */
 /*-----------------------------------------------------------------------*/
@@ -60,6 +91,8 @@ DSTATUS disk_status (
             uint32_t sdio_drv = (PSMALLINT_VALUE(PLIST_ITEM(disk_args, 1)) & 0xff);
             return sdio_disk_status(sdio_drv);
 #endif
+        case RAMDISK:
+            return 0;
     }
     return STA_NOINIT;
 }
@@ -101,6 +134,8 @@ DSTATUS disk_initialize (
             uint32_t sdio_freq = PSMALLINT_VALUE(PLIST_ITEM(disk_args, 3));
             return sdio_disk_initialize(sdio_drv, sdio_bits, sdio_freq);
 #endif
+        case RAMDISK:
+            return 0;
     }
 
 	return STA_NOINIT;
@@ -123,20 +158,34 @@ DRESULT disk_read (
     PObject *disk_args = pdict_get(disks_dict, PSMALLINT_NEW(pdrv));
     uint32_t disk_type = PSMALLINT_VALUE(PLIST_ITEM(disk_args, 0));
 
+    DRESULT dres = RES_PARERR;
+    uint8_t *ram;
+
     switch (disk_type) {
         case SPISD:
             ;
             uint32_t spi_drv = PSMALLINT_VALUE(PLIST_ITEM(disk_args, 1)) & 0xff;
-            return spi_disk_read(spi_drv, buff, sector, count);
+            dres = spi_disk_read(spi_drv, buff, sector, count);
+            break;
 #if defined(VHAL_CUSTOM_SDIO) && VHAL_CUSTOM_SDIO
         case SDIO:
             ;
             uint32_t sdio_drv = (PSMALLINT_VALUE(PLIST_ITEM(disk_args, 1)) & 0xff);
-            return sdio_disk_read(sdio_drv, buff, sector, count);
+            dres = sdio_disk_read(sdio_drv, buff, sector, count);
+            break;
 #endif
+        case RAMDISK:
+            ram = ram_disk_sector(disk_args, sector, count);
+            if (ram) {
+                memcpy(buff, ram, count * RAMDISK_SECTOR);
+                dres = RES_OK;
+            }
+            break;
     }
+    if (dres == RES_OK)
+        disk_sectors_read += count;
 
-	return RES_PARERR;
+	return dres;
 }
 
 
@@ -156,20 +205,34 @@ DRESULT disk_write (
     PObject *disk_args = pdict_get(disks_dict, PSMALLINT_NEW(pdrv));
     uint32_t disk_type = PSMALLINT_VALUE(PLIST_ITEM(disk_args, 0));
 
+    DRESULT dres = RES_PARERR;
+    uint8_t *ram;
+
     switch (disk_type) {
         case SPISD:
             ;
             uint32_t spi_drv = PSMALLINT_VALUE(PLIST_ITEM(disk_args, 1)) & 0xff;
-            return spi_disk_write(spi_drv, buff, sector, count);
+            dres = spi_disk_write(spi_drv, buff, sector, count);
+            break;
 #if defined(VHAL_CUSTOM_SDIO) && VHAL_CUSTOM_SDIO
         case SDIO:
             ;
             uint32_t sdio_drv = (PSMALLINT_VALUE(PLIST_ITEM(disk_args, 1)) & 0xff);
-            return sdio_disk_write(sdio_drv, buff, sector, count);
+            dres = sdio_disk_write(sdio_drv, buff, sector, count);
+            break;
 #endif
+        case RAMDISK:
+            ram = ram_disk_sector(disk_args, sector, count);
+            if (ram) {
+                memcpy(ram, buff, count * RAMDISK_SECTOR);
+                dres = RES_OK;
+            }
+            break;
     }
+    if (dres == RES_OK)
+        disk_sectors_written += count;
 
-	return RES_PARERR;
+	return dres;
 }
 
 
@@ -198,6 +261,21 @@ DRESULT disk_ioctl (
             uint32_t sdio_drv = (PSMALLINT_VALUE(PLIST_ITEM(disk_args, 1)) & 0xff);
             return sdio_disk_ioctl(sdio_drv, cmd, buff);
 #endif
+        case RAMDISK:
+            switch (cmd) {
+                case CTRL_SYNC:
+                    return RES_OK;
+                case GET_SECTOR_COUNT:
+                    *(DWORD*)buff = ram_disk_sectors(disk_args);
+                    return RES_OK;
+                case GET_SECTOR_SIZE:
+                    *(WORD*)buff = RAMDISK_SECTOR;
+                    return RES_OK;
+                case GET_BLOCK_SIZE:
+                    *(DWORD*)buff = 1;
+                    return RES_OK;
+            }
+            return RES_PARERR;
     }
 
 	return RES_PARERR;
@@ -11,8 +11,37 @@
 FATFS FatFs[_VOLUMES];
 uint32_t mnt_cnt = 0;
 
-FIL fil[4];
-DIR dir[4];
+/*
+ * Descriptor tables.
+ * The number of files and directories open at the same time can be set in the project
+ * configuration with ZERYNTH_FATFS_MAX_FILES and ZERYNTH_FATFS_MAX_DIRS (from 1 to 32 each).
+ * Free slots are kept in a bitmap per table, so that allocation takes constant time.
+ */
+#if !defined(ZERYNTH_FATFS_MAX_FILES)
+#define MAX_FILES 4
+#else
+#define MAX_FILES ZERYNTH_FATFS_MAX_FILES
+#endif
+
+#if !defined(ZERYNTH_FATFS_MAX_DIRS)
+#define MAX_DIRS 4
+#else
+#define MAX_DIRS ZERYNTH_FATFS_MAX_DIRS
+#endif
+
+#if MAX_FILES < 1 || MAX_FILES > 32 || MAX_DIRS < 1 || MAX_DIRS > 32
+#error "ZERYNTH_FATFS_MAX_FILES and ZERYNTH_FATFS_MAX_DIRS must be between 1 and 32"
+#endif
+
+FIL fil[MAX_FILES];
+DIR dir[MAX_DIRS];
+
+#define FD_FILES 0
+#define FD_DIRS  1
+#define FD_MASK(n) (0xffffffffu >> (32 - (n)))
+
+static uint32_t fd_used[2];
+static const uint32_t fd_all[2] = {FD_MASK(MAX_FILES), FD_MASK(MAX_DIRS)};
 
 #define GET_NAMED_PYPATH(arg,name) \
     uint8_t *__##name = PSEQUENCE_BYTES(arg);  \
@@ -47,6 +76,59 @@ C_NATIVE(__f_mount) {
     return ERR_VALUE_EXC;
 }
 
+C_NATIVE(__f_mkfs) {
+    NATIVE_UNWARN();
+    FRESULT fr;
+    GET_PYPATH(args[0]);
+    // no partition table, automatic cluster size
+    fr = f_mkfs(path, 1, 0);
+    DEL_PYPATH();
+    if (fr != FR_OK) {
+        *res = PSMALLINT_NEW(-1);
+    }
+    return ERR_OK;
+}
+
+// Descriptors
+
+C_NATIVE(__f_fd_alloc) {
+    NATIVE_UNWARN();
+    uint32_t t = (uint32_t)PSMALLINT_VALUE(args[0]);
+    uint32_t free_fds;
+    int n;
+    if (t > FD_DIRS)
+        return ERR_VALUE_EXC;
+    free_fds = fd_all[t] & ~fd_used[t];
+    if (!free_fds) {
+        *res = PSMALLINT_NEW(-1);
+        return ERR_OK;
+    }
+    // lowest free slot
+    n = __builtin_ctz(free_fds);
+    fd_used[t] |= (1u << n);
+    *res = PSMALLINT_NEW(n);
+    return ERR_OK;
+}
+
+C_NATIVE(__f_fd_free) {
+    NATIVE_UNWARN();
+    uint32_t t = (uint32_t)PSMALLINT_VALUE(args[0]);
+    uint32_t n = (uint32_t)PSMALLINT_VALUE(args[1]);
+    if (t > FD_DIRS || n >= 32)
+        return ERR_VALUE_EXC;
+    fd_used[t] &= ~(1u << n);
+    return ERR_OK;
+}
+
+C_NATIVE(__f_fd_count) {
+    NATIVE_UNWARN();
+    uint32_t t = (uint32_t)PSMALLINT_VALUE(args[0]);
+    if (t > FD_DIRS)
+        return ERR_VALUE_EXC;
+    *res = PSMALLINT_NEW((t == FD_FILES) ? MAX_FILES : MAX_DIRS);
+    return ERR_OK;
+}
+
 // File Access
 
 C_NATIVE(__f_open) {
@@ -76,6 +158,17 @@ C_NATIVE(__f_close) {
     return ERR_OK;
 }
 
+C_NATIVE(__f_sync) {
+    NATIVE_UNWARN();
+    FRESULT fr;
+    uint8_t n = (uint8_t)PSMALLINT_VALUE(args[0]);
+    fr = f_sync(&fil[n]);
+    if (fr != 0) {
+        *res = PSMALLINT_NEW(-1);
+    }
+    return ERR_OK;
+}
+
 C_NATIVE(__f_size) {
     NATIVE_UNWARN();
     FRESULT fr;
@@ -99,37 +192,150 @@ C_NATIVE(__f_read) {
     uint16_t to_read = PSMALLINT_VALUE(args[0]);
     uint8_t mode = (uint8_t)PSMALLINT_VALUE(args[1]);
     uint8_t n = (uint8_t)PSMALLINT_VALUE(args[2]);
+    PSequence *buffer;
 
-    PObject *buffer = pbytes_new(to_read, NULL);
+    // read straight into the result, shortened in place when less bytes are available
+    buffer = psequence_new((mode == 1) ? PBYTES : PSTRING, to_read);
     fr = f_read(&fil[n], PSEQUENCE_BYTES(buffer), to_read, &br);
     if (fr != 0) {
         *res = PSMALLINT_NEW(-1);
     }
     else {
-        if (mode == 1) {
-            *res =  (PObject *)pbytes_new(br, PSEQUENCE_BYTES(buffer));
+        if (br < to_read / 2) {
+            // avoid keeping a mostly unused buffer alive
+            if (mode == 1) {
+                *res = (PObject *)pbytes_new(br, PSEQUENCE_BYTES(buffer));
+            }
+            else {
+                *res = (PObject *)pstring_new(br, PSEQUENCE_BYTES(buffer));
+            }
         }
         else {
-            *res = (PObject *)pstring_new(br, PSEQUENCE_BYTES(buffer));
+            buffer->elements = br;
+            *res = (PObject *)buffer;
         }
     }
     return ERR_OK;
 }
 
-// C_NATIVE(__f_readline) {
-//     NATIVE_UNWARN();
-//     BYTE buffer[100];   /* File copy buffer */
-//     FRESULT fr;          /* FatFs function common result code */
-//     UINT br;         /* File read/write count */
-//     int cnt = -1;
-//     uint8_t n = PSMALLINT_VALUE(args[0]);
-//     do {
-//         cnt++;
-//         fr = f_read(&fil[n], &buffer[cnt], 1, &br);
-//     } while (cnt < 99 && br != 0 && buffer[cnt] != '\n');
-//     *res = (PObject *)pstring_new(cnt, buffer);
-//     return ERR_OK;
-// }
+C_NATIVE(__f_readinto) {
+    NATIVE_UNWARN();
+    FRESULT fr;          /* FatFs function common result code */
+    UINT br;         /* File read/write count */
+    PObject *buffer = args[0];
+    int32_t to_read = PSMALLINT_VALUE(args[1]);
+    int32_t ofs = PSMALLINT_VALUE(args[2]);
+    uint8_t n = (uint8_t)PSMALLINT_VALUE(args[3]);
+
+    if (PTYPE(buffer) != PBYTEARRAY)
+        return ERR_TYPE_EXC;
+    int32_t len = PSEQUENCE_ELEMENTS(buffer);
+    if (ofs < 0 || ofs > len)
+        return ERR_INDEX_EXC;
+    if (to_read < 0 || to_read > len - ofs)
+        to_read = len - ofs;
+    // no allocations: bytes are copied by FatFs from its sector buffer, or read from the disk, into the caller buffer
+    fr = f_read(&fil[n], PSEQUENCE_BYTES(buffer) + ofs, to_read, &br);
+    if (fr != 0) {
+        *res = PSMALLINT_NEW(-1);
+    }
+    else {
+        *res = PSMALLINT_NEW(br);
+    }
+    return ERR_OK;
+}
+
+#define READLINE_CHUNK 64
+#define READLINE_MAX 0xffff
+#if _MAX_SS == _MIN_SS
+#define READLINE_SS(fp) ((UINT)_MAX_SS)
+#else
+#define READLINE_SS(fp) ((UINT)(fp)->obj.fs->ssize)
+#endif
+
+/*
+ * Read a line of at most max bytes ending with '\n' into a gc allocated buffer.
+ * Bytes are read in chunks straight into the line buffer and searched there: small reads are served from the sector
+ * buffer of the FIL, and the bytes read past the newline are given back by seeking inside the same sector.
+ * Chunks never cross a sector boundary: seeking back to a previous sector would read it again from the disk,
+ * and to a previous cluster would follow the cluster chain from the start of the file.
+ */
+static FRESULT fatfs_readline(FIL *fp, uint32_t max, uint8_t **line, uint32_t *len) {
+    FRESULT fr;
+    UINT br;
+    uint32_t cap = READLINE_CHUNK;
+    uint32_t ln = 0;
+    uint8_t *buf = gc_malloc(cap);
+    uint8_t *nl = NULL;
+
+    while (ln < max) {
+        if (ln == cap) {
+            uint32_t ncap = (cap * 2 > max) ? max : cap * 2;
+            uint8_t *nbuf = gc_malloc(ncap);
+            memcpy(nbuf, buf, ln);
+            gc_free(buf);
+            buf = nbuf;
+            cap = ncap;
+        }
+        UINT to_read = cap - ln;
+        if (to_read > READLINE_CHUNK)
+            to_read = READLINE_CHUNK;
+        if (to_read > max - ln)
+            to_read = max - ln;
+        if (to_read > READLINE_SS(fp) - (UINT)(f_tell(fp) % READLINE_SS(fp)))
+            to_read = READLINE_SS(fp) - (UINT)(f_tell(fp) % READLINE_SS(fp));
+        fr = f_read(fp, buf + ln, to_read, &br);
+        if (fr != FR_OK) {
+            gc_free(buf);
+            return fr;
+        }
+        if (br == 0)
+            break;
+        nl = memchr(buf + ln, '\n', br);
+        if (nl) {
+            uint32_t extra = br - (nl - (buf + ln) + 1);
+            ln += br - extra;
+            if (extra) {
+                fr = f_lseek(fp, f_tell(fp) - extra);
+                if (fr != FR_OK) {
+                    gc_free(buf);
+                    return fr;
+                }
+            }
+            break;
+        }
+        ln += br;
+    }
+    *line = buf;
+    *len = ln;
+    return FR_OK;
+}
+
+C_NATIVE(__f_readline) {
+    NATIVE_UNWARN();
+    FRESULT fr;
+    uint8_t mode = (uint8_t)PSMALLINT_VALUE(args[0]);
+    int32_t max = PSMALLINT_VALUE(args[1]);
+    uint8_t n = (uint8_t)PSMALLINT_VALUE(args[2]);
+    uint8_t *line;
+    uint32_t len;
+
+    if (max < 0 || max > READLINE_MAX)
+        max = READLINE_MAX;
+    fr = fatfs_readline(&fil[n], max, &line, &len);
+    if (fr != FR_OK) {
+        *res = PSMALLINT_NEW(-1);
+        return ERR_OK;
+    }
+    if (mode == 1) {
+        *res = (PObject *)pbytes_new(len, line);
+    }
+    else {
+        *res = (PObject *)pstring_new(len, line);
+    }
+    gc_free(line);
+    return ERR_OK;
+}
 
 C_NATIVE(__f_write) {
     NATIVE_UNWARN();
@@ -263,6 +469,33 @@ C_NATIVE(__f_readdir) {
     return ERR_OK;
 }
 
+C_NATIVE(__f_readdir_info) {
+    NATIVE_UNWARN();
+    FRESULT fr;
+    uint8_t n     = (uint8_t)PSMALLINT_VALUE(args[0]);
+    FILINFO fno;
+    PTuple *tpl;
+
+    fr = f_readdir(&dir[n], &fno);
+    if (fr != FR_OK) {
+        *res = PSMALLINT_NEW(-1);
+    }
+    else if (fno.fname[0] == 0) {
+        *res = PSMALLINT_NEW(0);
+    }
+    else {
+        // everything f_readdir already read from the directory entry: (name, size, attributes, date, time)
+        tpl = ptuple_new(5, NULL);
+        PTUPLE_SET_ITEM(tpl, 0, pstring_new(strlen(fno.fname), fno.fname));
+        PTUPLE_SET_ITEM(tpl, 1, pinteger_new_u(fno.fsize));
+        PTUPLE_SET_ITEM(tpl, 2, PSMALLINT_NEW(fno.fattrib));
+        PTUPLE_SET_ITEM(tpl, 3, PSMALLINT_NEW(fno.fdate));
+        PTUPLE_SET_ITEM(tpl, 4, PSMALLINT_NEW(fno.ftime));
+        *res = (PObject*)tpl;
+    }
+    return ERR_OK;
+}
+
 // File/Directory Management
 
 C_NATIVE(__f_exists) {
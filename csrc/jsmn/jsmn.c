@@ -359,6 +359,81 @@ int str_to_num(char *str,int size, int64_t* ires, FLOAT_TYPE* fres){
     return is_float;
 }
 
+static int jsmn_hex4(uint8_t *buf){
+    int i,v=0;
+    uint8_t c;
+    for(i=0;i<4;i++){
+        c = buf[i];
+        if (c>='0' && c<='9') c-='0';
+        else if (c>='a' && c<='f') c-='a'-10;
+        else if (c>='A' && c<='F') c-='A'-10;
+        else return -1;
+        v = (v<<4)|c;
+    }
+    return v;
+}
+
+//decode the escapes of a json string in place: the decoded form is never longer than the
+//escaped one, so the write position never overtakes the read position.
+static void jsmn_unescape(PObject *str){
+    int i=0,j=0,run,cp,lo,sz=PSEQUENCE_ELEMENTS(str);
+    uint8_t *buf = PSEQUENCE_BYTES(str);
+
+    while(i<sz){
+        for(run=i;run<sz && buf[run]!='\\';run++);
+        if (run>i) {
+            memmove(buf+j,buf+i,run-i);
+            j+=run-i;
+            i=run;
+        }
+        if (i+1>=sz) break;
+        i+=2;
+        switch(buf[i-1]){
+            case 'n': buf[j++]='\n'; break;
+            case 't': buf[j++]='\t'; break;
+            case 'r': buf[j++]='\r'; break;
+            case 'f': buf[j++]='\f'; break;
+            case 'b': buf[j++]='\b'; break;
+            case 'u':
+                cp = (i+4<=sz) ? jsmn_hex4(buf+i):-1;
+                if (cp<0) {
+                    //malformed, keep it as it is
+                    buf[j++]='\\';
+                    buf[j++]='u';
+                    break;
+                }
+                i+=4;
+                if (cp>=0xd800 && cp<0xdc00 && i+6<=sz && buf[i]=='\\' && buf[i+1]=='u') {
+                    lo = jsmn_hex4(buf+i+2);
+                    if (lo>=0xdc00 && lo<0xe000) {
+                        cp = 0x10000+((cp-0xd800)<<10)+(lo-0xdc00);
+                        i+=6;
+                    }
+                }
+                if (cp<0x80) {
+                    buf[j++]=cp;
+                } else if (cp<0x800) {
+                    buf[j++]=0xc0|(cp>>6);
+                    buf[j++]=0x80|(cp&0x3f);
+                } else if (cp<0x10000) {
+                    buf[j++]=0xe0|(cp>>12);
+                    buf[j++]=0x80|((cp>>6)&0x3f);
+                    buf[j++]=0x80|(cp&0x3f);
+                } else {
+                    buf[j++]=0xf0|(cp>>18);
+                    buf[j++]=0x80|((cp>>12)&0x3f);
+                    buf[j++]=0x80|((cp>>6)&0x3f);
+                    buf[j++]=0x80|(cp&0x3f);
+                }
+                break;
+            default:
+                //\" \\ \/ and anything else stand for the escaped char itself
+                buf[j++]=buf[i-1];
+        }
+    }
+    PSEQUENCE_ELEMENTS_SET(str,j);
+}
+
 C_NATIVE(jsmn_loads){
     C_NATIVE_UNWARN();
     uint8_t *jstr;
@@ -414,27 +489,7 @@ C_NATIVE(jsmn_loads){
                 break;
             case JSMN_STRING:
                 token->obj = (void*)pstring_new(token->end-token->start,jstr+token->start);
-                {
-                    int j,sz=PSEQUENCE_ELEMENTS(token->obj);
-                    uint8_t *buf = PSEQUENCE_BYTES(token->obj);
-
-                    for(j=0;j<PSEQUENCE_ELEMENTS(token->obj);j++) {
-                        if (buf[j]=='\\') {
-                            //escape!
-                            switch(buf[j+1]){
-                                case 'n': buf[j]='\n'; break;
-                                case 't': buf[j]='\t'; break;
-                                case 'r': buf[j]='\r'; break;
-                                case 'f': buf[j]='\f'; break;
-                                case 'b': buf[j]='\b'; break;
-                                case '\"': buf[j]='"'; break;
-                            }
-                            memcpy(buf+j+1,buf+j+2,sz-j-2);
-                            sz--;
-                        }
-                    }
-                    PSEQUENCE_ELEMENTS_SET(token->obj,sz);
-                }
+                jsmn_unescape(token->obj);
                 printf("STRING %i %i ch %i p %i %x\n",token->start,token->end,token->size, token->parent,(int)token->obj);
                 break;
             case JSMN_PRIMITIVE:
@@ -493,3 +548,247 @@ C_NATIVE(jsmn_loads){
 
 
 
+
+
+//INCREMENTAL TOKENIZER
+//
+// The state of an incremental parse is kept in a bytearray owned by json.Parser, so that
+// the same native can serve any number of parsers. Tokens split between two chunks are
+// accumulated in a second bytearray (the token buffer) whose size bounds the memory used.
+
+#define JSTREAM_MODE_NONE       0
+#define JSTREAM_MODE_STRING     1
+#define JSTREAM_MODE_ESCAPE     2
+#define JSTREAM_MODE_PRIMITIVE  3
+
+#define JSTREAM_EXPECT_VALUE    0
+#define JSTREAM_EXPECT_KEY      1
+#define JSTREAM_EXPECT_COLON    2
+#define JSTREAM_EXPECT_NEXT     3
+#define JSTREAM_EXPECT_END      4
+
+#define JSTREAM_FLAG_EMPTY      1
+#define JSTREAM_FLAG_KEY        2
+
+#define JSTREAM_MAX_DEPTH       32
+
+#define JSTREAM_EVT_NONE        -1
+#define JSTREAM_EVT_START_MAP   0
+#define JSTREAM_EVT_END_MAP     1
+#define JSTREAM_EVT_START_ARRAY 2
+#define JSTREAM_EVT_END_ARRAY   3
+#define JSTREAM_EVT_KEY         4
+#define JSTREAM_EVT_VALUE       5
+
+typedef struct _jsmn_stream {
+    uint8_t mode;
+    uint8_t depth;
+    uint8_t expect;
+    uint8_t flags;
+    uint32_t stack;     //bit n set if container at level n is an object
+    uint16_t toklen;    //bytes stored in the token buffer
+    uint16_t unused;
+} jsmn_stream_t;
+
+static PObject *jstream_primitive(uint8_t *buf, int len){
+    int64_t nn;
+    FLOAT_TYPE ff;
+    if (!len) return NULL;
+    switch(buf[0]){
+        case 't':
+            if (len==4 && memcmp(buf,"true",4)==0) return PBOOL_TRUE();
+            return NULL;
+        case 'f':
+            if (len==5 && memcmp(buf,"false",5)==0) return PBOOL_FALSE();
+            return NULL;
+        case 'n':
+            if (len==4 && memcmp(buf,"null",4)==0) return MAKE_NONE();
+            return NULL;
+        default:
+            if ((buf[0]>='0' && buf[0]<='9') || buf[0]=='-') {
+                if (str_to_num(buf,len,&nn,&ff)) return (PObject*)pfloat_new(ff);
+                return (PObject*)pinteger_new(nn);
+            }
+    }
+    return NULL;
+}
+
+static void jstream_after_value(jsmn_stream_t *st){
+    st->expect = (st->depth) ? JSTREAM_EXPECT_NEXT:JSTREAM_EXPECT_END;
+    st->flags &= ~JSTREAM_FLAG_EMPTY;
+}
+
+//append bytes to the token buffer, return 0 on overflow
+static int jstream_save(jsmn_stream_t *st, PObject *tok, uint8_t *buf, int len){
+    if (st->toklen+len>PSEQUENCE_SIZE(tok)) return 0;
+    memcpy(PSEQUENCE_BYTES(tok)+st->toklen,buf,len);
+    st->toklen+=len;
+    return 1;
+}
+
+// _jsmn_next(state, tokbuf, data, ofs)
+// scan data from ofs until the next event and return a tuple (ofs, event, value).
+// event is JSTREAM_EVT_NONE when data is exhausted. data can be None to signal the end of input.
+C_NATIVE(jsmn_next){
+    C_NATIVE_UNWARN();
+    jsmn_stream_t *st;
+    uint8_t *data = NULL;
+    int32_t len = 0, ofs, i, start;
+    int32_t evt = JSTREAM_EVT_NONE;
+    PObject *val = MAKE_NONE();
+    PObject *tok = args[1];
+    uint8_t c;
+
+    CHECK_ARG(args[0], PBYTEARRAY);
+    CHECK_ARG(tok, PBYTEARRAY);
+    CHECK_ARG(args[3], PSMALLINT);
+    if (PSEQUENCE_SIZE(args[0])<sizeof(jsmn_stream_t)) return ERR_VALUE_EXC;
+    st = (jsmn_stream_t*)PSEQUENCE_BYTES(args[0]);
+    ofs = PSMALLINT_VALUE(args[3]);
+
+    if (PTYPE(args[2])==PNONE) {
+        //end of input: only a pending primitive can be completed
+        if (st->mode==JSTREAM_MODE_PRIMITIVE) {
+            val = jstream_primitive(PSEQUENCE_BYTES(tok),st->toklen);
+            if (!val) return ERR_VALUE_EXC;
+            st->mode = JSTREAM_MODE_NONE;
+            st->toklen = 0;
+            evt = JSTREAM_EVT_VALUE;
+            jstream_after_value(st);
+        } else if (st->mode!=JSTREAM_MODE_NONE || st->depth || st->expect!=JSTREAM_EXPECT_END) {
+            //truncated document, or no document at all
+            return ERR_VALUE_EXC;
+        }
+        goto done;
+    }
+
+    if (!IS_BYTE_PSEQUENCE_TYPE(PTYPE(args[2]))) return ERR_TYPE_EXC;
+    data = PSEQUENCE_BYTES(args[2]);
+    len = PSEQUENCE_ELEMENTS(args[2]);
+    start = ofs;
+
+    for(i=ofs;i<len;i++){
+        c = data[i];
+        if (st->mode==JSTREAM_MODE_ESCAPE) {
+            st->mode = JSTREAM_MODE_STRING;
+            continue;
+        }
+        if (st->mode==JSTREAM_MODE_STRING) {
+            if (c=='\\') {
+                st->mode = JSTREAM_MODE_ESCAPE;
+            } else if (c=='"') {
+                if (st->toklen) {
+                    if (!jstream_save(st,tok,data+start,i-start)) return ERR_VALUE_EXC;
+                    val = pstring_new(st->toklen,PSEQUENCE_BYTES(tok));
+                } else {
+                    val = pstring_new(i-start,data+start);
+                }
+                jsmn_unescape(val);
+                st->mode = JSTREAM_MODE_NONE;
+                st->toklen = 0;
+                if (st->flags&JSTREAM_FLAG_KEY) {
+                    st->flags &= ~JSTREAM_FLAG_KEY;
+                    st->expect = JSTREAM_EXPECT_COLON;
+                    evt = JSTREAM_EVT_KEY;
+                } else {
+                    jstream_after_value(st);
+                    evt = JSTREAM_EVT_VALUE;
+                }
+                i++;
+                break;
+            }
+            continue;
+        }
+        if (st->mode==JSTREAM_MODE_PRIMITIVE) {
+            if (c==' ' || c=='\t' || c=='\r' || c=='\n' || c==',' || c==']' || c=='}') {
+                //the delimiter is left for the next call
+                if (st->toklen) {
+                    if (!jstream_save(st,tok,data+start,i-start)) return ERR_VALUE_EXC;
+                    val = jstream_primitive(PSEQUENCE_BYTES(tok),st->toklen);
+                } else {
+                    val = jstream_primitive(data+start,i-start);
+                }
+                if (!val) return ERR_VALUE_EXC;
+                st->mode = JSTREAM_MODE_NONE;
+                st->toklen = 0;
+                jstream_after_value(st);
+                evt = JSTREAM_EVT_VALUE;
+                break;
+            }
+            continue;
+        }
+        //between tokens
+        switch(c){
+            case ' ':
+            case '\t':
+            case '\r':
+            case '\n':
+                continue;
+            case '{':
+            case '[':
+                if (st->expect==JSTREAM_EXPECT_END) st->expect = JSTREAM_EXPECT_VALUE; //a new document
+                if (st->expect!=JSTREAM_EXPECT_VALUE || st->depth>=JSTREAM_MAX_DEPTH) return ERR_VALUE_EXC;
+                if (c=='{') {
+                    st->stack |= (1u<<st->depth);
+                    st->expect = JSTREAM_EXPECT_KEY;
+                    evt = JSTREAM_EVT_START_MAP;
+                } else {
+                    st->stack &= ~(1u<<st->depth);
+                    st->expect = JSTREAM_EXPECT_VALUE;
+                    evt = JSTREAM_EVT_START_ARRAY;
+                }
+                st->depth++;
+                st->flags |= JSTREAM_FLAG_EMPTY;
+                i++;
+                goto done_scan;
+            case '}':
+            case ']':
+                if (!st->depth) return ERR_VALUE_EXC;
+                if (((st->stack>>(st->depth-1))&1) != (c=='}')) return ERR_VALUE_EXC;
+                if (!(st->expect==JSTREAM_EXPECT_NEXT || ((st->flags&JSTREAM_FLAG_EMPTY) && (st->expect==JSTREAM_EXPECT_KEY || st->expect==JSTREAM_EXPECT_VALUE))))
+                    return ERR_VALUE_EXC;
+                st->depth--;
+                jstream_after_value(st);
+                evt = (c=='}') ? JSTREAM_EVT_END_MAP:JSTREAM_EVT_END_ARRAY;
+                i++;
+                goto done_scan;
+            case ':':
+                if (st->expect!=JSTREAM_EXPECT_COLON) return ERR_VALUE_EXC;
+                st->expect = JSTREAM_EXPECT_VALUE;
+                continue;
+            case ',':
+                if (st->expect!=JSTREAM_EXPECT_NEXT || !st->depth) return ERR_VALUE_EXC;
+                st->expect = ((st->stack>>(st->depth-1))&1) ? JSTREAM_EXPECT_KEY:JSTREAM_EXPECT_VALUE;
+                continue;
+            case '"':
+                if (st->expect==JSTREAM_EXPECT_END) st->expect = JSTREAM_EXPECT_VALUE;
+                if (st->expect==JSTREAM_EXPECT_KEY) st->flags |= JSTREAM_FLAG_KEY;
+                else if (st->expect!=JSTREAM_EXPECT_VALUE) return ERR_VALUE_EXC;
+                st->flags &= ~JSTREAM_FLAG_EMPTY;
+                st->mode = JSTREAM_MODE_STRING;
+                start = i+1;
+                continue;
+            default:
+                if (st->expect==JSTREAM_EXPECT_END) st->expect = JSTREAM_EXPECT_VALUE;
+                if (st->expect!=JSTREAM_EXPECT_VALUE) return ERR_VALUE_EXC;
+                if (!((c>='0' && c<='9') || c=='-' || c=='t' || c=='f' || c=='n')) return ERR_VALUE_EXC;
+                st->flags &= ~JSTREAM_FLAG_EMPTY;
+                st->mode = JSTREAM_MODE_PRIMITIVE;
+                start = i;
+                continue;
+        }
+    }
+    if (evt==JSTREAM_EVT_NONE && (st->mode==JSTREAM_MODE_STRING || st->mode==JSTREAM_MODE_ESCAPE || st->mode==JSTREAM_MODE_PRIMITIVE)) {
+        //token continues in the next chunk
+        if (!jstream_save(st,tok,data+start,len-start)) return ERR_VALUE_EXC;
+    }
+
+done_scan:
+    ofs = i;
+done:
+    *res = (PObject*)ptuple_new(3,NULL);
+    PTUPLE_SET_ITEM(*res,0,PSMALLINT_NEW(ofs));
+    PTUPLE_SET_ITEM(*res,1,PSMALLINT_NEW(evt));
+    PTUPLE_SET_ITEM(*res,2,val);
+    return ERR_OK;
+}
@@ -15,6 +15,100 @@
 #define RTOS__EVT_WAIT    12
 #define RTOS__EVT_GETFLAG 13
 #define RTOS__SEM_SIGNALCAP 14
+#define RTOS__TRACE_DRAIN 15
+
+
+/*
+ * Tracing
+ *
+ * Operations on semaphores and events can be recorded in a ring buffer of ZERYNTH_THREADING_TRACE records, drained from Python.
+ * Recording is enabled per category by the VM trace mask (vm.set_tracemask): when a category is disabled, the only cost is a test of the mask.
+ * Records are written and drained holding the GIL, that already serializes producers and consumer: no other lock is needed.
+ * When the buffer is full, the oldest records are overwritten and counted as lost at the next drain.
+ * Defining ZERYNTH_THREADING_TRACE as 0 removes tracing entirely.
+ */
+
+#if !defined(ZERYNTH_THREADING_TRACE)
+#define ZERYNTH_THREADING_TRACE 32
+#endif
+
+// trace categories, bits of the VM trace mask not used by the VM
+#define THREADING_TRACE_SEM  (1<<21)
+#define THREADING_TRACE_WAIT (1<<22)
+#define THREADING_TRACE_EVT  (1<<23)
+
+#if ZERYNTH_THREADING_TRACE
+
+typedef struct _threading_trace_record {
+    uint32_t time;
+    uint32_t obj;
+    int32_t value;
+    uint16_t waited;
+    uint16_t thread;
+    uint8_t op;
+} ThreadingTraceRecord;
+
+static ThreadingTraceRecord thtrace[ZERYNTH_THREADING_TRACE];
+static uint32_t thtrace_head;
+static uint32_t thtrace_tail;
+static uint32_t thtrace_lost;
+
+static void thtrace_add(uint8_t op, void *obj, int32_t value, uint32_t since) {
+    ThreadingTraceRecord *r = &thtrace[thtrace_head % ZERYNTH_THREADING_TRACE];
+    uint32_t now = (uint32_t)_systime_millis;
+    r->time = now;
+    r->obj = (uint32_t)obj;
+    r->value = value;
+    r->waited = (now - since > 0xffff) ? 0xffff : (uint16_t)(now - since);
+    r->thread = (uint16_t)vosThGetId(vosThCurrent());
+    r->op = op;
+    thtrace_head++;
+}
+
+static PObject *thtrace_uint(uint32_t x) {
+    if (x < 0x40000000)
+        return PSMALLINT_NEW(x);
+    return (PObject *)pinteger_new_u(x);
+}
+
+static PObject *thtrace_drain(void) {
+    uint32_t n = thtrace_head - thtrace_tail;
+    if (n > ZERYNTH_THREADING_TRACE) {
+        thtrace_lost += n - ZERYNTH_THREADING_TRACE;
+        thtrace_tail = thtrace_head - ZERYNTH_THREADING_TRACE;
+        n = ZERYNTH_THREADING_TRACE;
+    }
+    PTuple *recs = psequence_new(PTUPLE, n);
+    PTuple *res = psequence_new(PTUPLE, 2);
+    PTUPLE_SET_ITEM(res, 0, recs);
+    uint32_t i;
+    for (i = 0; i < n; i++) {
+        ThreadingTraceRecord *r = &thtrace[(thtrace_tail + i) % ZERYNTH_THREADING_TRACE];
+        PTuple *rec = psequence_new(PTUPLE, 6);
+        PTUPLE_SET_ITEM(rec, 0, thtrace_uint(r->time));
+        PTUPLE_SET_ITEM(rec, 1, PSMALLINT_NEW(r->op));
+        PTUPLE_SET_ITEM(rec, 2, thtrace_uint(r->obj));
+        PTUPLE_SET_ITEM(rec, 3, PSMALLINT_NEW(r->thread));
+        PTUPLE_SET_ITEM(rec, 4, PSMALLINT_NEW(r->value));
+        PTUPLE_SET_ITEM(rec, 5, PSMALLINT_NEW(r->waited));
+        PTUPLE_SET_ITEM(recs, i, rec);
+    }
+    thtrace_tail += n;
+    PTUPLE_SET_ITEM(res, 1, thtrace_uint(thtrace_lost));
+    thtrace_lost = 0;
+    return (PObject *)res;
+}
+
+// record an operation; since is the time the operation started, for waits
+#define THTRACE(category, op, obj, value, since) do { if (VM_IS_TRACING(category)) thtrace_add(op, obj, value, since); } while (0)
+#define THTRACE_NOW() ((uint32_t)_systime_millis)
+
+#else
+
+#define THTRACE(category, op, obj, value, since) do { } while (0)
+#define THTRACE_NOW() 0
+
+#endif
 
 
 C_NATIVE(__rtos_do) {
@@ -37,7 +131,7 @@ C_NATIVE(__rtos_do) {
             }
             oo = psysobj_new(PSYS_SEMAPHORE);
             oo->sys.sem = vosSemCreate(value);
-            printf("+sem_create %x\r\n", oo);
+            THTRACE(THREADING_TRACE_SEM, code, oo, value, 0);
             *res = (PObject *)oo;
         }
         break;
@@ -46,9 +140,8 @@ C_NATIVE(__rtos_do) {
                 return ERR_TYPE_EXC;
             CHECK_ARG(argv[0], PSYSOBJ);
             oo  = (PSysObject *)argv[0];
-            printf("+sem_signal %x\r\n", oo);
             vosSemSignal(oo->sys.sem);
-            printf("-sem_signal %x\r\n", oo);
+            THTRACE(THREADING_TRACE_SEM, code, oo, 0, 0);
         }
         break;
 
@@ -60,12 +153,11 @@ C_NATIVE(__rtos_do) {
                 timeout = PSMALLINT_VALUE(argv[1]);
             }
             oo  = (PSysObject *)argv[0];
-            //printf("RTOS LOCK\n");
-            printf("+sem_wait %i %x\n",timeout,oo);
+            uint32_t since = THTRACE_NOW();
             RELEASE_GIL();
             timeout = vosSemWaitTimeout(oo->sys.sem, timeout <= 0 ? VTIME_INFINITE : (uint32_t)TIME_U(timeout, MILLIS));
             ACQUIRE_GIL();
-            printf("-sem_wait %i %x\n",timeout,oo);
+            THTRACE(THREADING_TRACE_WAIT, code, oo, timeout, since);
             *res = (PObject *)PSMALLINT_NEW(timeout);
         }
         break;
@@ -73,9 +165,8 @@ C_NATIVE(__rtos_do) {
         case RTOS__SEM_RESET: {
             CHECK_ARG(argv[0], PSYSOBJ);
             oo  = (PSysObject *)argv[0];
-            printf("+sem_reset %i %x\n", code,oo);
             vosSemReset(oo->sys.sem);
-            printf("-sem_reset %i %x\n", code,oo);
+            THTRACE(THREADING_TRACE_SEM, code, oo, 0, 0);
         }
         break;
         case RTOS__SEM_TRYLOCK: {
@@ -83,7 +174,6 @@ C_NATIVE(__rtos_do) {
                 return ERR_TYPE_EXC;
             CHECK_ARG(argv[0], PSYSOBJ);
             oo  = (PSysObject *)argv[0];
-            printf("+try_lock sem for cmd %i %x\n", code,oo);
             RELEASE_GIL();
             if (vosSemTryWait(oo->sys.sem)==VRES_OK){
                 *res = PSMALLINT_NEW(0);
@@ -101,8 +191,7 @@ C_NATIVE(__rtos_do) {
             //     SYSUNLOCK();
             // } //semaphore taken
             ACQUIRE_GIL();
-            printf("-try_lock sem for cmd %i %x\n", code,oo);
-            
+            THTRACE(THREADING_TRACE_WAIT, code, oo, PSMALLINT_VALUE(*res), THTRACE_NOW());
         }
         break;
         case RTOS__SEM_SIGNAL_WAIT: {
@@ -115,7 +204,7 @@ C_NATIVE(__rtos_do) {
                 CHECK_ARG(argv[2], PSMALLINT);
                 timeout = PSMALLINT_VALUE(argv[2]);
             }
-            printf("+signalling_waiting sem for cmd %i %x\n", code,oo);
+            uint32_t since = THTRACE_NOW();
             RELEASE_GIL();
             PSysObject *qq = (PSysObject *)argv[1]; //sem to be waited
             timeout = vosSemSignalWait(oo->sys.sem,qq->sys.sem);
@@ -124,7 +213,7 @@ C_NATIVE(__rtos_do) {
             // oo  = (PSysObject *)argv[1]; //sem to be waited
             // timeout = vosSemWaitTimeout(oo->sys.sem, timeout <= 0 ? VTIME_INFINITE : (uint32_t)TIME_U(timeout, MILLIS));
             ACQUIRE_GIL();
-            printf("-signalling_waiting sem for cmd %i %x\n", code,oo);
+            THTRACE(THREADING_TRACE_WAIT, code, qq, timeout, since);
             *res = (PObject *) PSMALLINT_NEW(timeout);
         }
         break;
@@ -133,14 +222,13 @@ C_NATIVE(__rtos_do) {
                 return ERR_TYPE_EXC;
             CHECK_ARG(argv[0], PSYSOBJ);
             oo  = (PSysObject *)argv[0];
-            printf("+signalling_if_waiting sem for cmd %i\n", code);
             SYSLOCK();
             int32_t cnt = vosSemGetValue(oo->sys.sem);
             if (cnt<0){
                 vosSemSignalIsr(oo->sys.sem);
             }
             SYSUNLOCK();
-            printf("-signalling_if_waiting sem for cmd %i\n", code);
+            THTRACE(THREADING_TRACE_SEM, code, oo, cnt < 0, 0);
         }
         break;
         case RTOS__SEM_SIGNAL_ALL:{
@@ -148,16 +236,16 @@ C_NATIVE(__rtos_do) {
                 return ERR_TYPE_EXC;
             CHECK_ARG(argv[0], PSYSOBJ);
             oo  = (PSysObject *)argv[0];
-            printf("+signalling_all sem for cmd %i %x\n", code,oo);
+            int32_t woken = 0;
             SYSLOCK();
             int32_t cnt = vosSemGetValue(oo->sys.sem);
             while (cnt<0){
                 vosSemSignalIsr(oo->sys.sem);
+                woken++;
                 cnt = vosSemGetValue(oo->sys.sem);
             }
             SYSUNLOCK();
-            printf("-signalling_all sem for cmd %i %x\n", code,oo);
-
+            THTRACE(THREADING_TRACE_SEM, code, oo, woken, 0);
         }
         break;
         case RTOS__THD_CURRENT: {
@@ -167,7 +255,7 @@ C_NATIVE(__rtos_do) {
         case RTOS__EVT_CREATE: {
             oo = psysobj_new(PSYS_EVENT);
             oo->sys.evt = vosEventCreate();
-            printf("+evt_create %x\r\n", oo);
+            THTRACE(THREADING_TRACE_EVT, code, oo, 0, 0);
             *res = (PObject *)oo;
         }
         break;
@@ -176,9 +264,8 @@ C_NATIVE(__rtos_do) {
                 return ERR_TYPE_EXC;
             CHECK_ARG(argv[0], PSYSOBJ);
             oo  = (PSysObject *)argv[0];
-            printf("+evt_set %x\r\n", oo);
             vosEventSet(oo->sys.evt);
-            printf("-evt_set %x\r\n", oo);
+            THTRACE(THREADING_TRACE_EVT, code, oo, 0, 0);
         }
         break;
         case RTOS__EVT_CLEAR: {
@@ -186,9 +273,8 @@ C_NATIVE(__rtos_do) {
                 return ERR_TYPE_EXC;
             CHECK_ARG(argv[0], PSYSOBJ);
             oo  = (PSysObject *)argv[0];
-            printf("+evt_clear %x\r\n", oo);
             vosEventClear(oo->sys.evt);
-            printf("-evt_clear %x\r\n", oo);
+            THTRACE(THREADING_TRACE_EVT, code, oo, 0, 0);
         }
         break;
         case RTOS__EVT_WAIT: {
@@ -199,9 +285,11 @@ C_NATIVE(__rtos_do) {
                 timeout = PSMALLINT_VALUE(argv[1]);
             }
             oo  = (PSysObject *)argv[0];
+            uint32_t since = THTRACE_NOW();
             RELEASE_GIL();
             timeout = vosEventWait(oo->sys.evt, timeout <= 0 ? VTIME_INFINITE : (uint32_t)TIME_U(timeout, MILLIS));
             ACQUIRE_GIL();
+            THTRACE(THREADING_TRACE_WAIT, code, oo, timeout, since);
             *res = (PObject *)PSMALLINT_NEW(timeout);
         }
         break;
@@ -222,9 +310,16 @@ C_NATIVE(__rtos_do) {
                 CHECK_ARG(argv[1], PSMALLINT);
                 cap = PSMALLINT_VALUE(argv[1]);
             }
-            printf("+sem_signal %x\r\n", oo);
             vosSemSignalCap(oo->sys.sem, cap);
-            printf("-sem_signal %x\r\n", oo);
+            THTRACE(THREADING_TRACE_SEM, code, oo, cap, 0);
+        }
+        break;
+        case RTOS__TRACE_DRAIN: {
+#if ZERYNTH_THREADING_TRACE
+            *res = thtrace_drain();
+#else
+            return ERR_UNSUPPORTED_EXC;
+#endif
         }
         break;
         default:
@@ -23,6 +23,9 @@
 #include  "zlwip.h"
 #endif
 
+//zerynth only recv flag: return as soon as some bytes are received (must match socket.MSG_PARTIAL)
+#define ZSOCK_MSG_PARTIAL 0x8000
+
 typedef struct _zsocket_info {
     int8_t idx;        //index of the socket in the list of ssl sockets. negative if not assigned
 } ZSocketInfo;
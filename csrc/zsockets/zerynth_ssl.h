@@ -19,6 +19,7 @@
 #define _CERT_REQUIRED 4
 #define _CLIENT_AUTH 8
 #define _SERVER_AUTH 16
+#define _SESSION_RESUME 32
 
 
 typedef struct _sslinfo {
@@ -67,6 +68,7 @@ int zssl_send(int s, const void *dataptr, size_t size, int flags);
 int zssl_write(int s, const void *dataptr, size_t size);
 int zssl_setsockopt(int s, int level, int optname, const void *optval, socklen_t optlen);
 int zssl_select(int maxfdp1, void *readset, void *writeset, void *exceptset, struct timeval *timeout);
+int zssl_session_info(int s, uint32_t *handshake_time);
 
 #endif
 
@@ -8,7 +8,24 @@
 #include "mbedtls/error.h"
 #include "mbedtls/certs.h"
 #include "mbedtls/threading.h"
+#include "mbedtls/sha256.h"
 
+//number of TLS sessions kept for resumption (default 2)
+#if !defined(ZERYNTH_SSL_SESSION_CACHE)
+#define ZERYNTH_SSL_SESSION_CACHE 2
+#endif
+
+//size of the digest identifying the server name and the verification context of a session
+#define SSL_SESSION_PEER_ID 32
+
+typedef struct _sslsession {
+    uint32_t ip;        //server address, network order
+    uint16_t port;      //server port, network order
+    uint8_t peer_id[SSL_SESSION_PEER_ID];   //hostname (SNI), CA chain, client certificate and verify options
+    uint8_t valid;
+    uint32_t used;      //time of last use in millis, for lru replacement
+    mbedtls_ssl_session session;
+} SSLSession;
 
 typedef struct _sslsock {
     int32_t family;
@@ -16,6 +33,10 @@ typedef struct _sslsock {
     int32_t proto;
     uint8_t assigned;
     uint8_t initialized;
+    uint8_t resume;             //session resumption enabled
+    uint8_t resumed;            //the last handshake resumed a cached session
+    uint32_t handshake_time;    //duration of the last handshake in millis
+    uint8_t peer_id[SSL_SESSION_PEER_ID];   //key of the cached session, see SSLSession
     mbedtls_entropy_context entropy;
     mbedtls_ctr_drbg_context ctr_drbg;
     mbedtls_ssl_context ssl;
@@ -31,6 +52,8 @@ void mbedtls_gc_free( void *pnt);
 void * mbedtls_gc_calloc( size_t n, size_t m);
 int mbedtls_full_connect(SSLSock* ssock, const struct sockaddr* name, socklen_t namelen);
 int mbedtls_full_close(SSLSock* ssock);
+void mbedtls_session_cache_init(void);
+void mbedtls_session_peer_id(SSLSock* ssock, SSLInfo* sinfo);
 void mbedtls_uninit(SSLSock* ssock);
 void mbedtls_f_dbg(void *ctx, int lvl, const char *file, int line, const char* message);
 #if !defined(ZERYNTH_SSL_EXTERNAL_STACK)
@@ -233,6 +233,9 @@ C_NATIVE(py_net_recv_into)
     buf += ofs;
     len -= ofs;
     len = (sz < len) ? sz : len;
+    //with ZSOCK_MSG_PARTIAL return after the first successful recv instead of filling the buffer
+    int partial = flags & ZSOCK_MSG_PARTIAL;
+    flags &= ~ZSOCK_MSG_PARTIAL;
     RELEASE_GIL();
     int rb = 0;
     int r;
@@ -241,6 +244,8 @@ C_NATIVE(py_net_recv_into)
         if (r <= 0)
             break;
         rb += r;
+        if (partial)
+            break;
     }
     ACQUIRE_GIL();
     if (r <= 0) {
@@ -488,6 +493,7 @@ C_NATIVE(py_net_select)
 #define _CERT_REQUIRED 4
 #define _CLIENT_AUTH 8
 #define _SERVER_AUTH 16
+#define _SESSION_RESUME 32
 
 
 // ZHWCryptoAPIPointers *zhwcrypto_api_pointers_backup = NULL;
@@ -570,6 +576,29 @@ C_NATIVE(py_secure_socket)
 #endif
 }
 
+C_NATIVE(py_secure_socket_info)
+{
+    C_NATIVE_UNWARN();
+#if !defined(ZERYNTH_SSL)
+    return ERR_UNSUPPORTED_EXC;
+#else
+    int32_t sock;
+    int32_t resumed;
+    uint32_t tm;
+
+    if (parse_py_args("i", nargs, args, &sock) != 1)
+        return ERR_TYPE_EXC;
+    if (sock < 0 || sock >= MAX_SOCKETS || !IS_SECURE_SOCKET(sock))
+        return ERR_VALUE_EXC;
+    resumed = zssl_session_info(sock, &tm);
+    PTuple* tpl = (PTuple*)psequence_new(PTUPLE, 2);
+    PTUPLE_SET_ITEM(tpl, 0, PSMALLINT_NEW(tm));
+    PTUPLE_SET_ITEM(tpl, 1, (resumed) ? PBOOL_TRUE():PBOOL_FALSE());
+    *res = tpl;
+    return ERR_OK;
+#endif
+}
+
 
 
 
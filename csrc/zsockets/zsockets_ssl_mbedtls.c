@@ -40,6 +40,7 @@ int zssl_init(){
             mbedtls_mutex_lock_alt,
             mbedtls_mutex_unlock_alt);
 #endif
+    mbedtls_session_cache_init();
     return 0;
 }
 
@@ -91,6 +92,11 @@ int zssl_socket(int domain, int type, int protocol, void *ctx) {
     sslsock->family = domain;
     sslsock->socktype = type;
     sslsock->proto = protocol;
+    sslsock->resume = (sinfo->options&_SESSION_RESUME) ? 1:0;
+    sslsock->resumed = 0;
+    sslsock->handshake_time = 0;
+    if (sslsock->resume)
+        mbedtls_session_peer_id(sslsock, sinfo);
 
 
     if (!sslsock->initialized) {
@@ -190,6 +196,11 @@ int zssl_socket(int domain, int type, int protocol, void *ctx) {
         }
 
         mbedtls_ssl_conf_rng(&sslsock->conf, mbedtls_ctr_drbg_random, &sslsock->ctr_drbg);
+#if defined(MBEDTLS_SSL_SESSION_TICKETS) && defined(MBEDTLS_SSL_CLI_C)
+        //resumable sessions can be stored client side as tickets
+        mbedtls_ssl_conf_session_tickets(&sslsock->conf,
+                (sinfo->options&_SESSION_RESUME) ? MBEDTLS_SSL_SESSION_TICKETS_ENABLED:MBEDTLS_SSL_SESSION_TICKETS_DISABLED);
+#endif
         if ((err = mbedtls_ssl_setup(&sslsock->ssl, &sslsock->conf)) != 0) {
             ERROR("Can't setup SSL %i %x",err,err);
             return err;
@@ -276,6 +287,13 @@ int zssl_setsockopt(int s, int level, int optname, const void *optval, socklen_t
     return 0;
 }
 
+int zssl_session_info(int s, uint32_t *handshake_time){
+    //returns 1 if the last handshake resumed a cached session
+    SSLSock *sslsock = GET_SECURE_SOCKET(s);
+    *handshake_time = sslsock->handshake_time;
+    return sslsock->resumed;
+}
+
 int zssl_select(int maxfdp1, void *readset, void *writeset, void *exceptset, struct timeval *timeout){
     SSLSock *sslsock = GET_SECURE_SOCKET(maxfdp1-1);
     
@@ -27,10 +27,116 @@ unsigned char _ssl_memory_buf[ZERYNTH_SSL_STATIC_MEMORY_BYTES];
 #endif //STATIC MEMORY
 
 
+/*
+ * TLS session cache: sessions negotiated by sockets with _SESSION_RESUME are saved by server address and peer id
+ * and offered again at the next connection to the same server (session id or session ticket).
+ * The peer id is a digest of the server hostname (SNI) and of the verification context: a resumed handshake skips
+ * certificate verification, so a session must never be offered to another name on the same address (virtual hosts, CDNs)
+ * or by a socket trusting different CAs.
+ */
+SSLSession sslsessions[ZERYNTH_SSL_SESSION_CACHE];
+VSemaphore sslsessions_lock;
+static uint8_t sslsessions_ready = 0;
+
+void mbedtls_session_cache_init(void){
+    //zssl_init can be called more than once
+    if (sslsessions_ready)
+        return;
+    sslsessions_lock = vosSemCreate(1);
+    sslsessions_ready = 1;
+}
+
+static void peer_id_update(mbedtls_sha256_context* sha, const uint8_t* data, uint32_t len){
+    //length prefixed, so that fields can not be shifted into each other
+    uint8_t hdr[4];
+    hdr[0] = len>>24;
+    hdr[1] = len>>16;
+    hdr[2] = len>>8;
+    hdr[3] = len;
+    mbedtls_sha256_update(sha, hdr, 4);
+    if (len)
+        mbedtls_sha256_update(sha, data, len);
+}
+
+void mbedtls_session_peer_id(SSLSock* ssock, SSLInfo* sinfo){
+    mbedtls_sha256_context sha;
+    uint8_t opts = sinfo->options&(_CERT_NONE|_CERT_OPTIONAL|_CLIENT_AUTH|_SERVER_AUTH);
+    mbedtls_sha256_init(&sha);
+    mbedtls_sha256_starts(&sha, 0);
+    //the hostname is used for SNI and verification only with a CA (see zssl_socket)
+    peer_id_update(&sha, sinfo->hostname, (sinfo->cacert_len) ? sinfo->hostname_len:0);
+    peer_id_update(&sha, sinfo->cacert, sinfo->cacert_len);
+    peer_id_update(&sha, sinfo->clicert, sinfo->clicert_len);
+    peer_id_update(&sha, &opts, 1);
+    mbedtls_sha256_finish(&sha, ssock->peer_id);
+    mbedtls_sha256_free(&sha);
+}
+
+static SSLSession* mbedtls_session_find(SSLSock* ssock, const struct sockaddr_in* addr, int replace){
+    //return the cached session for addr and the peer id of ssock; if not found and replace is set, return the slot to be used
+    int i;
+    SSLSession* lru = NULL;
+    for (i = 0; i < ZERYNTH_SSL_SESSION_CACHE; i++) {
+        SSLSession* ss = &sslsessions[i];
+        if (ss->valid && ss->ip == addr->sin_addr.s_addr && ss->port == addr->sin_port
+                && memcmp(ss->peer_id, ssock->peer_id, SSL_SESSION_PEER_ID) == 0)
+            return ss;
+        if (!lru || (lru->valid && (!ss->valid || ss->used < lru->used)))
+            lru = ss;
+    }
+    return (replace) ? lru:NULL;
+}
+
+static void mbedtls_session_drop(SSLSession* ss){
+    if (ss->valid) {
+        mbedtls_ssl_session_free(&ss->session);
+        ss->valid = 0;
+    }
+}
+
+static void mbedtls_session_load(SSLSock* ssock, const struct sockaddr_in* addr){
+    vosSemWait(sslsessions_lock);
+    SSLSession* ss = mbedtls_session_find(ssock, addr, 0);
+    if (ss) {
+        DEBUG(LVL0,"Offering cached session","");
+        if (mbedtls_ssl_set_session(&ssock->ssl, &ss->session) != 0)
+            mbedtls_session_drop(ss);
+        else
+            ss->used = (uint32_t)_systime_millis;
+    }
+    vosSemSignal(sslsessions_lock);
+}
+
+static void mbedtls_session_save(SSLSock* ssock, const struct sockaddr_in* addr){
+    vosSemWait(sslsessions_lock);
+    SSLSession* ss = mbedtls_session_find(ssock, addr, 1);
+    mbedtls_session_drop(ss);
+    mbedtls_ssl_session_init(&ss->session);
+    if (mbedtls_ssl_get_session(&ssock->ssl, &ss->session) != 0) {
+        mbedtls_ssl_session_free(&ss->session);
+    } else {
+        ss->ip = addr->sin_addr.s_addr;
+        ss->port = addr->sin_port;
+        memcpy(ss->peer_id, ssock->peer_id, SSL_SESSION_PEER_ID);
+        ss->used = (uint32_t)_systime_millis;
+        ss->valid = 1;
+    }
+    vosSemSignal(sslsessions_lock);
+}
+
+static void mbedtls_session_forget(SSLSock* ssock, const struct sockaddr_in* addr){
+    vosSemWait(sslsessions_lock);
+    SSLSession* ss = mbedtls_session_find(ssock, addr, 0);
+    if (ss)
+        mbedtls_session_drop(ss);
+    vosSemSignal(sslsessions_lock);
+}
+
 int mbedtls_full_connect(SSLSock* ssock, const struct sockaddr* name, socklen_t namelen)
 {
     int ret = MBEDTLS_ERR_NET_UNKNOWN_HOST;
     int tt =0;
+    uint32_t t0;
     mbedtls_net_context* ctx = &ssock->ctx;
 
     if ((tt=zsock_connect(ctx->fd, name, namelen)) != 0) {
@@ -43,16 +149,34 @@ int mbedtls_full_connect(SSLSock* ssock, const struct sockaddr* name, socklen_t
 
     mbedtls_ssl_set_bio(&ssock->ssl, ctx, mbedtls_net_send, mbedtls_net_recv, mbedtls_net_recv_timeout);
 
-    while ((ret = mbedtls_ssl_handshake(&ssock->ssl)) != 0) {
-        if (ret != MBEDTLS_ERR_SSL_WANT_READ && ret != MBEDTLS_ERR_SSL_WANT_WRITE) {
+    ssock->resumed = 0;
+    if (ssock->resume)
+        mbedtls_session_load(ssock, (const struct sockaddr_in*)name);
+
+    t0 = (uint32_t)_systime_millis;
+    //step the handshake to check if the server accepted the offered session
+    while (ssock->ssl.state != MBEDTLS_SSL_HANDSHAKE_OVER) {
+        ret = mbedtls_ssl_handshake_step(&ssock->ssl);
+        if (ret != 0) {
+            if (ret == MBEDTLS_ERR_SSL_WANT_READ || ret == MBEDTLS_ERR_SSL_WANT_WRITE)
+                continue;
             ERROR("in SSL handshake %i %x",ret,ret);
+            if (ssock->resume)
+                mbedtls_session_forget(ssock, (const struct sockaddr_in*)name);
             UNSET_SECURE_SOCKET(ctx->fd);
             mbedtls_ssl_session_reset(&ssock->ssl);
             mbedtls_net_free(ctx);
             mbedtls_uninit(ssock);
             return ret;
         }
+        if (ssock->ssl.handshake && ssock->ssl.handshake->resume)
+            ssock->resumed = 1;
     }
+    ssock->handshake_time = (uint32_t)_systime_millis - t0;
+    DEBUG(LVL0,"Handshake completed in %i millis, resumed %i",ssock->handshake_time,ssock->resumed);
+
+    if (ssock->resume)
+        mbedtls_session_save(ssock, (const struct sockaddr_in*)name);
 
     return 0;
 }
@@ -0,0 +1,147 @@
+"""
+.. module:: dnscache
+
+*********
+DNS Cache
+*********
+
+This module implements a cache of host name resolutions shared by all the network modules: :mod:`requests`, :mod:`ntpclient` and the
+``gethostbyname`` functions of the :mod:`wifi`, :mod:`eth` and :mod:`gsm` modules look up host names through it, so that a DNS round trip
+(hundreds of milliseconds on GSM) is needed only the first time a host is contacted or when its entry expires.
+
+Net drivers do not report the TTL of DNS records, therefore every resolved address is kept for a fixed time, configurable with :func:`configure`.
+Failed resolutions are cached too, for a shorter time, so that unreachable hosts do not cost a DNS timeout on each request.
+When the cache is full, the least recently used entry is discarded.
+
+Host names that are already IPv4 addresses are returned as they are, without being cached. ::
+
+    import dnscache
+
+    # keep addresses for 10 minutes and failures for 5 seconds
+    dnscache.configure(ttl=600000,negative_ttl=5000)
+    ip = dnscache.gethostbyname("www.zerynth.com")
+
+    """
+
+import threading
+import timers
+
+_ttl = 300000
+_negative_ttl = 10000
+_max_entries = 16
+
+# cached resolutions as [hostname,address or exception,expiration time,failed], least recently used first
+_entries = []
+_lock = threading.Lock()
+
+
+def configure(ttl=300000,negative_ttl=10000,max_entries=16):
+    """
+.. function:: configure(ttl=300000,negative_ttl=10000,max_entries=16)
+
+    Sets the time in milliseconds resolved addresses (*ttl*) and failed resolutions (*negative_ttl*) are kept in the cache, and the maximum
+    number of cached host names *max_entries*. A *negative_ttl* of zero disables the caching of failures, a *max_entries* of zero disables the cache.
+
+    Entries already in the cache keep their expiration time.
+
+    """
+    global _ttl, _negative_ttl, _max_entries
+    _lock.acquire()
+    _ttl = ttl
+    _negative_ttl = negative_ttl
+    _max_entries = max_entries
+    while len(_entries)>max_entries:
+        _entries.pop(0)
+    _lock.release()
+
+
+def _is_ip(hostname):
+    dots = 0
+    for i in range(len(hostname)):
+        c = __byte_get(hostname,i)
+        if c==__ORD("."):
+            dots+=1
+        elif c<__ORD("0") or c>__ORD("9"):
+            return False
+    return dots==3
+
+
+def _lookup(hostname):
+    # returns the cache entry of hostname, moved to the most recently used position
+    now = timers.now()
+    i = 0
+    while i<len(_entries):
+        e = _entries[i]
+        if now-e[2]>=0:
+            # expired
+            _entries.pop(i)
+            continue
+        if e[0]==hostname:
+            if i!=len(_entries)-1:
+                _entries.pop(i)
+                _entries.append(e)
+            return e
+        i+=1
+    return None
+
+
+def _store(hostname,res,ttl,failed):
+    if ttl<=0 or _max_entries<=0:
+        return
+    _lock.acquire()
+    e = _lookup(hostname)
+    if e is not None:
+        _entries.remove(e)
+    elif len(_entries)>=_max_entries:
+        _entries.pop(0)
+    _entries.append([hostname,res,timers.now()+ttl,failed])
+    _lock.release()
+
+
+def gethostbyname(hostname,resolve=None):
+    """
+.. function:: gethostbyname(hostname,resolve=None)
+
+    Translates a host name to IPv4 address format, returned as a string such as "192.168.0.5", using the cache when possible.
+
+    *resolve* is the function called to resolve *hostname* when it is not in the cache: if not given, ``gethostbyname`` of the default net driver is used.
+
+    If the resolution fails, the exception raised by *resolve* is cached and raised again for the following requests of *hostname*, until it expires.
+
+    """
+    if _is_ip(hostname):
+        return hostname
+    _lock.acquire()
+    e = _lookup(hostname)
+    _lock.release()
+    if e is not None:
+        if e[3]:
+            raise e[1]
+        return e[1]
+    if resolve is None:
+        resolve = __default_net["sock"][0].gethostbyname
+    try:
+        ip = resolve(hostname)
+    except Exception as err:
+        _store(hostname,err,_negative_ttl,True)
+        raise err
+    _store(hostname,ip,_ttl,False)
+    return ip
+
+
+def flush(hostname=None):
+    """
+.. function:: flush(hostname=None)
+
+    Removes *hostname* from the cache, or all the entries if *hostname* is not given.
+
+    """
+    _lock.acquire()
+    if hostname is None:
+        while _entries:
+            _entries.pop()
+    else:
+        e = _lookup(hostname)
+        if e is not None:
+            _entries.remove(e)
+    _lock.release()
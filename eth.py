@@ -17,16 +17,19 @@ intervention by the driver itself.
 
     """
 
+import dnscache
 
 
 def gethostbyname(hostname):
     """
 .. function:: gethostbyname(hostname)        
 
-        Translate a host name to IPv4 address format. The IPv4 address is returned as a string, such as "192.168.0.5". 
-                
+        Translate a host name to IPv4 address format. The IPv4 address is returned as a string, such as "192.168.0.5".
+
+        Resolutions are cached, see :mod:`dnscache`.
+
     """
-    return __default_net["eth"].gethostbyname(hostname)
+    return dnscache.gethostbyname(hostname,__default_net["eth"].gethostbyname)
 
 
 def select(rlist,wlist,xlist,timeout=None):
@@ -0,0 +1,433 @@
+"""
+.. module:: eventloop
+
+**********
+Event Loop
+**********
+
+This module implements a cooperative event loop that runs many concurrent activities (connections, periodic tasks, serial protocols) in a single thread.
+The API is inspired by the low level callback API of the Python module `asyncio <https://docs.python.org/3/library/asyncio-eventloop.html>`_.
+
+Every :class:`threading.Thread` needs its own stack of hundreds of bytes and a blocking call like ``socket.recv`` parks the whole thread while waiting.
+With an event loop, an activity is instead a callback (or an object keeping its state between callbacks, i.e. a state machine) that is invoked when there is something to do:
+
+    * when a socket is ready for reading or writing (:meth:`~EventLoop.add_reader`, :meth:`~EventLoop.add_writer`)
+    * when a stream like :func:`streams.serial` has bytes available (:meth:`~EventLoop.add_stream_reader`)
+    * when a deadline expires (:meth:`~EventLoop.call_later`, :meth:`~EventLoop.call_every`)
+    * as soon as possible (:meth:`~EventLoop.call_soon`)
+
+All callbacks are called as ``fn(arg)``, like the ones of :class:`timers.timer`, but they run in the thread of the loop, one at a time: no locking is needed
+between them. A callback must never block, otherwise all the other activities are blocked too: sockets should be read with ``socket.MSG_PARTIAL``
+or with the amount of bytes the loop signaled as available.
+
+Sockets are multiplexed with a :class:`selectors.DefaultSelector`, deadlines are kept in a binary heap and the loop sleeps inside the net driver ``select``
+until the first deadline. Streams without a file descriptor are polled with ``available()`` every *poll* milliseconds. ::
+
+    import streams
+    import eventloop
+
+    s = streams.serial()
+    loop = eventloop.EventLoop()
+
+    def blink(led):
+        digitalWrite(led,digitalRead(led)^1)
+
+    def echo(ser):
+        ser.write(ser.read(ser.available()))
+
+    pinMode(LED0,OUTPUT)
+    loop.call_every(500,blink,LED0)
+    loop.add_stream_reader(s,echo,s)
+    loop.run_forever()
+
+    """
+
+import timers
+import selectors
+
+new_exception(EventLoopError,RuntimeError)
+
+_default = None
+
+
+class Handle():
+    """
+============
+Handle class
+============
+
+.. class:: Handle
+
+    A scheduled callback, returned by the ``call_*`` and ``add_*`` methods of :class:`EventLoop`. It is not meant to be created directly.
+
+    """
+    def __init__(self,fn,arg,when=0,period=0):
+        self.fn = fn
+        self.arg = arg
+        self.when = when
+        self.period = period
+        self.seq = 0
+        self.cancelled = False
+
+    def cancel(self):
+        """
+.. method:: cancel()
+
+    Cancels the callback: if it has not run yet, it will not run. Periodic callbacks are stopped. Cancelling a callback twice has no effect.
+
+        """
+        self.cancelled = True
+
+
+class EventLoop():
+    """
+===============
+EventLoop class
+===============
+
+.. class:: EventLoop(netdrv=None,poll=20,exception_handler=None)
+
+    Creates an event loop. *netdrv* is the net driver whose ``select`` waits for the sockets (see :class:`selectors.DefaultSelector`).
+
+    *poll* is the interval in milliseconds at which streams registered with :meth:`add_stream_reader` are checked: a lower value gives a faster
+    reaction to incoming bytes at the cost of more wakeups.
+
+    If a callback raises an exception, *exception_handler(exc)* is called and the loop goes on; without *exception_handler* the exception
+    stops the loop and is raised by :meth:`run_forever`.
+
+    A loop must be run by a single thread and its methods must be called only from that thread (usually from callbacks).
+
+    """
+    def __init__(self,netdrv=None,poll=20,exception_handler=None):
+        self.poll = poll
+        self.exception_handler = exception_handler
+        self._sel = selectors.DefaultSelector(netdrv)
+        self._ready = []
+        # binary heap of timed handles ordered by deadline, then by scheduling order
+        self._timers = []
+        self._seq = 0
+        # [stream,handle] pairs polled with available()
+        self._streams = []
+        self._running = False
+        self._stopping = False
+
+    # ---- deadlines
+
+    def _before(self,a,b):
+        d = a.when-b.when
+        return d<0 or (d==0 and a.seq<b.seq)
+
+    def _push(self,h):
+        h.seq = self._seq
+        self._seq+=1
+        q = self._timers
+        q.append(h)
+        i = len(q)-1
+        # sift up
+        while i>0:
+            p = (i-1)//2
+            if not self._before(h,q[p]):
+                break
+            q[i] = q[p]
+            i = p
+        q[i] = h
+
+    def _pop(self):
+        q = self._timers
+        res = q[0]
+        last = q.pop()
+        n = len(q)
+        if n:
+            # sift down
+            i = 0
+            while True:
+                c = 2*i+1
+                if c>=n:
+                    break
+                if c+1<n and self._before(q[c+1],q[c]):
+                    c+=1
+                if not self._before(q[c],last):
+                    break
+                q[i] = q[c]
+                i = c
+            q[i] = last
+        return res
+
+    def time(self):
+        """
+.. method:: time()
+
+    Returns the current time of the loop in milliseconds, the same clock of :func:`timers.now` used for deadlines.
+
+        """
+        return timers.now()
+
+    def call_soon(self,fn,arg=None):
+        """
+.. method:: call_soon(fn,arg=None)
+
+    Schedules *fn(arg)* to be called at the next iteration of the loop, after the callbacks already scheduled. Returns a :class:`Handle`.
+
+        """
+        h = Handle(fn,arg)
+        self._ready.append(h)
+        return h
+
+    def call_later(self,delay,fn,arg=None):
+        """
+.. method:: call_later(delay,fn,arg=None)
+
+    Schedules *fn(arg)* to be called once after *delay* milliseconds. Callbacks with the same deadline are called in scheduling order. Returns a :class:`Handle`.
+
+        """
+        h = Handle(fn,arg,timers.now()+delay)
+        self._push(h)
+        return h
+
+    def call_every(self,period,fn,arg=None):
+        """
+.. method:: call_every(period,fn,arg=None)
+
+    Schedules *fn(arg)* to be called every *period* milliseconds, the first time after *period* milliseconds, until the returned :class:`Handle` is cancelled.
+
+    Deadlines are computed from the previous deadline, so the period does not drift with the duration of the callbacks; if the loop falls behind by more
+    than a period, the missed calls are skipped.
+
+        """
+        if period<=0:
+            raise ValueError
+        h = Handle(fn,arg,timers.now()+period,period)
+        self._push(h)
+        return h
+
+    # ---- sockets
+
+    def _add_socket(self,sock,event,slot,fn,arg):
+        h = Handle(fn,arg)
+        try:
+            key = self._sel.get_key(sock)
+        except KeyError:
+            key = None
+        if key is None:
+            hs = [None,None]
+            hs[slot] = h
+            self._sel.register(sock,event,hs)
+        else:
+            key.data[slot] = h
+            self._sel.modify(sock,key.events|event,key.data)
+        return h
+
+    def _remove_socket(self,sock,event,slot):
+        try:
+            key = self._sel.get_key(sock)
+        except KeyError:
+            return False
+        if not key.events&event:
+            return False
+        h = key.data[slot]
+        h.cancel()
+        key.data[slot] = None
+        if key.events==event:
+            self._sel.unregister(sock)
+        else:
+            self._sel.modify(sock,key.events&~event,key.data)
+        return True
+
+    def add_reader(self,sock,fn,arg=None):
+        """
+.. method:: add_reader(sock,fn,arg=None)
+
+    Calls *fn(arg)* every time *sock* is ready for reading (for a listening socket: a connection can be accepted), until :meth:`remove_reader` is called.
+    A previous reader of *sock* is replaced. Returns a :class:`Handle`.
+
+    The callback is invoked at each iteration as long as *sock* stays readable, so it does not need to consume all the available bytes at once.
+
+        """
+        return self._add_socket(sock,selectors.EVENT_READ,0,fn,arg)
+
+    def remove_reader(self,sock):
+        """
+.. method:: remove_reader(sock)
+
+    Stops watching *sock* for reading. Returns ``True`` if *sock* had a reader. Sockets must be removed from the loop before being closed.
+
+        """
+        return self._remove_socket(sock,selectors.EVENT_READ,0)
+
+    def add_writer(self,sock,fn,arg=None):
+        """
+.. method:: add_writer(sock,fn,arg=None)
+
+    Calls *fn(arg)* every time *sock* is ready for writing, until :meth:`remove_writer` is called. A previous writer of *sock* is replaced. Returns a :class:`Handle`.
+
+        """
+        return self._add_socket(sock,selectors.EVENT_WRITE,1,fn,arg)
+
+    def remove_writer(self,sock):
+        """
+.. method:: remove_writer(sock)
+
+    Stops watching *sock* for writing. Returns ``True`` if *sock* had a writer.
+
+        """
+        return self._remove_socket(sock,selectors.EVENT_WRITE,1)
+
+    # ---- streams
+
+    def add_stream_reader(self,stream,fn,arg=None):
+        """
+.. method:: add_stream_reader(stream,fn,arg=None)
+
+    Calls *fn(arg)* every time *stream* has bytes available, checked with ``stream.available()`` every *poll* milliseconds, until :meth:`remove_stream_reader` is called.
+    A previous reader of *stream* is replaced. Returns a :class:`Handle`.
+
+    It can be used with :func:`streams.serial` and any other stream implementing ``available()``.
+
+        """
+        self.remove_stream_reader(stream)
+        h = Handle(fn,arg)
+        self._streams.append([stream,h])
+        return h
+
+    def remove_stream_reader(self,stream):
+        """
+.. method:: remove_stream_reader(stream)
+
+    Stops watching *stream*. Returns ``True`` if *stream* had a reader.
+
+        """
+        for i in range(len(self._streams)):
+            if self._streams[i][0] is stream:
+                self._streams[i][1].cancel()
+                self._streams.pop(i)
+                return True
+        return False
+
+    # ---- running
+
+    def _timeout(self,now):
+        # milliseconds the loop can sleep waiting for sockets
+        if self._ready or self._stopping:
+            return 0
+        timeout = None
+        if self._timers:
+            timeout = self._timers[0].when-now
+            if timeout<0:
+                timeout = 0
+        if self._streams or not self._sel.get_map():
+            if timeout is None or timeout>self.poll:
+                timeout = self.poll
+        return timeout
+
+    def _call(self,h):
+        if h.cancelled:
+            return
+        if self.exception_handler is None:
+            h.fn(h.arg)
+            return
+        try:
+            h.fn(h.arg)
+        except Exception as e:
+            self.exception_handler(e)
+
+    def run_once(self):
+        """
+.. method:: run_once()
+
+    Runs a single iteration of the loop: waits for sockets until the first deadline (without waiting if callbacks are ready), then
+    calls the ready callbacks, the callbacks of ready sockets and streams and the expired timed callbacks.
+
+    It can be used to drive the loop from an existing main loop.
+
+        """
+        for key, events in self._sel.select(self._timeout(timers.now())):
+            hs = key.data
+            if events&selectors.EVENT_READ and hs[0] is not None:
+                self._ready.append(hs[0])
+            if events&selectors.EVENT_WRITE and hs[1] is not None:
+                self._ready.append(hs[1])
+        for sh in self._streams:
+            if sh[0].available():
+                self._ready.append(sh[1])
+        now = timers.now()
+        while self._timers and self._timers[0].when-now<=0:
+            h = self._pop()
+            if h.cancelled:
+                continue
+            self._ready.append(h)
+            if h.period:
+                h.when+=h.period
+                if h.when-now<=0:
+                    h.when = now+h.period
+                self._push(h)
+        # callbacks scheduled by the ones below run at the next iteration
+        ready = self._ready
+        self._ready = []
+        for h in ready:
+            self._call(h)
+
+    def run_forever(self):
+        """
+.. method:: run_forever()
+
+    Runs the loop until :meth:`stop` is called. Raises ``EventLoopError`` if the loop is already running.
+
+        """
+        if self._running:
+            raise EventLoopError
+        self._running = True
+        self._stopping = False
+        try:
+            while not self._stopping:
+                self.run_once()
+        except Exception as e:
+            self._running = False
+            self._stopping = False
+            raise e
+        self._running = False
+        self._stopping = False
+
+    def stop(self):
+        """
+.. method:: stop()
+
+    Stops the loop at the end of the current iteration.
+
+        """
+        self._stopping = True
+
+    def is_running(self):
+        """
+.. method:: is_running()
+
+    Returns ``True`` if the loop is running.
+
+        """
+        return self._running
+
+    def close(self):
+        """
+.. method:: close()
+
+    Drops all the scheduled callbacks, sockets and streams. Sockets and streams are not closed.
+
+        """
+        if self._running:
+            raise EventLoopError
+        self._sel.close()
+        self._ready = []
+        self._timers = []
+        self._streams = []
+
+
+def get_event_loop():
+    """
+.. function:: get_event_loop()
+
+    Returns the default :class:`EventLoop` of the program, creating it on the first call.
+
+    """
+    global _default
+    if _default is None:
+        _default = EventLoop()
+    return _default
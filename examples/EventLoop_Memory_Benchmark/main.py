@@ -0,0 +1,85 @@
+################################################################################
+# Event Loop Memory Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import threading
+import timers
+import gc
+import eventloop
+
+streams.serial()
+
+TASKS = 16
+PERIOD = 100
+RUN_TIME = 3000
+
+def free_memory():
+    gc.collect()
+    return gc.info()[1]
+
+# the same periodic activity, as a thread and as an event loop task: count its activations
+class Counter():
+    def __init__(self):
+        self.count = 0
+    def step(self,arg):
+        self.count+=1
+
+running = True
+def thread_task(c):
+    while running:
+        c.step(None)
+        sleep(PERIOD)
+
+def bench_threads(n,size):
+    global running
+    running = True
+    counters = []
+    before = free_memory()
+    for i in range(n):
+        c = Counter()
+        counters.append(c)
+        thread(thread_task,c,size=size)
+    used = before-free_memory()
+    sleep(RUN_TIME)
+    running = False
+    sleep(2*PERIOD)
+    total = 0
+    for c in counters:
+        total+=c.count
+    return used, total
+
+def stop_loop(loop):
+    loop.stop()
+
+def bench_loop(n):
+    loop = eventloop.EventLoop()
+    counters = []
+    before = free_memory()
+    for i in range(n):
+        c = Counter()
+        counters.append(c)
+        loop.call_every(PERIOD,c.step)
+    used = before-free_memory()
+    loop.call_later(RUN_TIME,stop_loop,loop)
+    loop.run_forever()
+    loop.close()
+    total = 0
+    for c in counters:
+        total+=c.count
+    return used, total
+
+while True:
+    try:
+        print("tasks:",TASKS,"period:",PERIOD,"ms")
+        used, total = bench_loop(TASKS)
+        print("event loop:",used,"bytes,",used//TASKS,"bytes per task,",total,"activations")
+        # the benchmark runs once: memory of ended threads is returned only by the garbage collector
+        used, total = bench_threads(TASKS,512)
+        print("threads   :",used,"bytes,",used//TASKS,"bytes per task,",total,"activations")
+    except Exception as e:
+        print(e)
+    while True:
+        sleep(5000)
@@ -0,0 +1,55 @@
+################################################################################
+# Fifo Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import timers
+import fifo
+
+streams.serial()
+
+def rate(n,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    return n*1000//elapsed
+
+# move total bytes through a byte fifo in chunks, one item at a time
+def per_item(f,chunk,total):
+    data = bytearray(chunk)
+    tm = timers.timer()
+    tm.start()
+    n = 0
+    while n<total:
+        for i in range(chunk):
+            f.put(data[i])
+        for i in range(chunk):
+            data[i] = f.get()
+        n+=chunk
+    return rate(total,tm.get())
+
+# move total bytes through a byte fifo in chunks, with bulk copies
+def bulk(f,chunk,total):
+    data = bytearray(chunk)
+    tm = timers.timer()
+    tm.start()
+    n = 0
+    while n<total:
+        f.write(data)
+        f.read_into(data)
+        n+=chunk
+    return rate(total,tm.get())
+
+total = 4096
+while True:
+    try:
+        for chunk in [8,32,128]:
+            # an odd fifo size makes chunks wrap around the end of the buffer
+            print("chunk",chunk)
+            print("    put/get         :",per_item(fifo.Fifo(chunk*2+1,True),chunk,total),"bytes/s")
+            print("    write/read_into :",bulk(fifo.Fifo(chunk*2+1,True),chunk,total),"bytes/s")
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
@@ -0,0 +1,57 @@
+################################################################################
+# File Logger Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import timers
+import fatfs
+import os
+
+streams.serial()
+
+# a RAM disk of 128 sectors (64 KB), the smallest FAT volume: no SD card is needed
+# and only the sectors written by FatFs are measured
+fatfs.mount('0:', {"ram": bytearray(128*512)})
+fatfs.mkfs('0:')
+
+LOG = "0:log.csv"
+RECORDS = 500
+RECORD = "2020-01-01 12:00:00,23.5,45.1\n"
+
+def rate(n,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    return n*1000//elapsed
+
+def bench(buffering,sync_size,sync_time,sync):
+    if os.exists(LOG):
+        os.remove(LOG)
+    f = os.open(LOG,'w',buffering,sync_size,sync_time)
+    fatfs.disk_stats(True)
+    tm = timers.timer()
+    tm.start()
+    for i in range(RECORDS):
+        f.write(RECORD,sync)
+    f.close()
+    elapsed = tm.get()
+    rd, wr = fatfs.disk_stats()
+    return elapsed, wr
+
+def show(name,res):
+    elapsed, wr = res
+    print(name,rate(RECORDS,elapsed),"records/s,",wr*1000//RECORDS,"sectors written per 1000 records")
+
+while True:
+    try:
+        # sync at each record: no data lost on power failure, but FAT and directory are rewritten each time
+        show("sync per record    :",bench(0,0,0,True))
+        # no sync until close: everything since open can be lost
+        show("no sync            :",bench(0,0,0,False))
+        # buffered mode: sector aligned writes, at most 4 KB + 1 KB or 1 second lost
+        show("buffered 1KB/4KB/1s:",bench(1024,4096,1000,False))
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
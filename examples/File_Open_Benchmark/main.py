@@ -0,0 +1,60 @@
+################################################################################
+# File Open Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import timers
+import fatfs
+import os
+
+streams.serial()
+
+# mount the SD card as volume 0 through SPI protocol
+fatfs.mount('0:', {"drv": SPI0, "cs": D25, "clock": 1000000} )
+
+LOGS = ["0:log0.txt", "0:log1.txt"]
+RECORDS = 200
+
+def rate(n,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    return n*1000//elapsed
+
+# open, append a record and close, alternating between two log files
+def bench_append():
+    tm = timers.timer()
+    tm.start()
+    for i in range(RECORDS):
+        f = os.open(LOGS[i%2],'a')
+        f.write("record "+str(i)+"\n")
+        f.close()
+    return tm.get()
+
+# open and close only
+def bench_open():
+    tm = timers.timer()
+    tm.start()
+    for i in range(RECORDS):
+        f = os.open(LOGS[i%2],'r')
+        f.close()
+    return tm.get()
+
+print("descriptors:",fatfs.max_open('files'),"files,",fatfs.max_open('dirs'),"dirs")
+while True:
+    try:
+        for size in [0,2]:
+            for name in LOGS:
+                if os.exists(name):
+                    os.remove(name)
+            fatfs.set_handle_cache(size)
+            elapsed = bench_append()
+            print("cache",size,"append:",RECORDS,"records in",elapsed,"ms,",rate(RECORDS,elapsed),"open/close per s")
+            elapsed = bench_open()
+            print("cache",size,"open  :",RECORDS,"opens in",elapsed,"ms,",rate(RECORDS,elapsed),"open/close per s")
+        fatfs.set_handle_cache(0)
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
@@ -0,0 +1,89 @@
+################################################################################
+# File Readline Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import timers
+import fatfs
+import os
+
+streams.serial()
+
+# mount the SD card as volume 0 through SPI protocol
+fatfs.mount('0:', {"drv": SPI0, "cs": D25, "clock": 1000000} )
+
+FILE = "0:bench.csv"
+LINES = 500
+
+def rate(n,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    return n*1000//elapsed
+
+# a csv file with lines of increasing length
+def make_file():
+    f = os.open(FILE,'w')
+    for i in range(LINES):
+        f.write(str(i)+","+"x"*(i%80)+"\n")
+    f.close()
+
+# the old readline: a native call and a string copy per character
+def legacy_readline(f):
+    res = ""
+    n_chr = None
+    while n_chr != '\n' and n_chr != '':
+        n_chr = f.read(1)
+        res += n_chr
+    return res
+
+def bench_legacy():
+    f = os.open(FILE,'r')
+    tm = timers.timer()
+    tm.start()
+    n = 0
+    while legacy_readline(f):
+        n+=1
+    elapsed = tm.get()
+    f.close()
+    return n, elapsed
+
+def bench_readline():
+    f = os.open(FILE,'r')
+    tm = timers.timer()
+    tm.start()
+    n = 0
+    while f.readline():
+        n+=1
+    elapsed = tm.get()
+    f.close()
+    return n, elapsed
+
+def bench_iter():
+    f = os.open(FILE,'r')
+    tm = timers.timer()
+    tm.start()
+    n = 0
+    for line in f:
+        n+=1
+    elapsed = tm.get()
+    f.close()
+    return n, elapsed
+
+make_file()
+f = os.open(FILE,'r')
+print("file size:",f.size(),"bytes")
+f.close()
+while True:
+    try:
+        n, elapsed = bench_legacy()
+        print("legacy readline:",n,"lines in",elapsed,"ms,",rate(n,elapsed),"lines/s")
+        n, elapsed = bench_readline()
+        print("readline       :",n,"lines in",elapsed,"ms,",rate(n,elapsed),"lines/s")
+        n, elapsed = bench_iter()
+        print("iteration      :",n,"lines in",elapsed,"ms,",rate(n,elapsed),"lines/s")
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
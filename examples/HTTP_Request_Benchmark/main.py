@@ -0,0 +1,82 @@
+################################################################################
+# HTTP Request Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import socket
+import timers
+import requests
+
+# import the wifi interface
+from wireless import wifi
+
+# uncomment the following line to use the ESP32 driver (Sparkfun Esp32 Thing, Olimex Esp32, ...)
+from espressif.esp32net import esp32wifi as wifi_driver
+
+streams.serial()
+
+# set the address of a http server in the local network
+# e.g. run "python3 -m http.server 8000" on a pc (it answers POST with an error, that is fine for the benchmark)
+server_ip = "192.168.1.10"
+server_port = 8000
+url = "http://"+server_ip+":"+str(server_port)+"/"
+
+# a socket counting the calls to sendall
+class CountingSocket(socket.socket):
+    def __init__(self):
+        socket.socket.__init__(self,socket.AF_INET,socket.SOCK_STREAM)
+        self.sends = 0
+    def sendall(self,data):
+        self.sends+=1
+        return socket.socket.sendall(self,data)
+
+def run(method,nheaders,body,n):
+    headers = {"Connection":"keep-alive"}
+    for i in range(nheaders):
+        headers["X-Bench-"+str(i)] = "value "+str(i)
+    sends = 0
+    sock = None
+    tm = timers.timer()
+    tm.start()
+    for i in range(n):
+        if sock is None:
+            sock = CountingSocket()
+            sock.connect((server_ip,server_port))
+        rr = requests._verb(url,body,None,headers,sock,method)
+        if rr.connection is None:
+            # the server closed the connection
+            sends+=sock.sends
+            sock = None
+    elapsed = tm.get()
+    if sock is not None:
+        sends+=sock.sends
+        sock.close()
+    if body:
+        size = len(body[0])
+    else:
+        size = 0
+    print("   ",method,nheaders,"headers",size,"bytes body:",elapsed//n,"ms/request,",sends//n,"sends/request")
+
+wifi_driver.auto_init()
+print("Establishing Link...")
+try:
+    # FOR THIS EXAMPLE TO WORK, "Network-Name" AND "Wifi-Password" MUST BE SET
+    # TO MATCH YOUR ACTUAL NETWORK CONFIGURATION
+    wifi.link("Network-Name",wifi.WIFI_WPA2,"Wifi-Password")
+except Exception as e:
+    print("ooops, something wrong while linking :(", e)
+    while True:
+        sleep(1000)
+
+while True:
+    try:
+        for nheaders in [0,4,16]:
+            run("GET",nheaders,None,10)
+        for size in [64,1024,4096]:
+            run("POST",4,["x"*size,"text/plain"],10)
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
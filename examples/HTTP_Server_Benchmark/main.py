@@ -0,0 +1,94 @@
+################################################################################
+# HTTP Server Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import socket
+import timers
+import requests
+import httpserver
+
+# import the wifi interface
+from wireless import wifi
+
+# uncomment the following line to use the ESP32 driver (Sparkfun Esp32 Thing, Olimex Esp32, ...)
+from espressif.esp32net import esp32wifi as wifi_driver
+
+streams.serial()
+
+page = "<html><body>Hello Zerynth!</body></html>"
+
+# the server loop of the Mini_Web_Server example: one connection at a time, headers read byte by byte
+def legacy_server(port):
+    sock = socket.socket()
+    sock.bind(port)
+    sock.listen()
+    while True:
+        try:
+            clientsock,addr = sock.accept()
+            client = streams.SocketStream(clientsock)
+            line = client.readline()
+            while line!="\n" and line!="\r\n":
+                line = client.readline()
+            print("HTTP/1.1 200 OK\r",stream=client)
+            print("Content-Type: text/html\r",stream=client)
+            print("Connection: close\r\n\r",stream=client)
+            print(page,stream=client)
+            client.close()
+        except Exception as e:
+            print("legacy server:",e)
+
+def hello(request,response):
+    response.send(page)
+
+def rate(n,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    return n*1000//elapsed
+
+# requests from the board itself: each one on a new connection, or on a kept alive connection with a Session
+def bench(url,n,session=None):
+    tm = timers.timer()
+    tm.start()
+    for i in range(n):
+        if session is None:
+            rr = requests.get(url)
+        else:
+            rr = session.get(url)
+        if rr.status!=200:
+            raise requests.HTTPResponseError
+    return rate(n,tm.get())
+
+wifi_driver.auto_init()
+print("Establishing Link...")
+try:
+    # FOR THIS EXAMPLE TO WORK, "Network-Name" AND "Wifi-Password" MUST BE SET
+    # TO MATCH YOUR ACTUAL NETWORK CONFIGURATION
+    wifi.link("Network-Name",wifi.WIFI_WPA2,"Wifi-Password")
+except Exception as e:
+    print("ooops, something wrong while linking :(", e)
+    while True:
+        sleep(1000)
+
+ip = wifi.link_info()[0]
+print("My IP is:",ip)
+
+thread(legacy_server,8080,size=1024)
+server = httpserver.HTTPServer(80,workers=2)
+server.route("/",hello)
+server.start()
+sleep(1000)
+
+# the servers can be tested also from a pc, e.g. with "ab -n 100 -k http://<board ip>/"
+session = requests.Session()
+while True:
+    try:
+        print("legacy loop          :",bench("http://"+ip+":8080/",20),"requests/s")
+        print("httpserver           :",bench("http://"+ip+"/",20),"requests/s")
+        print("httpserver keep-alive:",bench("http://"+ip+"/",20,session),"requests/s")
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
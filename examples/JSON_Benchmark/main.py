@@ -0,0 +1,92 @@
+################################################################################
+# JSON Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import timers
+import json
+
+streams.serial()
+
+# a typical telemetry payload
+payload = {
+    "device":"sensor-node-01",
+    "ts":1577836800,
+    "battery":3.71,
+    "online":True,
+    "error":None,
+    "samples":[21,22,23,22,21,20,19,20,21,22,23,24,25,24,23,22],
+    "labels":["temperature","humidity","pressure","light"],
+    "status":"all systems \"nominal\"\n"
+}
+
+# the old two pass encoder: a first pass counts the bytes, a second one copies them byte by byte
+class LegacyCounter():
+    def __init__(self):
+        self.l = 0
+    def append(self,x):
+        self.l+=1
+    def extend(self,obj):
+        self.l+=len(obj)
+
+class LegacyBuilder():
+    def __init__(self,n):
+        self.data = bytes(n)
+        self.pos = 0
+    def append(self,x):
+        __byte_set(self.data,self.pos,x)
+        self.pos+=1
+    def extend(self,obj):
+        for i in range(len(obj)):
+            __byte_set(self.data,self.pos,__byte_get(obj,i))
+            self.pos+=1
+
+def legacy_dumps(obj):
+    res = LegacyCounter()
+    json._dumps(obj,res)
+    res = LegacyBuilder(res.l)
+    json._dumps(obj,res)
+    return res.data
+
+# a stream that discards everything, to measure the encoder only
+class NullStream():
+    def __init__(self):
+        self.count = 0
+    def write(self,buf):
+        self.count+=len(buf)
+        return len(buf)
+
+def report(name,nbytes,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    print(name,":",nbytes,"bytes in",elapsed,"ms ->",nbytes*1000//elapsed,"bytes/s")
+
+rounds = 50
+tm = timers.timer()
+
+while True:
+    try:
+        tm.start()
+        nb = 0
+        for i in range(rounds):
+            nb+=len(legacy_dumps(payload))
+        report("two pass dumps ",nb,tm.get())
+
+        tm.start()
+        nb = 0
+        for i in range(rounds):
+            nb+=len(json.dumps(payload))
+        report("one pass dumps ",nb,tm.get())
+
+        for chunk in (32,128,512):
+            sink = NullStream()
+            tm.start()
+            for i in range(rounds):
+                json.dump(payload,sink,chunk)
+            report("dump chunk "+str(chunk),sink.count,tm.get())
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
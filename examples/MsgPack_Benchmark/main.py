@@ -0,0 +1,104 @@
+################################################################################
+# MsgPack Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import timers
+import struct
+import gc
+import msgpack
+
+streams.serial()
+
+# a typical sensor sample
+sample = {
+    "id":1234,
+    "ts":1577836800,
+    "t":21.5,
+    "h":48.25,
+    "p":101325,
+    "ok":True,
+    "acc":[-12,300,-70000],
+    "tag":"node-01"
+}
+
+# the old encoder: a growing bytearray and a new bytes object for every multi byte field
+def legacy_pack(obj,res):
+    t = type(obj)
+    if t == PDICT:
+        res.append(0x80+len(obj))
+        for k, v in obj.items():
+            legacy_pack(k,res)
+            legacy_pack(v,res)
+    elif t == PLIST:
+        res.append(0x90+len(obj))
+        for o in obj:
+            legacy_pack(o,res)
+    elif t == PSMALLINT or t == PINTEGER:
+        if obj >= 0:
+            if obj <= 0x7f:
+                res.append(obj)
+            elif obj <= 0xffff:
+                res.append(0xcd)
+                res.extend(struct.pack('>H', obj))
+            else:
+                res.append(0xce)
+                res.extend(struct.pack('>I', obj))
+        else:
+            if obj >= -32768:
+                res.append(0xd1)
+                res.extend(struct.pack('>h', obj))
+            else:
+                res.append(0xd2)
+                res.extend(struct.pack('>i', obj))
+    elif t == PSTRING:
+        res.append(0xa0+len(obj))
+        res.extend(obj)
+    elif t == PFLOAT:
+        res.append(0xca)
+        res.extend(struct.pack('>f', obj))
+    elif t == PBOOL:
+        res.append(0xc3 if obj else 0xc2)
+
+def run(name,fn,rounds):
+    gc.collect()
+    gc.disable()
+    blocks = gc.info()[3]
+    tm = timers.timer()
+    tm.start()
+    for i in range(rounds):
+        fn()
+    elapsed = tm.get()
+    blocks = gc.info()[3]-blocks
+    gc.enable()
+    if elapsed<=0:
+        elapsed = 1
+    print(name,":",rounds*1000//elapsed,"msg/s,",blocks/rounds,"allocations/msg")
+
+def do_legacy():
+    legacy_pack(sample,bytearray())
+
+def do_pack():
+    msgpack.pack(sample)
+
+packer = msgpack.Packer(64)
+def do_packer():
+    packer.pack(sample)
+
+outbuf = bytearray(64)
+def do_pack_into():
+    msgpack.pack_into(sample,outbuf,0)
+
+rounds = 40
+while True:
+    try:
+        run("legacy pack ",do_legacy,rounds)
+        run("pack        ",do_pack,rounds)
+        run("Packer.pack ",do_packer,rounds)
+        run("pack_into   ",do_pack_into,rounds)
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
@@ -0,0 +1,124 @@
+################################################################################
+# MsgPack Vectors
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import msgpack
+
+streams.serial()
+
+# reference vectors: (object, use_double, expected header in hex, expected payload)
+vectors = [
+    (None, 0, "c0", ""),
+    (False, 0, "c2", ""),
+    (True, 0, "c3", ""),
+    (0, 0, "00", ""),
+    (127, 0, "7f", ""),
+    (128, 0, "cc80", ""),
+    (255, 0, "ccff", ""),
+    (256, 0, "cd0100", ""),
+    (65535, 0, "cdffff", ""),
+    (65536, 0, "ce00010000", ""),
+    (4294967295, 0, "ceffffffff", ""),
+    (4294967296, 0, "cf0000000100000000", ""),
+    (9223372036854775807, 0, "cf7fffffffffffffff", ""),
+    (-1, 0, "ff", ""),
+    (-32, 0, "e0", ""),
+    (-33, 0, "d0df", ""),
+    (-128, 0, "d080", ""),
+    (-129, 0, "d1ff7f", ""),
+    (-32768, 0, "d18000", ""),
+    (-32769, 0, "d2ffff7fff", ""),
+    (-2147483648, 0, "d280000000", ""),
+    (-2147483649, 0, "d3ffffffff7fffffff", ""),
+    (-9223372036854775807-1, 0, "d38000000000000000", ""),
+    (1.5, 0, "ca3fc00000", ""),
+    (-0.25, 1, "cbbfd0000000000000", ""),
+    (1.5, 1, "cb3ff8000000000000", ""),
+    ("", 0, "a0", ""),
+    ("a", 0, "a161", ""),
+    ("z"*31, 0, "bf", "z"*31),
+    ("z"*32, 0, "d920", "z"*32),
+    ("z"*256, 0, "da0100", "z"*256),
+    (b"\x01", 0, "c40101", ""),
+    ([], 0, "90", ""),
+    ([1,2], 0, "920102", ""),
+    ([0]*16, 0, "dc001000000000000000000000000000000000", ""),
+    ({}, 0, "80", ""),
+    ({"a":1}, 0, "81a16101", ""),
+    ([{"k":[None,True]},"v"], 0, "9281a16b92c0c3a176", ""),
+    (msgpack.ExtType(5,b"\x01"), 0, "d40501", ""),
+    (msgpack.ExtType(-3,b"abc"), 0, "c703fd616263", ""),
+    (msgpack.Timestamp(0), 0, "d6ff00000000", ""),
+    (msgpack.Timestamp(1577836800,500), 0, "d7ff000007d05e0be100", ""),
+    (msgpack.Timestamp(-1,0), 0, "c70cff00000000ffffffffffffffff", ""),
+]
+
+def unhex(s):
+    res = bytearray(len(s)//2)
+    for i in range(len(res)):
+        res[i] = int(s[2*i:2*i+2],16)
+    return res
+
+def same(a,b):
+    if type(a)!=type(b):
+        return False
+    t = type(a)
+    if t==PLIST:
+        if len(a)!=len(b):
+            return False
+        for i in range(len(a)):
+            if not same(a[i],b[i]):
+                return False
+        return True
+    elif t==PDICT:
+        if len(a)!=len(b):
+            return False
+        for k in a:
+            if k not in b or not same(a[k],b[k]):
+                return False
+        return True
+    elif t==PINSTANCE:
+        if isinstance(a,msgpack.Timestamp):
+            return a.seconds==b.seconds and a.nanoseconds==b.nanoseconds
+        return a.code==b.code and a.data==b.data
+    return a==b
+
+def check():
+    failed = 0
+    stream = bytearray()
+    for i in range(len(vectors)):
+        obj, dbl, hdr, payload = vectors[i]
+        expected = unhex(hdr)
+        expected.extend(payload)
+        packed = msgpack.pack(obj,dbl)
+        if packed!=expected:
+            print("pack   FAIL",i,packed)
+            failed+=1
+        if not same(msgpack.unpack(expected),obj):
+            print("unpack FAIL",i)
+            failed+=1
+        stream.extend(expected)
+    # the same vectors, received one byte at a time
+    u = msgpack.Unpacker()
+    n = 0
+    for i in range(len(stream)):
+        u.feed(stream[i:i+1])
+        for obj in u:
+            if not same(obj,vectors[n][0]):
+                print("stream FAIL",n)
+                failed+=1
+            n+=1
+    if n!=len(vectors):
+        print("stream FAIL: decoded",n,"objects")
+        failed+=1
+    print(len(vectors),"vectors,",failed,"failures")
+
+while True:
+    try:
+        check()
+    except Exception as e:
+        print(e)
+    sleep(5000)
@@ -0,0 +1,90 @@
+################################################################################
+# Queue Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import threading
+import timers
+import queue
+
+streams.serial()
+
+# the old list based queue: every get copies the remaining items
+class LegacyQueue():
+    def __init__(self,maxsize=0):
+        self.maxsize=maxsize
+        self.mutex = threading.Lock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.not_full = threading.Condition(self.mutex)
+        self.q=[]
+    def put(self,obj):
+        self.not_full.acquire()
+        while self.maxsize > 0 and len(self.q)>=self.maxsize:
+            self.not_full.wait()
+        self.q.append(obj)
+        self.not_empty.notify()
+        self.not_full.release()
+    def get(self):
+        self.not_empty.acquire()
+        while len(self.q)==0:
+            self.not_empty.wait()
+        res = self.q[0]
+        self.q=self.q[1:]
+        self.not_full.notify()
+        self.not_empty.release()
+        return res
+
+def rate(n,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    return n*1000//elapsed
+
+# put/get pairs on a queue kept almost full: measures the cost of a get at depth size
+def at_depth(q,size,rounds):
+    for i in range(size-1):
+        q.put(i)
+    tm = timers.timer()
+    tm.start()
+    for i in range(rounds):
+        q.put(i)
+        q.get()
+    elapsed = tm.get()
+    for i in range(size-1):
+        q.get()
+    return rate(rounds,elapsed)
+
+# a producer thread and the main thread as consumer, moving items in batches
+done = threading.Event()
+def producer(q,total,batch):
+    items = [0]*batch
+    for i in range(total//batch):
+        q.put_many(items)
+    done.set()
+
+def pipeline(size,total,batch):
+    q = queue.Queue(size)
+    done.clear()
+    tm = timers.timer()
+    tm.start()
+    thread(producer,q,total,batch)
+    n = 0
+    while n<total:
+        n+=len(q.get_many(batch))
+    elapsed = tm.get()
+    done.wait()
+    return rate(total,elapsed)
+
+rounds = 200
+while True:
+    try:
+        for size in [4,16,64,256]:
+            print("size",size)
+            print("    legacy put/get   :",at_depth(LegacyQueue(size),size,rounds),"items/s")
+            print("    put/get          :",at_depth(queue.Queue(size),size,rounds),"items/s")
+            print("    put_many/get_many:",pipeline(size,rounds*4,min(size,16)),"items/s")
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
@@ -0,0 +1,70 @@
+################################################################################
+# Selectors Echo Server
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import socket
+import selectors
+
+# import the wifi interface
+from wireless import wifi
+
+# This example can be used as is with ESP32 based devices
+from espressif.esp32net import esp32wifi as wifi_driver
+
+streams.serial()
+
+wifi_driver.auto_init()
+print("Establishing Link...")
+try:
+    # FOR THIS EXAMPLE TO WORK, "Network-Name" AND "Wifi-Password" MUST BE SET
+    # TO MATCH YOUR ACTUAL NETWORK CONFIGURATION
+    wifi.link("Network-Name",wifi.WIFI_WPA2,"Wifi-Password")
+except Exception as e:
+    print("ooops, something wrong while linking :(", e)
+    while True:
+        sleep(1000)
+
+print("Echo server at",wifi.link_info()[0],"port 7")
+# try it with: nc <board ip> 7
+
+server = socket.socket()
+server.bind(7)
+server.listen(4)
+
+sel = selectors.DefaultSelector()
+sel.register(server,selectors.EVENT_READ)
+
+def drop(client):
+    sel.unregister(client)
+    client.close()
+    print("Clients:",len(sel.get_map())-1)
+
+while True:
+    try:
+        # wait up to 10 seconds for a ready socket
+        ready = sel.select(10000)
+        if not ready:
+            print("Idle...")
+        for key, events in ready:
+            if key.fileobj is server:
+                client, addr = server.accept()
+                # each client gets its own buffer, stored as the data of the registration
+                sel.register(client,selectors.EVENT_READ,bytearray(128))
+                print("Connection from",addr,"clients:",len(sel.get_map())-1)
+            else:
+                try:
+                    # with MSG_PARTIAL get what has been received, otherwise read a single byte:
+                    # a driver ignoring the flag would wait for the whole buffer
+                    flags = key.fileobj.partial_recv()
+                    n = key.fileobj.recv_into(key.data,128 if flags else 1,flags)
+                    if n:
+                        key.fileobj.sendall(key.data[0:n])
+                    else:
+                        drop(key.fileobj)
+                except Exception as e:
+                    drop(key.fileobj)
+    except Exception as e:
+        print("ooops, something wrong:",e)
@@ -0,0 +1,58 @@
+################################################################################
+# Stream Readline Benchmark
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import timers
+
+streams.serial()
+
+# an in memory stream that behaves like a driver: each read returns at most packet bytes
+class MemStream(streams.stream):
+    def __init__(self,data,packet):
+        streams.stream.__init__(self)
+        self.data = data
+        self.packet = packet
+        self.pos = 0
+    def _readbuf(self,buf,size=1,ofs=0):
+        n = min(size,self.packet,len(self.data)-self.pos)
+        buf[ofs:ofs+n] = self.data[self.pos:self.pos+n]
+        self.pos+=n
+        return n
+    def rewind(self):
+        self.pos = 0
+
+def rate(n,elapsed):
+    if elapsed<=0:
+        elapsed = 1
+    return n*1000//elapsed
+
+def run(s,nlines):
+    tm = timers.timer()
+    tm.start()
+    n = 0
+    while n<nlines:
+        if not s.readline():
+            break
+        n+=1
+    return rate(n,tm.get())
+
+nlines = 200
+data = bytearray()
+for i in range(nlines):
+    data.extend("Content-Type: text/plain; n="+str(i)+"\r\n")
+
+while True:
+    try:
+        for packet in [64,512]:
+            src = MemStream(data,packet)
+            print("packet",packet)
+            print("    stream.readline         :",run(src,nlines),"lines/s")
+            src.rewind()
+            print("    BufferedStream.readline :",run(src.buffered(256),nlines),"lines/s")
+    except Exception as e:
+        print(e)
+    print("-------------------------------------------------")
+    sleep(5000)
@@ -0,0 +1,49 @@
+################################################################################
+# TLS Session Resumption
+#
+# Created by Zerynth Team 2020 CC
+################################################################################
+
+import streams
+import socket
+import ssl
+import dnscache
+
+# import the wifi interface
+from wireless import wifi
+
+# This example can be used as is with ESP32 based devices
+from espressif.esp32net import esp32wifi as wifi_driver
+
+streams.serial()
+
+wifi_driver.auto_init()
+print("Establishing Link...")
+try:
+    # FOR THIS EXAMPLE TO WORK, "Network-Name" AND "Wifi-Password" MUST BE SET
+    # TO MATCH YOUR ACTUAL NETWORK CONFIGURATION
+    wifi.link("Network-Name",wifi.WIFI_WPA2,"Wifi-Password")
+except Exception as e:
+    print("ooops, something wrong while linking :(", e)
+    while True:
+        sleep(1000)
+
+host = "www.howsmyssl.com"
+cacert = __lookup(SSL_CACERT_DST_ROOT_CA_X3)
+# sessions are saved and offered again to the same server
+ctx = ssl.create_ssl_context(cacert=cacert,hostname=host,options=ssl.CERT_REQUIRED|ssl.SERVER_AUTH|ssl.SESSION_RESUME)
+
+while True:
+    try:
+        ip = dnscache.gethostbyname(host)
+        sock = ssl.sslsocket(ctx=ctx)
+        sock.connect((ip,443))
+        tm, resumed = sock.handshake_info()
+        sock.close()
+        if resumed:
+            print("resumed handshake:",tm,"ms")
+        else:
+            print("full handshake:",tm,"ms")
+    except Exception as e:
+        print(e)
+    sleep(5000)
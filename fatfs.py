@@ -52,12 +52,18 @@ def mount(path, args):
             # correct format for SD Card read through SD mode
             # (be careful in choosing frequency (kHz) and bits supported by your board)
             args = {"drv": SD1, "freq_khz": 20000, "bits": 1}
+
+            # correct format for a RAM disk of 128 sectors of 512 bytes
+            # (the disk must be formatted with mkfs before use)
+            args = {"ram": bytearray(128*512)}
     """
     global disks_dict
     __builtins__.__default_fs = __module__
     pdrv = int(path.split(':')[0])
     disk_type = None
-    if len(args) == 3:
+    if len(args) == 1 and 'ram' in args:
+        disks_dict = __update_disks_dict(pdrv, [2, args["ram"]])
+    elif len(args) == 3:
         if 'cs' in args:
             disks_dict = __update_disks_dict(pdrv, [0, args["drv"], args["cs"], args["clock"]])
         else:
@@ -66,6 +72,35 @@ def mount(path, args):
         raise ValueError
     __f_mount(path)
 
+@native_c("__f_mkfs",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_mkfs(path):
+    pass
+
+def mkfs(path):
+    """
+.. function:: mkfs(path)
+
+    Create a FAT file system on the mounted volume *path* (e.g. ``"0:"``), erasing all of its content.
+    The volume must have at least 128 sectors.
+
+    """
+    if __f_mkfs(path) == -1:
+        raise OSError
+
+@native_c("__disk_stats",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __disk_stats(reset):
+    pass
+
+def disk_stats(reset=False):
+    """
+.. function:: disk_stats(reset=False)
+
+    Return a tuple *(read, written)* with the number of sectors read from and written to all the mounted disks,
+    counting FAT, directory and data sectors. If *reset* is True, the counters are set to zero after being read.
+
+    """
+    return __disk_stats(reset)
+
 # File Access
 
 @native_c("__f_open",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
@@ -83,7 +118,10 @@ and a list of low-level functions implemented in the filesystem module.
         * __f_open
         * __f_close
         * __f_read
+        * __f_readline
+        * __f_readinto
         * __f_write
+        * __f_sync
         * __f_seek
         * __f_size
         * __f_tell
@@ -95,6 +133,7 @@ and a list of low-level functions implemented in the filesystem module.
         * __f_opendir
         * __f_closedir
         * __f_readdir
+        * __f_readdir_info
 
     * File/Directory Management
 
@@ -111,6 +150,8 @@ and a list of low-level functions implemented in the filesystem module.
 
         * get_available_fd_n
         * free_fd_n
+        * open_file
+        * close_file
         * to_b_mode
 
     """    
@@ -124,6 +165,14 @@ def __f_close(n):
 def __f_read(n_bytes, mode, n):
     pass
 
+@native_c("__f_readinto",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_readinto(buffer, n_bytes, offset, n):
+    pass
+
+@native_c("__f_readline",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_readline(mode, max_bytes, n):
+    pass
+
 @native_c("__f_write",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
 def __f_write(to_w, sync, n):
     pass
@@ -132,6 +181,10 @@ def __f_write(to_w, sync, n):
 def __f_seek(pos, n):
     pass
 
+@native_c("__f_sync",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_sync(n):
+    pass
+
 @native_c("__f_size",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
 def __f_size(n):
     pass
@@ -162,18 +215,22 @@ def __f_closedir(n):
 def __f_readdir(n):
     pass
 
+@native_c("__f_readdir_info",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_readdir_info(n):
+    pass
+
 # File/Directory Management
 
 @native_c("__f_copy",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
-def __f_copy(src, dst, n_src, n_dst):
+def _f_copy(src, dst, n_src, n_dst):
     pass
 
 @native_c("__f_unlink",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
-def __f_unlink(path):
+def _f_unlink(path):
     pass
 
 @native_c("__f_rename",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
-def __f_rename(src_path, dst_path):
+def _f_rename(src_path, dst_path):
     pass
 
 @native_c("__f_mkdir",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
@@ -181,7 +238,7 @@ def __f_mkdir(path):
     pass
 
 @native_c("__f_chdir",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
-def __f_chdir(path):
+def _f_chdir(path):
     pass
 
 @native_c("__f_getcwd",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
@@ -199,28 +256,177 @@ def __f_isdir(path):
 
 #### FileIO
 
-_open_fd_lock = { 'files': threading.Lock(), 'dirs': threading.Lock() }
-_open_fd = { 'files': [], 'dirs': [] }
+@native_c("__f_fd_alloc",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_fd_alloc(kind):
+    pass
+
+@native_c("__f_fd_free",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_fd_free(kind, n):
+    pass
+
+@native_c("__f_fd_count",["csrc/fatfs/*"],["VHAL_SPI", "VHAL_SPISD", "VHAL_SDIO"])
+def __f_fd_count(kind):
+    pass
+
+# descriptors are taken from a bitmap per table in C: natives run atomically with respect to other threads, no lock is needed
+_fd_kinds = { 'files': 0, 'dirs': 1 }
 
 def get_available_fd_n(fd):
-    _open_fd_lock[fd].acquire()
-    n = None
-    for i in range(4):
-        if not (i in _open_fd[fd]):
-            n = i
-            break
-    if n == None:
+    n = __f_fd_alloc(_fd_kinds[fd])
+    if n < 0 and fd == 'files' and _evict_handle():
+        n = __f_fd_alloc(0)
+    if n < 0:
         # no file available
-        pass
-    else:
-        _open_fd[fd].append(n)
-    _open_fd_lock[fd].release()
+        return None
     return n
 
 def free_fd_n(fd, n):
-    _open_fd_lock[fd].acquire()
-    _open_fd[fd].remove(n)
-    _open_fd_lock[fd].release()
+    __f_fd_free(_fd_kinds[fd], n)
+
+def max_open(fd):
+    """
+.. function:: max_open(fd)
+
+    Return the number of files (*fd* = ``'files'``) or directories (*fd* = ``'dirs'``) that can be open at the same time.
+
+    Both default to 4 and can be changed in the project configuration by defining ``ZERYNTH_FATFS_MAX_FILES`` and ``ZERYNTH_FATFS_MAX_DIRS`` (at most 32 each).
+    Each file costs about 600 bytes of RAM, each directory about 50.
+
+    """
+    return __f_fd_count(_fd_kinds[fd])
+
+#### Handle cache
+
+# closed files still open in FatFs as [path,mode,name,n], least recently used first
+_cache = []
+_cache_size = 0
+_cache_lock = threading.Lock()
+# n -> [path,mode,name] of the files open through open_file
+_opened = {}
+
+def _basename(path):
+    # lowercase name of the last path component: two paths of the same file always share it
+    i = len(path)
+    while i > 0:
+        c = __byte_get(path, i-1)
+        if c == __ORD("/") or c == __ORD("\\") or c == __ORD(":"):
+            break
+        i -= 1
+    return path[i:].lower()
+
+def _drop_handle(i):
+    e = _cache.pop(i)
+    __f_close(e[3])
+    __f_fd_free(0, e[3])
+
+def _evict_handle():
+    _cache_lock.acquire()
+    res = len(_cache) > 0
+    if res:
+        _drop_handle(0)
+    _cache_lock.release()
+    return res
+
+def set_handle_cache(size):
+    """
+.. function:: set_handle_cache(size)
+
+    Keep open in FatFs up to *size* files after they are closed by :meth:`os.FileIO.close`, so that reopening them with the same path and mode
+    reuses the open handle instead of looking up the path in the directory tree again: a log file opened in ``'a'`` mode, appended and closed in a loop
+    is opened only once. A *size* of zero (the default) disables the cache.
+
+    Files are synced to disk when they are closed, as without the cache. A cached file is reused only if it is opened with exactly the same path string and mode;
+    when a file with the same name is opened through a different path, the cached handle is closed first.
+    When all the descriptors (see :func:`max_open`) are in use, the least recently used cached file is closed to make room.
+
+    Cached files are closed by :func:`flush_handle_cache` and before :func:`os.remove`, :func:`os.rmdir`, :func:`os.rename`, :func:`os.chdir` and :func:`os.copyfile`.
+
+    """
+    global _cache_size
+    _cache_lock.acquire()
+    _cache_size = size
+    while len(_cache) > size:
+        _drop_handle(0)
+    _cache_lock.release()
+
+def flush_handle_cache():
+    """
+.. function:: flush_handle_cache()
+
+    Close all the files kept open by the handle cache (e.g. before removing the disk).
+
+    """
+    _cache_lock.acquire()
+    while _cache:
+        _drop_handle(0)
+    _cache_lock.release()
+
+def open_file(path, mode):
+    # returns the descriptor of path opened with mode (as given by to_b_mode) or -1
+    name = _basename(path)
+    n = -1
+    _cache_lock.acquire()
+    i = 0
+    while i < len(_cache):
+        e = _cache[i]
+        if e[0] == path and e[1] == mode:
+            _cache.pop(i)
+            n = e[3]
+            break
+        if e[2] == name:
+            # possibly the same file under another path or mode
+            _drop_handle(i)
+            continue
+        i += 1
+    _cache_lock.release()
+    if n >= 0:
+        # rewind the cached handle as a new open would
+        if __f_seek(0, n) != -1 and (not (mode & FA_CREATE_ALWAYS) or __f_truncate(n) != -1):
+            _opened[n] = [path, mode, name]
+            return n
+        __f_close(n)
+        free_fd_n('files', n)
+    n = get_available_fd_n('files')
+    if n is None:
+        return -1
+    if __f_open(path, mode, n) == -1:
+        free_fd_n('files', n)
+        return -1
+    _opened[n] = [path, mode, name]
+    return n
+
+def close_file(n):
+    # closes the descriptor returned by open_file, keeping it in the handle cache if enabled; returns -1 on error
+    e = _opened.pop(n)
+    if _cache_size > 0 and __f_sync(n) != -1:
+        e.append(n)
+        _cache_lock.acquire()
+        _cache.append(e)
+        while len(_cache) > _cache_size:
+            _drop_handle(0)
+        _cache_lock.release()
+        return 0
+    r = __f_close(n)
+    free_fd_n('files', n)
+    return r
+
+# operations that may change what a cached path refers to
+
+def __f_copy(src, dst, n_src, n_dst):
+    flush_handle_cache()
+    return _f_copy(src, dst, n_src, n_dst)
+
+def __f_unlink(path):
+    flush_handle_cache()
+    return _f_unlink(path)
+
+def __f_rename(src_path, dst_path):
+    flush_handle_cache()
+    return _f_rename(src_path, dst_path)
+
+def __f_chdir(path):
+    flush_handle_cache()
+    return _f_chdir(path)
 
 FA_READ			 = 0x01
 FA_WRITE		 = 0x02
@@ -229,7 +435,7 @@ FA_CREATE_NEW	 = 0x04
 FA_CREATE_ALWAYS = 0x08
 FA_OPEN_ALWAYS	 = 0x10
 
-_str_modes = { 'r': FA_READ, 'w': FA_WRITE | FA_CREATE_ALWAYS, '+': FA_WRITE | FA_READ, 'a': FA_WRITE }
+_str_modes = { 'r': FA_READ, 'w': FA_WRITE | FA_CREATE_ALWAYS, '+': FA_WRITE | FA_READ, 'a': FA_WRITE | FA_OPEN_ALWAYS }
 
 def to_b_mode(mode):
     res = 0
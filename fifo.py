@@ -19,13 +19,14 @@ class Fifo():
 Fifo class
 ==========
 
-.. class:: Fifo(size=16,only_bytes=False)
+.. class:: Fifo(size=16,only_bytes=False,overwrite=False)
 
     Create a Fifo instance with *size* "places" for items. 
     If *only_bytes* is True, the Fifo will use a bytearray to store bytes; if False it will use a list.
+    If *overwrite* is True, inserting into a full fifo discards the oldest items instead of raising *FifoFullError*.
 
     """
-    def __init__(self,size=16,only_bytes=False):
+    def __init__(self,size=16,only_bytes=False,overwrite=False):
         if not only_bytes:
             self._fifo = [None]*size
         else:
@@ -33,6 +34,7 @@ Fifo class
         self.l = size
         self.head=0
         self.elem=0
+        self.overwrite=overwrite
 
     def is_full(self):
         """
@@ -56,11 +58,13 @@ Fifo class
         """
 .. method:: put(obj)
 
-    Insert *obj* into the fifo queue. Raise *FifoFullError* if the fifo is full.
+    Insert *obj* into the fifo queue. Raise *FifoFullError* if the fifo is full, unless the fifo is in overwrite mode: in that case the oldest item is discarded.
 
         """
         if self.elem==self.l:
-            raise FifoFullError
+            if not self.overwrite:
+                raise FifoFullError
+            self._drop(1)
         self._fifo[ (self.head+self.elem)%self.l]=obj
         self.elem+=1
     
@@ -73,9 +77,11 @@ Fifo class
         """
         if self.elem==0:
             raise FifoEmptyError
-        res = self._fifo[self.head % self.l]
+        res = self._fifo[self.head]
         self.elem-=1
         self.head+=1
+        if self.head==self.l:
+            self.head=0
         return res
 
     def peek(self):
@@ -87,17 +93,110 @@ Fifo class
         """
         if self.elem==0:
             raise FifoEmptyError
-        return self._fifo[self.head % self.l]
+        return self._fifo[self.head]
 
     def put_all(self,objs):
         """
 .. method:: put_all(objs)
 
-    Put every item of *objs* into the fifo queue.
+    Put every item of *objs* into the fifo queue. Raise *FifoFullError* if the fifo becomes full, unless the fifo is in overwrite mode.
 
         """
+        if type(self._fifo)==PBYTEARRAY and (type(objs)==PBYTES or type(objs)==PBYTEARRAY or type(objs)==PSTRING):
+            if self.write(objs)<len(objs):
+                raise FifoFullError
+            return
         for obj in objs:
             self.put(obj)
+
+    def _drop(self,n):
+        # discard the n oldest items
+        self.head=(self.head+n)%self.l
+        self.elem-=n
+
+    def write(self,buf):
+        """
+.. method:: write(buf)
+
+    Insert the items of the sequence *buf* (usually bytes, bytearray or string for a fifo created with *only_bytes*) into the fifo queue,
+    copying them in at most two contiguous segments.
+
+    Return the number of items consumed from *buf*: it is less than ``len(buf)`` if the fifo becomes full. In overwrite mode all items are consumed,
+    discarding the oldest ones if needed (if *buf* is longer than the fifo, only its last *size* items are kept).
+
+        """
+        n = len(buf)
+        st = 0
+        free = self.l-self.elem
+        if n>free:
+            if not self.overwrite:
+                n = free
+            elif n>=self.l:
+                # only the tail of buf survives
+                st = n-self.l
+                n = self.l
+                self.head=0
+                self.elem=0
+            else:
+                self._drop(n-free)
+        if n<=0:
+            return 0
+        tail = (self.head+self.elem)%self.l
+        first = self.l-tail
+        if n<=first:
+            if st==0 and n==len(buf):
+                self._fifo[tail:tail+n]=buf
+            else:
+                self._fifo[tail:tail+n]=buf[st:st+n]
+        else:
+            self._fifo[tail:self.l]=buf[st:st+first]
+            self._fifo[0:n-first]=buf[st+first:st+n]
+        self.elem+=n
+        return st+n
+
+    def read_into(self,buf,n=-1,ofs=0):
+        """
+.. method:: read_into(buf,n=-1,ofs=0)
+
+    Remove at most *n* items from the fifo queue and store them into the mutable sequence *buf* (usually a bytearray) starting from offset *ofs*,
+    copying them in at most two contiguous segments. If *n* is negative, at most ``len(buf)-ofs`` items are removed.
+
+    Return the number of items removed, zero if the fifo is empty.
+
+        """
+        if n<0 or n>len(buf)-ofs:
+            n = len(buf)-ofs
+        if n>self.elem:
+            n = self.elem
+        if n<=0:
+            return 0
+        h = self.head
+        first = self.l-h
+        if n<=first:
+            buf[ofs:ofs+n]=self._fifo[h:h+n]
+        else:
+            buf[ofs:ofs+first]=self._fifo[h:self.l]
+            buf[ofs+first:ofs+n]=self._fifo[0:n-first]
+        self._drop(n)
+        return n
+
+    def available(self):
+        """
+.. method:: available()
+
+    Return the number of items that can be read from the fifo queue.
+
+        """
+        return self.elem
+
+    def free(self):
+        """
+.. method:: free()
+
+    Return the number of items that can be inserted into the fifo queue before it becomes full.
+
+        """
+        return self.l-self.elem
             
     def elements(self):
         """
@@ -0,0 +1,598 @@
+"""
+.. module:: httpserver
+
+***********
+HTTP Server
+***********
+
+This module implements a small HTTP/1.1 server with routing, persistent connections and streaming of big responses. To use *httpserver* a net driver must have been properly configured and started.
+
+Connections are accepted by the thread running :meth:`~HTTPServer.serve_forever` and served by a fixed pool of worker threads, so that the number of
+concurrent connections (and the memory they need) is bounded: when all the workers are busy, accepted connections wait in a queue of *backlog* sockets and,
+when the queue is full, new connections wait in the listening socket.
+
+Each worker owns a line buffer and a send buffer, reused for all the requests it serves: request lines and headers are read through a
+:class:`streams.BufferedStream` and parsed in the line buffer, while status line, headers and small bodies are collected in the send buffer and sent together. ::
+
+    import httpserver
+
+    def hello(request,response):
+        response.send("<html><body>Hello Zerynth!</body></html>")
+
+    def data(request,response):
+        # streams a resource without loading it in memory
+        response.send_stream(streams.ResourceStream("data.json"),content_type="application/json")
+
+    server = httpserver.HTTPServer(80,workers=2)
+    server.route("/",hello)
+    server.route("/data",data,("GET",))
+    server.serve_forever()
+
+Handlers are called as ``handler(request, response)`` with a :class:`Request` and a :class:`Response`. If a handler raises an exception, a 500 response is sent
+when possible and the connection is closed. Request bodies with ``Transfer-Encoding: chunked`` are not supported.
+
+    """
+
+import socket
+import streams
+import threading
+import queue
+import urlparse
+import json as json_decoder
+
+new_exception(HTTPServerError,Exception)
+
+_reasons = {
+    200:"OK",
+    201:"Created",
+    204:"No Content",
+    206:"Partial Content",
+    301:"Moved Permanently",
+    302:"Found",
+    304:"Not Modified",
+    400:"Bad Request",
+    401:"Unauthorized",
+    403:"Forbidden",
+    404:"Not Found",
+    405:"Method Not Allowed",
+    408:"Request Timeout",
+    411:"Length Required",
+    413:"Payload Too Large",
+    414:"URI Too Long",
+    431:"Request Header Fields Too Large",
+    500:"Internal Server Error",
+    501:"Not Implemented",
+    503:"Service Unavailable"
+}
+
+
+class _Writer():
+    # bytes are collected in a fixed size buffer that is sent when full; objects bigger than the buffer are sent directly
+    def __init__(self,n):
+        self.data = bytearray(n)
+        self.size = n
+        self.pos = 0
+        self.sock = None
+    def flush(self):
+        if self.pos:
+            __elements_set(self.data,self.pos)
+            self.sock.sendall(self.data)
+            __elements_set(self.data,self.size)
+            self.pos = 0
+    def extend(self,obj):
+        lb = len(obj)
+        npos = self.pos+lb
+        if npos<=self.size:
+            self.data[self.pos:npos]=obj
+            self.pos=npos
+            return
+        self.flush()
+        if lb>=self.size:
+            self.sock.sendall(obj)
+        else:
+            self.data[0:lb]=obj
+            self.pos=lb
+
+
+def _stream_length(stream):
+    # bytes left in a resource or in a file, -1 if unknown
+    if hasattr(stream,"addr") and hasattr(stream,"curpos"):
+        return stream.size-stream.curpos
+    if hasattr(stream,"tell") and hasattr(stream,"size"):
+        return stream.size()-stream.tell()
+    return -1
+
+
+def _stream_into(stream,buf,size,ofs):
+    # reads at most size bytes of stream into buf at ofs, without intermediate copies when possible
+    if hasattr(stream,"_readbuf"):
+        return stream._readbuf(buf,size,ofs)
+    if hasattr(stream,"readinto"):
+        return stream.readinto(buf,size,ofs)
+    b = stream.read(size)
+    lb = len(b)
+    buf[ofs:ofs+lb] = b
+    return lb
+
+
+class Request():
+    """
+=============
+Request class
+=============
+
+.. class:: Request
+
+    A request received by :class:`HTTPServer`, passed to handlers. It is not meant to be created directly. It has the following attributes:
+
+        * *method*: the request method, e.g. "GET"
+        * *path*: the path of the requested url, without the query string
+        * *query*: the query string (the part of the url after "?"), an empty string if missing
+        * *version*: the protocol version, e.g. "HTTP/1.1"
+        * *headers*: a dictionary of request headers, with lowercase names
+        * *remote*: the address of the client
+
+    The body of the request is not read before calling the handler: it can be read with :meth:`read`, :meth:`readinto` or :meth:`json`.
+    The part of the body not read by the handler is discarded before serving the next request of the same connection.
+
+    """
+    def __init__(self,stream,remote):
+        self.stream = stream
+        self.remote = remote
+        self.method = None
+        self.path = None
+        self.query = ""
+        self.version = None
+        self.headers = {}
+        self.keep = False
+        # body bytes still to be read
+        self.left = 0
+
+    def params(self):
+        """
+.. method:: params()
+
+    Returns a dictionary with the parameters of the query string, urldecoded by :func:`urlparse.parse_qs`.
+
+        """
+        return urlparse.parse_qs(self.query)
+
+    def readinto(self,buf,size=-1,ofs=0):
+        """
+.. method:: readinto(buffer,size=-1,ofs=0)
+
+    Reads at most *size* bytes of the body (``len(buffer)-ofs`` if *size* is negative) into the bytearray *buffer* starting at offset *ofs*.
+    Returns the number of bytes read, 0 at the end of the body.
+
+        """
+        if size<0:
+            size = len(buf)-ofs
+        size = min(size,self.left)
+        if size<=0:
+            return 0
+        n = self.stream.readinto(buf,size,ofs)
+        if n<=0:
+            self.left = 0
+            raise IOError
+        self.left-=n
+        return n
+
+    def read(self,size=-1):
+        """
+.. method:: read(size=-1)
+
+    Reads and returns as a bytearray at most *size* bytes of the body, or all of the remaining body if *size* is negative.
+
+        """
+        if size<0 or size>self.left:
+            size = self.left
+        buf = bytearray(size)
+        pos = 0
+        while pos<size:
+            pos+=self.readinto(buf,size-pos,pos)
+        return buf
+
+    def json(self):
+        """
+.. method:: json()
+
+    Reads the remaining body and returns the object it represents in JSON format (see :func:`json.loads`).
+
+        """
+        return json_decoder.loads(self.read())
+
+
+class Response():
+    """
+==============
+Response class
+==============
+
+.. class:: Response
+
+    The response to a :class:`Request`, passed to handlers. It is not meant to be created directly.
+
+    A response is sent either at once with :meth:`send` or :meth:`send_stream`, or piece by piece with :meth:`start`, then :meth:`write` and :meth:`finish`.
+    When a response is started without a length, its body is sent with chunked transfer encoding (or delimited by closing the connection for HTTP/1.0 clients).
+
+    The attribute *keep* tells if the connection will be kept open after the response; a handler can set it to ``False`` before starting the response.
+
+    """
+    def __init__(self,writer,request,keep):
+        self.w = writer
+        self.keep = keep
+        self.http11 = request.version=="HTTP/1.1"
+        self.head = request.method=="HEAD"
+        self.status = None
+        self.chunked = False
+        self.finished = False
+
+    def start(self,status=200,content_type="text/html",headers=None,length=-1):
+        """
+.. method:: start(status=200,content_type="text/html",headers=None,length=-1)
+
+    Sends the status line and the headers of the response. *headers* is an optional dictionary of additional headers.
+    *length* is the length of the body, if known. Raises ``HTTPServerError`` if the response was already started.
+
+        """
+        if self.status is not None:
+            raise HTTPServerError
+        self.status = status
+        w = self.w
+        w.extend("HTTP/1.1 ")
+        w.extend(str(status))
+        w.extend(" ")
+        w.extend(_reasons.get(status,""))
+        w.extend("\r\n")
+        if status==204 or status==304:
+            length = 0
+        else:
+            if content_type:
+                w.extend("Content-Type: ")
+                w.extend(content_type)
+                w.extend("\r\n")
+            if length>=0:
+                w.extend("Content-Length: ")
+                w.extend(str(length))
+                w.extend("\r\n")
+            elif self.http11 and not self.head:
+                self.chunked = True
+                w.extend("Transfer-Encoding: chunked\r\n")
+            else:
+                self.keep = self.keep and self.head
+        if self.keep:
+            if not self.http11:
+                w.extend("Connection: keep-alive\r\n")
+        else:
+            w.extend("Connection: close\r\n")
+        if headers:
+            for k,v in headers.items():
+                w.extend(k)
+                w.extend(": ")
+                w.extend(v)
+                w.extend("\r\n")
+        w.extend("\r\n")
+
+    def write(self,data):
+        """
+.. method:: write(data)
+
+    Sends *data* (a string, bytes or bytearray) as part of the body. The response must have been started with :meth:`start`.
+
+        """
+        if self.status is None or self.finished:
+            raise HTTPServerError
+        lb = len(data)
+        if self.head or not lb:
+            return
+        if self.chunked:
+            self.w.extend("%x\r\n"%lb)
+            self.w.extend(data)
+            self.w.extend("\r\n")
+        else:
+            self.w.extend(data)
+
+    def finish(self):
+        """
+.. method:: finish()
+
+    Completes the response, sending all the buffered bytes. It is called automatically when the handler returns.
+
+        """
+        if self.finished:
+            return
+        if self.status is None:
+            self.start(200,None,None,0)
+        if self.chunked:
+            self.w.extend("0\r\n\r\n")
+        self.w.flush()
+        self.finished = True
+
+    def send(self,body=None,status=200,content_type="text/html",headers=None):
+        """
+.. method:: send(body=None,status=200,content_type="text/html",headers=None)
+
+    Sends a complete response with *body* (a string, bytes or bytearray) and completes it.
+
+        """
+        if body is None:
+            self.start(status,content_type,headers,0)
+        else:
+            self.start(status,content_type,headers,len(body))
+            if not self.head:
+                self.w.extend(body)
+        self.finish()
+
+    def send_stream(self,stream,status=200,content_type="application/octet-stream",headers=None,length=-1):
+        """
+.. method:: send_stream(stream,status=200,content_type="application/octet-stream",headers=None,length=-1)
+
+    Sends a complete response whose body is read from *stream* (e.g. a :class:`streams.ResourceStream` or a :class:`os.FileIO` file) until its end, and completes it.
+    If *length* is not given, it is computed from the size and position of resources and files; for other streams the body is sent with chunked transfer encoding.
+
+    Streams are read directly into the send buffer, so the body is never entirely loaded in memory.
+
+        """
+        if length<0:
+            length = _stream_length(stream)
+        self.start(status,content_type,headers,length)
+        w = self.w
+        if self.head:
+            self.finish()
+            return
+        while length!=0:
+            if self.chunked:
+                # room for a 4 digits chunk size, filled once the chunk is read
+                if w.pos+8>=w.size:
+                    w.flush()
+                hpos = w.pos
+                n = min(w.size-hpos-8,0xffff)
+                n = _stream_into(stream,w.data,n,hpos+6)
+                if n<=0:
+                    break
+                w.data[hpos:hpos+6] = "%04x\r\n"%n
+                w.data[hpos+6+n:hpos+8+n] = "\r\n"
+                w.pos = hpos+8+n
+            else:
+                if w.pos==w.size:
+                    w.flush()
+                n = w.size-w.pos
+                if length>0:
+                    n = min(n,length)
+                n = _stream_into(stream,w.data,n,w.pos)
+                if n<=0:
+                    break
+                w.pos+=n
+                if length>0:
+                    length-=n
+        if length>0:
+            # the stream ended before the announced length
+            self.keep = False
+        self.finish()
+
+
+class HTTPServer():
+    """
+================
+HTTPServer class
+================
+
+.. class:: HTTPServer(port=80,workers=2,backlog=2,buffer_size=512,timeout=5000,max_requests=32,size=1536)
+
+    Creates a server listening on *port*, served by *workers* threads of stack size *size*.
+
+    Up to *backlog* accepted connections wait for a free worker. *buffer_size* is the size of the line buffer and of the send buffer of each worker, and
+    also the maximum length of request lines and headers: longer ones are answered with an error.
+
+    A connection is kept open between requests for at most *timeout* milliseconds and for at most *max_requests* requests; it is also closed after the current request
+    if other connections are waiting for a worker, so that idle clients do not starve the others.
+
+    The attribute *served* counts the requests served.
+
+    """
+    def __init__(self,port=80,workers=2,backlog=2,buffer_size=512,timeout=5000,max_requests=32,size=1536):
+        self.port = port
+        self.workers = workers
+        self.buffer_size = buffer_size
+        self.timeout = timeout
+        self.max_requests = max_requests
+        self.size = size
+        self.served = 0
+        self.sock = None
+        self._q = queue.Queue(backlog)
+        # exact paths -> [handler,methods]
+        self._routes = {}
+        # [prefix,handler,methods], longest prefix first
+        self._prefixes = []
+        self._running = False
+
+    def route(self,path,handler,methods=None):
+        """
+.. method:: route(path,handler,methods=None)
+
+    Calls *handler(request, response)* for the requests to *path*. If *path* ends with ``*``, all the paths starting with it (without ``*``) are matched,
+    preferring the longest prefix; exact paths are preferred to prefixes.
+
+    *methods* is an optional tuple of accepted methods: requests with other methods are answered with 405.
+    Requests to unrouted paths are answered with 404.
+
+        """
+        if path.endswith("*"):
+            path = path[0:-1]
+            i = 0
+            while i<len(self._prefixes) and len(self._prefixes[i][0])>=len(path):
+                i+=1
+            self._prefixes.insert(i,[path,handler,methods])
+        else:
+            self._routes[path] = [handler,methods]
+
+    def _find(self,path):
+        r = self._routes.get(path)
+        if r is not None:
+            return r
+        for p in self._prefixes:
+            if path.startswith(p[0]):
+                return p[1:]
+        return None
+
+    def _read_request(self,ss,line,remote):
+        # returns a Request, None if the connection has been closed, or an error status
+        n = self.buffer_size
+        l = ss.readline("\n",line,n,0)
+        while (len(l)==1 and l[0]==__ORD("\n")) or (len(l)==2 and l[0]==__ORD("\r")):
+            # tolerate empty lines between requests
+            l = ss.readline("\n",line,n,0)
+        if not l:
+            return None
+        if len(l)==n and l[n-1]!=__ORD("\n"):
+            return 414
+        i = l.find(__ORD(" "))
+        j = l.find(__ORD(" "),i+1)
+        if i<=0 or j<0:
+            return 400
+        req = Request(ss,remote)
+        req.method = str(l[0:i])
+        q = l.find(__ORD("?"),i+1)
+        if q<0 or q>j:
+            req.path = str(l[i+1:j])
+        else:
+            req.path = str(l[i+1:q])
+            req.query = str(l[q+1:j])
+        req.version = str(l[j+1:].strip(" \r\n"))
+        # headers
+        while True:
+            l = ss.readline("\n",line,n,0)
+            if not l:
+                return None
+            if len(l)==n and l[n-1]!=__ORD("\n"):
+                return 431
+            if l[0]==__ORD("\r") or l[0]==__ORD("\n"):
+                break
+            idx = l.find(__ORD(":"))
+            if idx<=0:
+                return 400
+            req.headers[str(l[0:idx].lower())] = str(l[idx+1:].strip(" \t\r\n"))
+        if "chunked" in req.headers.get("transfer-encoding","").lower():
+            return 501
+        try:
+            req.left = int(req.headers.get("content-length","0"))
+        except Exception as e:
+            return 400
+        conn = req.headers.get("connection","").lower()
+        if req.version=="HTTP/1.1":
+            req.keep = conn!="close"
+        else:
+            req.keep = conn=="keep-alive"
+        return req
+
+    def _error(self,w,status):
+        w.pos = 0
+        w.extend("HTTP/1.1 ")
+        w.extend(str(status))
+        w.extend(" ")
+        w.extend(_reasons.get(status,""))
+        w.extend("\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        w.flush()
+
+    def _dispatch(self,req,resp):
+        r = self._find(req.path)
+        if r is None:
+            resp.send(None,404)
+        elif r[1] is not None and req.method not in r[1]:
+            resp.send(None,405)
+        else:
+            r[0](req,resp)
+            resp.finish()
+
+    def _serve(self,sock,remote,w,line):
+        sock.settimeout(self.timeout)
+        ss = streams.SocketStream(sock).buffered(self.buffer_size)
+        w.sock = sock
+        w.pos = 0
+        nreq = 0
+        try:
+            while self._running:
+                req = self._read_request(ss,line,remote)
+                if req is None:
+                    break
+                if type(req)==PSMALLINT:
+                    self._error(w,req)
+                    break
+                nreq+=1
+                resp = Response(w,req,req.keep and nreq<self.max_requests and self._q.empty())
+                try:
+                    self._dispatch(req,resp)
+                except Exception as e:
+                    if resp.status is None:
+                        self._error(w,500)
+                    break
+                self.served+=1
+                if not resp.keep:
+                    break
+                # discard the body left by the handler, unless it is too big
+                if req.left>4*self.buffer_size:
+                    break
+                while req.left:
+                    req.readinto(line)
+        except Exception as e:
+            pass
+        w.sock = None
+        w.pos = 0
+        sock.close()
+
+    def _worker(self):
+        w = _Writer(self.buffer_size)
+        line = bytearray(self.buffer_size)
+        while True:
+            conn = self._q.get()
+            if conn is None:
+                break
+            self._serve(conn[0],conn[1],w,line)
+
+    def serve_forever(self):
+        """
+.. method:: serve_forever()
+
+    Starts the worker threads and accepts connections until :meth:`stop` is called. It does not return before.
+
+        """
+        if self._running:
+            raise HTTPServerError
+        self.sock = socket.socket()
+        self.sock.bind(self.port)
+        self.sock.listen()
+        self._running = True
+        for i in range(self.workers):
+            thread(self._worker,size=self.size)
+        while self._running:
+            try:
+                conn = self.sock.accept()
+            except Exception as e:
+                continue
+            if not self._running:
+                conn[0].close()
+                break
+            self._q.put(conn)
+
+    def start(self,prio=PRIO_NORMAL,size=1536):
+        """
+.. method:: start(prio=PRIO_NORMAL,size=1536)
+
+    Runs :meth:`serve_forever` in a new thread of priority *prio* and stack size *size*.
+
+        """
+        thread(self.serve_forever,prio=prio,size=size)
+
+    def stop(self):
+        """
+.. method:: stop()
+
+    Stops the server: the listening socket is closed, workers end after the current request.
+
+        """
+        if not self._running:
+            return
+        self._running = False
+        self.sock.close()
+        for i in range(self.workers):
+            self._q.put(None)
@@ -15,32 +15,68 @@ new_exception(JSONError,Exception)
 
 _to_escape = "\"\\\b\f\n\r\t"
 
-class _DumpCounter():
-    def __init__(self):
-        self.l = 0
+class _DumpBuffer():
+    # one pass builder: the buffer doubles its capacity when full
+    def __init__(self,n=64):
+        self.data = bytearray(n)
+        self.size = n
+        self.pos = 0
+    def _grow(self,n):
+        sz = self.size
+        while sz<n:
+            sz*=2
+        self.data.extend(bytearray(sz-self.size))
+        self.size = sz
     def append(self,x):
-        self.l+=1
+        if self.pos==self.size:
+            self._grow(self.pos+1)
+        self.data[self.pos]=x
+        self.pos+=1
     def extend(self,obj):
-        self.l+=len(obj)
-    def __setitem__(self, key, value):
-        pass
-    def __str__(self):
-        return str(self.l)
-
-class _DumpBuilder():
-    def __init__(self,n):
-        self.data = bytes(n)
+        npos = self.pos+___len(obj)
+        if npos>self.size:
+            self._grow(npos)
+        self.data[self.pos:npos]=obj
+        self.pos=npos
+
+class _DumpStream():
+    # one pass builder: bytes are collected in a fixed size chunk that is flushed to a stream when full
+    def __init__(self,stream,n):
+        self.data = bytearray(n)
+        self.size = n
         self.pos = 0
+        if hasattr(stream,"write"):
+            self.out = stream.write
+        else:
+            self.out = stream.sendall
+        self.written = 0
+    def flush(self):
+        if self.pos:
+            __elements_set(self.data,self.pos)
+            self.out(self.data)
+            __elements_set(self.data,self.size)
+            self.written+=self.pos
+            self.pos = 0
     def append(self,x):
-        __byte_set(self.data,self.pos,x)
+        if self.pos==self.size:
+            self.flush()
+        self.data[self.pos]=x
         self.pos+=1
     def extend(self,obj):
-        for i in range(___len(obj)):
-            __byte_set(self.data,self.pos,__byte_get(obj,i))
-            self.pos+=1
-    def __setitem__(self, key, value):
-        if key==-1:
-            __byte_set(self.data,self.pos-1,value)
+        lb = ___len(obj)
+        npos = self.pos+lb
+        if npos<=self.size:
+            self.data[self.pos:npos]=obj
+            self.pos=npos
+            return
+        self.flush()
+        if lb>=self.size:
+            # no need to copy big objects
+            self.out(obj)
+            self.written+=lb
+        else:
+            self.data[0:lb]=obj
+            self.pos=lb
 
 def _dumps(obj,res):
     t = type(obj)
@@ -53,27 +89,34 @@ def _dumps(obj,res):
     elif t == PSTRING or t == PBYTEARRAY or t == PBYTES: 
         lb = ___len(obj)
         res.append(__ORD("\""))
+        # copy runs of plain chars at once, breaking only on chars that need escaping
+        st = 0
         for i in range(0,lb):
             c = __byte_get(obj,i)
-            if c in _to_escape:
-                res.append(__ORD("\\"))
+            if c in _to_escape or c<0x20 or c>0x7e:
+                if i>st:
+                    res.extend(obj[st:i])
+                st = i+1
                 if c==__ORD('\n'):
-                    res.append(__ORD("n"))
+                    res.extend("\\n")
                 elif c==__ORD('\r'):
-                    res.append(__ORD("r"))
+                    res.extend("\\r")
                 elif c==__ORD('\t'):
-                    res.append(__ORD("t"))
+                    res.extend("\\t")
                 elif c==__ORD('\f'):
-                    res.append(__ORD("f"))
+                    res.extend("\\f")
                 elif c==__ORD('\b'):
-                    res.append(__ORD("b"))
+                    res.extend("\\b")
+                elif c==__ORD('"') or c==__ORD('\\'):
+                    res.append(__ORD("\\"))
+                    res.append(c)
                 else:
-                    res.append(c)                        
-            elif c<0x20 or c>0x7e:
-                res.extend("\\u00")
-                res.extend(hex(c,""))            
-            else:
-                res.append(c)
+                    res.extend("\\u00")
+                    res.extend(hex(c,""))
+        if st==0:
+            res.extend(obj)
+        elif st<lb:
+            res.extend(obj[st:lb])
         res.append(__ORD("\""))
     elif t == PBOOL:
         if obj:
@@ -96,36 +139,52 @@ def _dumps_array(obj,res):
     res.append(__ORD("]"))
 
 def _dumps_map(obj,res):
-    lb = ___len(obj)
     res.append(__ORD("{"))
+    sep = False
     for k,v in obj.items():
         if type(k)!=PSTRING:
             raise JSONError
+        if sep:
+            res.append(__ORD(","))
+        sep = True
         _dumps(k,res)
         res.append(__ORD(":"))
         _dumps(v,res)
-        res.append(__ORD(","))
-    if lb:
-        res[-1]=__ORD("}")
-        #__byte_set(res,___len(res)-1,__ORD("}"))
-    else:
-        res.append(__ORD("}"))
+    res.append(__ORD("}"))
 
 def dumps(obj):
     """
 .. function:: dumps(obj)
 
-    Returns a bytearray containing the JSON representation of *obj*.
+    Returns a string containing the JSON representation of *obj*.
+
+    The representation is built in a single pass over *obj*, inside a buffer that doubles its size when full.
 
     Raises ``JSONError`` when *obj* contains non serializable objects.
 
     """    
-    res = _DumpCounter()# bytearray()    
+    res = _DumpBuffer()
     _dumps(obj,res)
-    res = _DumpBuilder(res.l)
+    __elements_set(res.data,res.pos)
+    return str(res.data)
+
+def dump(obj,stream,chunk=128):
+    """
+.. function:: dump(obj,stream,chunk=128)
+
+    Writes the JSON representation of *obj* to *stream* and returns the number of bytes written.
+
+    *stream* can be any object with a ``write`` method (e.g. a :class:`streams.stream` or a file) or a socket (``sendall`` is used).
+    The representation is built in a single pass over *obj* and written in pieces of at most *chunk* bytes, using a single buffer of *chunk* bytes: the whole
+    JSON document is never kept in memory.
+
+    Raises ``JSONError`` when *obj* contains non serializable objects. In this case, part of the representation may have already been written to *stream*.
+
+    """
+    res = _DumpStream(stream,chunk)
     _dumps(obj,res)
-    __change_type(res.data,PSTRING)
-    return res.data
+    res.flush()
+    return res.written
 
 
 @native_c("jsmn_loads",["csrc/jsmn/*"])
@@ -149,3 +208,111 @@ def loads(data):
             raise JSONError
     else:
         return None
+
+
+START_MAP = 0
+END_MAP = 1
+START_ARRAY = 2
+END_ARRAY = 3
+KEY = 4
+VALUE = 5
+
+@native_c("jsmn_next",["csrc/jsmn/*"])
+def _next(state,token,data,ofs):
+    pass
+
+class Parser():
+    """
+============
+Parser class
+============
+
+.. class:: Parser(callback=None,maxtoken=256)
+
+    Create an incremental (push) JSON parser. The document is given to the parser in chunks of any size by calling :meth:`feed` and it is decoded
+    as soon as bytes arrive, without ever holding the whole document in memory.
+
+    The parser produces a sequence of events, each one a tuple *(event, value)* where *event* is one of:
+
+        * ``json.START_MAP``, ``json.END_MAP``: start and end of an object, *value* is ``None``
+        * ``json.START_ARRAY``, ``json.END_ARRAY``: start and end of an array, *value* is ``None``
+        * ``json.KEY``: a key of an object, *value* is the key string
+        * ``json.VALUE``: a string, number, boolean or null value
+
+    If *callback* is given, it is called as ``callback(event, value)`` for every event during :meth:`feed`. Otherwise events are kept in the parser
+    and can be retrieved with :meth:`events`.
+
+    Strings and numbers split between two chunks are stored in an internal buffer of *maxtoken* bytes: if a single token spanning chunks is longer, ``JSONError`` is raised.
+    Objects can be nested at most 32 levels deep.
+
+    The parser can be used to decode big HTTP bodies while they are received: ::
+
+        p = json.Parser(on_event)
+        requests.get(url,stream_callback=p.feed)
+        p.close()
+
+    Multiple JSON documents concatenated in the same stream are decoded one after the other.
+
+    """
+    def __init__(self,callback=None,maxtoken=256):
+        self._st = bytearray(12)
+        self._tok = bytearray(maxtoken)
+        self._cb = callback
+        self._evts = []
+
+    def _dispatch(self,data):
+        ofs = 0
+        while True:
+            try:
+                ofs,evt,val = _next(self._st,self._tok,data,ofs)
+            except Exception as e:
+                raise JSONError
+            if evt<0:
+                return
+            if self._cb:
+                self._cb(evt,val)
+            else:
+                self._evts.append((evt,val))
+
+    def feed(self,data):
+        """
+.. method:: feed(data)
+
+    Decode the bytes in *data* (bytes, bytearray or string). The content of *data* is not referenced after the call, therefore *data* can be reused by the caller.
+
+    Raises ``JSONError`` when *data* contains bad JSON.
+
+        """
+        self._dispatch(data)
+
+    def close(self):
+        """
+.. method:: close()
+
+    Signal the end of the input, completing a pending top level number if any.
+
+    Raises ``JSONError`` if the document is not complete or if no document was fed at all.
+
+        """
+        self._dispatch(None)
+
+    def events(self):
+        """
+.. method:: events()
+
+    Return the list of events decoded since the last call and not yet returned. It is always empty when a *callback* is given.
+
+        """
+        res = self._evts
+        self._evts = []
+        return res
+
+    def reset(self):
+        """
+.. method:: reset()
+
+    Discard any partial state, making the parser ready for a new document.
+
+        """
+        self._st = bytearray(12)
+        self._evts = []
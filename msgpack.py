@@ -32,31 +32,64 @@ The supported formats are shown in the table below.
 +-----------------+----------------------------+-------------------------+
 | bin 16          | 11000101                   | 0xc5                    |
 +-----------------+----------------------------+-------------------------+
+| bin 32          | 11000110                   | 0xc6                    |
++-----------------+----------------------------+-------------------------+
+| ext 8           | 11000111                   | 0xc7                    |
++-----------------+----------------------------+-------------------------+
+| ext 16          | 11001000                   | 0xc8                    |
++-----------------+----------------------------+-------------------------+
+| ext 32          | 11001001                   | 0xc9                    |
++-----------------+----------------------------+-------------------------+
 | float 32        | 11001010                   | 0xca                    |
 +-----------------+----------------------------+-------------------------+
+| float 64        | 11001011                   | 0xcb                    |
++-----------------+----------------------------+-------------------------+
 | uint 8          | 11001100                   | 0xcc                    |
 +-----------------+----------------------------+-------------------------+
 | uint 16         | 11001101                   | 0xcd                    |
 +-----------------+----------------------------+-------------------------+
 | uint 32         | 11001110                   | 0xce                    |
 +-----------------+----------------------------+-------------------------+
+| uint 64         | 11001111                   | 0xcf                    |
++-----------------+----------------------------+-------------------------+
 | int 8           | 11010000                   | 0xd0                    |
 +-----------------+----------------------------+-------------------------+
 | int 16          | 11010001                   | 0xd1                    |
 +-----------------+----------------------------+-------------------------+
 | int 32          | 11010010                   | 0xd2                    |
 +-----------------+----------------------------+-------------------------+
+| int 64          | 11010011                   | 0xd3                    |
++-----------------+----------------------------+-------------------------+
+| fixext 1        | 11010100                   | 0xd4                    |
++-----------------+----------------------------+-------------------------+
+| fixext 2        | 11010101                   | 0xd5                    |
++-----------------+----------------------------+-------------------------+
+| fixext 4        | 11010110                   | 0xd6                    |
++-----------------+----------------------------+-------------------------+
+| fixext 8        | 11010111                   | 0xd7                    |
++-----------------+----------------------------+-------------------------+
+| fixext 16       | 11011000                   | 0xd8                    |
++-----------------+----------------------------+-------------------------+
 | str 8           | 11011001                   | 0xd9                    |
 +-----------------+----------------------------+-------------------------+
 | str 16          | 11011010                   | 0xda                    |
 +-----------------+----------------------------+-------------------------+
+| str 32          | 11011011                   | 0xdb                    |
++-----------------+----------------------------+-------------------------+
 | array 16        | 11011100                   | 0xdc                    |
 +-----------------+----------------------------+-------------------------+
+| array 32        | 11011101                   | 0xdd                    |
++-----------------+----------------------------+-------------------------+
 | map 16          | 11011110                   | 0xde                    |
 +-----------------+----------------------------+-------------------------+
+| map 32          | 11011111                   | 0xdf                    |
++-----------------+----------------------------+-------------------------+
 | negative fixint | 111xxxxx                   | 0xe0 - 0xff             |
 +-----------------+----------------------------+-------------------------+
 
+Ext values are packed from :class:`ExtType` instances and from instances of classes registered with :func:`register_ext`. The msgpack timestamp
+extension is supported by the :class:`Timestamp` class.
+
     """
 
 import struct
@@ -64,208 +97,663 @@ import struct
 new_exception(ZMsgPackError, Exception)
 new_exception(MsgUnpackError, Exception)
 
-def _pack(obj, res):
+class ExtType():
+    """
+=============
+ExtType class
+=============
+
+.. class:: ExtType(code, data)
+
+    A msgpack extension value with type *code* (an integer from -128 to 127) and payload *data* (bytes).
+    ExtType instances are packed as msgpack ext formats, and ext values whose *code* is not registered with :func:`register_ext` are unpacked as ExtType instances.
+
+    """
+    def __init__(self, code, data):
+        self.code = code
+        self.data = data
+
+class Timestamp():
+    """
+===============
+Timestamp class
+===============
+
+.. class:: Timestamp(seconds, nanoseconds=0)
+
+    A point in time as *seconds* since the Unix epoch plus *nanoseconds*. Timestamps are packed with the msgpack timestamp extension (type -1),
+    using the 32, 64 or 96 bit representation, whichever is the smallest able to hold the value.
+
+    """
+    def __init__(self, seconds, nanoseconds=0):
+        self.seconds = seconds
+        self.nanoseconds = nanoseconds
+
+# struct does not support 8 byte integers: 64 bit values are packed as two 32 bit halves
+
+def _pack_int64(buf, pos, v):
+    struct.pack_into('>II', buf, pos, (v>>32)&0xffffffff, v&0xffffffff)
+
+def _int64(hi, lo):
+    if hi >= 0x80000000:
+        hi -= 0x100000000
+    return (hi<<32)|lo
+
+def _ts_encode(obj):
+    sec = obj.seconds
+    ns = obj.nanoseconds
+    if sec >= 0 and (sec>>34) == 0:
+        if ns == 0 and (sec>>32) == 0:
+            return struct.pack(">I", sec)
+        return struct.pack(">II", (ns<<2)|(sec>>32), sec&0xffffffff)
+    return struct.pack(">III", ns, (sec>>32)&0xffffffff, sec&0xffffffff)
+
+def _ts_decode(data):
+    lb = ___len(data)
+    if lb == 4:
+        return Timestamp(struct.unpack(">I", data)[0])
+    elif lb == 8:
+        hi, lo = struct.unpack(">II", data)
+        return Timestamp(((hi&3)<<32)|lo, hi>>2)
+    elif lb == 12:
+        ns, hi, lo = struct.unpack(">III", data)
+        return Timestamp(_int64(hi, lo), ns)
+    raise MsgUnpackError
+
+_ext_codes = []
+_ext_classes = []
+_ext_encoders = []
+_ext_decoders = {}
+
+def register_ext(code, cls, encoder, decoder):
+    """
+.. function:: register_ext(code, cls, encoder, decoder)
+
+    Register a msgpack extension type. Instances of class *cls* are packed as ext values of type *code*, with payload ``encoder(obj)``
+    (that must return bytes or bytearray). Ext values of type *code* are unpacked as ``decoder(data)``, where *data* is the payload.
+
+    *encoder* may be called more than once for the same object, since the size of the representation is computed before writing it.
+    Registering a *code* again replaces the previous registration. :class:`Timestamp` is registered at import with type -1.
+    """
+    if code < -128 or code > 127:
+        raise ValueError
+    for i in range(0, ___len(_ext_codes)):
+        if _ext_codes[i] == code:
+            _ext_classes[i] = cls
+            _ext_encoders[i] = encoder
+            _ext_decoders[code] = decoder
+            return
+    _ext_codes.append(code)
+    _ext_classes.append(cls)
+    _ext_encoders.append(encoder)
+    _ext_decoders[code] = decoder
+
+register_ext(-1, Timestamp, _ts_encode, _ts_decode)
+
+def _ext(obj):
+    # returns the ExtType representation of an instance
+    if isinstance(obj, ExtType):
+        return obj
+    for i in range(0, ___len(_ext_classes)):
+        if isinstance(obj, _ext_classes[i]):
+            return ExtType(_ext_codes[i], _ext_encoders[i](obj))
+    raise ZMsgPackError
+
+def _size(obj, dbl=False):
+    t = type(obj)
+    if t == PDICT:
+        sz = _hdr_size(___len(obj),15)
+        for k, v in obj.items():
+            sz += _size(k,dbl)+_size(v,dbl)
+        return sz
+    elif t == PSHORTS or t == PSHORTARRAY or t == PLIST or t == PTUPLE:
+        sz = _hdr_size(___len(obj),15)
+        for o in obj:
+            sz += _size(o,dbl)
+        return sz
+    elif t == PSMALLINT or t == PINTEGER:
+        if obj >= 0:
+            if obj <= 0x7f:
+                return 1
+            elif obj <= 0xff:
+                return 2
+            elif obj <= 0xffff:
+                return 3
+            elif obj <= 0xffffffff:
+                return 5
+            return 9
+        if obj >= -32:
+            return 1
+        elif obj >= -128:
+            return 2
+        elif obj >= -32768:
+            return 3
+        elif obj >= -2147483648:
+            return 5
+        return 9
+    elif t == PSTRING:
+        lb = ___len(obj)
+        return _hdr_size(lb,31)+lb
+    elif t == PBYTEARRAY or t == PBYTES:
+        lb = ___len(obj)
+        if lb <= 255:
+            return 2+lb
+        return _hdr_size(lb,0)+lb
+    elif t == PFLOAT:
+        if dbl:
+            return 9
+        return 5
+    elif t == PBOOL or obj == None:
+        return 1
+    elif t == PINSTANCE:
+        lb = ___len(_ext(obj).data)
+        if lb == 1 or lb == 2 or lb == 4 or lb == 8 or lb == 16:
+            return 2+lb
+        elif lb <= 255:
+            return 3+lb
+        elif lb <= 65535:
+            return 4+lb
+        return 6+lb
+    raise ZMsgPackError
+
+def _hdr_size(lb,fixmax):
+    # size of the header of a container or string of lb elements
+    if lb <= fixmax:
+        return 1
+    elif fixmax == 31 and lb <= 255:
+        return 2
+    elif lb <= 65535:
+        return 3
+    return 5
+
+def _pack_into(obj, buf, pos, dbl=False):
     t = type(obj)
     if t == PDICT:
-        _pack_map(obj, res)
+        pos = _pack_hdr(buf, pos, ___len(obj), 0b10000000, 0xde)
+        for k, v in obj.items():
+            pos = _pack_into(k, buf, pos, dbl)
+            pos = _pack_into(v, buf, pos, dbl)
     elif t == PSHORTS or t == PSHORTARRAY or t == PLIST or t == PTUPLE:
-        _pack_array(obj, res)
+        pos = _pack_hdr(buf, pos, ___len(obj), 0b10010000, 0xdc)
+        for o in obj:
+            pos = _pack_into(o, buf, pos, dbl)
     elif t == PSMALLINT or t == PINTEGER:
         if obj >= 0:
             if obj <= 0x7f:
-                res.append(obj)
+                buf[pos] = obj
+                pos += 1
             elif obj <= 0xff:
-                res.append(0xcc)
-                res.append(obj)
+                buf[pos] = 0xcc
+                buf[pos+1] = obj
+                pos += 2
             elif obj <= 0xffff:
-                res.append(0xcd)
-                res.extend(struct.pack('>H', obj))
+                buf[pos] = 0xcd
+                struct.pack_into('>H', buf, pos+1, obj)
+                pos += 3
+            elif obj <= 0xffffffff:
+                buf[pos] = 0xce
+                struct.pack_into('>I', buf, pos+1, obj)
+                pos += 5
             else:
-                res.append(0xce)
-                res.extend(struct.pack('>I', obj))
+                buf[pos] = 0xcf
+                _pack_int64(buf, pos+1, obj)
+                pos += 9
         else:
             if obj >= -32:
-                res.extend(struct.pack('b', obj))
+                buf[pos] = obj & 0xff
+                pos += 1
             elif obj >= -128:
-                res.append(0xd0)
-                res.extend(struct.pack('b', obj))
+                buf[pos] = 0xd0
+                buf[pos+1] = obj & 0xff
+                pos += 2
             elif obj >= -32768:
-                res.append(0xd1)
-                res.extend(struct.pack('>h', obj))
+                buf[pos] = 0xd1
+                struct.pack_into('>h', buf, pos+1, obj)
+                pos += 3
+            elif obj >= -2147483648:
+                buf[pos] = 0xd2
+                struct.pack_into('>i', buf, pos+1, obj)
+                pos += 5
             else:
-                res.append(0xd2)
-                res.extend(struct.pack('>i', obj))
-    elif t == PSTRING or t == PBYTEARRAY or t == PBYTES: 
+                buf[pos] = 0xd3
+                _pack_int64(buf, pos+1, obj)
+                pos += 9
+    elif t == PSTRING or t == PBYTEARRAY or t == PBYTES:
         lb = ___len(obj)
         if t == PSTRING:
             if lb <= 31:
-                res.append(0b10100000+lb)
+                buf[pos] = 0b10100000+lb
+                pos += 1
             elif lb <= 255:
-                res.append(0xd9)
-                res.append(lb)
-            elif lb <= 65535:
-                res.append(0xda)
-                res.extend(struct.pack('>H', lb))
+                buf[pos] = 0xd9
+                buf[pos+1] = lb
+                pos += 2
+            else:
+                pos = _pack_len(buf, pos, lb, 0xda)
         else:
             if lb <= 255:
-                res.append(0xc4)
-                res.append(lb)
-            elif lb <= 65535:
-                res.append(0xc5)
-                res.extend(struct.pack('>H', lb))
-        res.extend(obj)
+                buf[pos] = 0xc4
+                buf[pos+1] = lb
+                pos += 2
+            else:
+                pos = _pack_len(buf, pos, lb, 0xc5)
+        buf[pos:pos+lb] = obj
+        pos += lb
     elif t == PFLOAT:
-        res.append(0xca)
-        res.extend(struct.pack('>f', obj))
+        if dbl:
+            buf[pos] = 0xcb
+            struct.pack_into('>d', buf, pos+1, obj)
+            pos += 9
+        else:
+            buf[pos] = 0xca
+            struct.pack_into('>f', buf, pos+1, obj)
+            pos += 5
     elif t == PBOOL:
         if obj:
-            res.append(0xc3)
+            buf[pos] = 0xc3
         else:
-            res.append(0xc2)
+            buf[pos] = 0xc2
+        pos += 1
     elif obj == None:
-        res.append(0xc0)
+        buf[pos] = 0xc0
+        pos += 1
+    elif t == PINSTANCE:
+        ext = _ext(obj)
+        lb = ___len(ext.data)
+        if lb == 1 or lb == 2 or lb == 4 or lb == 8 or lb == 16:
+            buf[pos] = _fixext[lb]
+            pos += 1
+        elif lb <= 255:
+            buf[pos] = 0xc7
+            buf[pos+1] = lb
+            pos += 2
+        else:
+            pos = _pack_len(buf, pos, lb, 0xc8)
+        buf[pos] = ext.code & 0xff
+        pos += 1
+        buf[pos:pos+lb] = ext.data
+        pos += lb
     else:
         raise ZMsgPackError
+    return pos
 
-def _pack_array(obj,res):
-    lb = ___len(obj)
-    if lb <= 15:
-        res.append(0b10010000+lb)
-    else:
-        res.append(0xdc)
-        res.extend(struct.pack('>H', lb))
-    for o in obj:
-        _pack(o,res)
+_fixext = {1:0xd4, 2:0xd5, 4:0xd6, 8:0xd7, 16:0xd8}
 
-def _pack_map(obj,res):
-    lb = ___len(obj)
+def _pack_len(buf, pos, lb, code16):
+    # 16 or 32 bit length; the 32 bit code always follows the 16 bit one
+    if lb <= 65535:
+        buf[pos] = code16
+        struct.pack_into('>H', buf, pos+1, lb)
+        return pos+3
+    buf[pos] = code16+1
+    struct.pack_into('>I', buf, pos+1, lb)
+    return pos+5
+
+def _pack_hdr(buf, pos, lb, fixcode, code16):
     if lb <= 15:
-        res.append(0b10000000+lb)
-    else:
-        res.append(0xde)
-        res.extend(struct.pack('>H',lb))
-    for k, v in obj.items():
-        _pack(k,res)
-        _pack(v,res)
+        buf[pos] = fixcode+lb
+        return pos+1
+    return _pack_len(buf, pos, lb, code16)
 
-def pack(obj):
+def packsize(obj, use_double=False):
     """
-.. function:: pack(obj)
+.. function:: packsize(obj, use_double=False)
+
+    Returns the number of bytes needed to store the msgpack representation of *obj*.
+
+    Raises ``ZMsgPackError`` when *obj* contains non serializable objects.
+    """
+    return _size(obj,use_double)
+
+def pack(obj, use_double=False):
+    """
+.. function:: pack(obj, use_double=False)
 
     Returns a bytearray containing the msgpack representation of *obj*.
+    The bytearray is allocated once with the exact size of the representation.
+
+    Floats are packed as float 32, or as float 64 if *use_double* is ``True``. Instances of :class:`ExtType` and of the classes registered
+    with :func:`register_ext` are packed as ext values.
 
-    Raises ``MsgPackError`` when *obj* contains non serializable objects.
+    Raises ``ZMsgPackError`` when *obj* contains non serializable objects.
     """
-    res = bytearray()
-    _pack(obj,res)
+    res = bytearray(_size(obj,use_double))
+    _pack_into(obj,res,0,use_double)
     return res
 
+def pack_into(obj, buffer, offset=0, use_double=False):
+    """
+.. function:: pack_into(obj, buffer, offset=0, use_double=False)
+
+    Writes the msgpack representation of *obj* into the bytearray *buffer* starting at *offset*, without allocating memory.
+
+    Returns the offset of the first byte after the representation.
+
+    Raises ``ZMsgPackError`` when *obj* contains non serializable objects or when *buffer* is too small.
+    """
+    if offset+_size(obj,use_double) > ___len(buffer):
+        raise ZMsgPackError
+    return _pack_into(obj,buffer,offset,use_double)
+
+
+class Packer():
+    """
+============
+Packer class
+============
+
+.. class:: Packer(size=64, use_double=False)
+
+    Create a Packer instance owning an output buffer of *size* bytes. The buffer is reused for every message and enlarged only
+    when a message does not fit, so that packing many messages of similar size does not allocate memory.
+    Floats are packed as float 64 if *use_double* is ``True``.
+
+    """
+    def __init__(self, size=64, use_double=False):
+        self.buf = bytearray(size)
+        self.size = size
+        self.dbl = use_double
+
+    def pack(self, obj):
+        """
+.. method:: pack(obj)
+
+    Returns the msgpack representation of *obj* as a bytearray. The returned bytearray is the internal buffer of the Packer: its content
+    is valid only until the next call to :meth:`pack`.
 
-def unpack(data, offs=0):
+    Raises ``ZMsgPackError`` when *obj* contains non serializable objects.
+        """
+        n = _size(obj,self.dbl)
+        __elements_set(self.buf,self.size)
+        if n > self.size:
+            self.buf.extend(bytearray(n-self.size))
+            self.size = n
+        _pack_into(obj,self.buf,0,self.dbl)
+        __elements_set(self.buf,n)
+        return self.buf
+
+
+def unpack(data, offs=0, copy_bin=True):
     """
-.. function:: unpack(data,offs=0)
+.. function:: unpack(data,offs=0,copy_bin=True)
 
     Returns an object represented in msgpack format inside the byte sequence *data* starting from offset *offs*.
 
-    Not every valid msgpack representation can be converted to python objects by *unpack*. 
-    For example, 64-bit msgpack integers and msgpack ext types. In that case, ``MsgUnpackError`` is raised.
+    Integers and floats are decoded in place, without slicing *data*. Strings and binary fields are copied once, unless *copy_bin* is ``False``:
+    in that case binary fields are returned as :class:`View` instances referencing *data*.
+
+    Ext values are converted with the decoder registered for their type with :func:`register_ext`, or returned as :class:`ExtType` instances.
+    Unsigned 64-bit integers greater than 2**63-1 can not be represented: in that case, as for invalid data, ``MsgUnpackError`` is raised.
+    ``MsgOutOfData`` (a subclass of ``MsgUnpackError``) is raised when *data* ends before the object is complete.
     """
     if len(data)-offs>0:
-        obj = []
-        _unpack(data, offs, obj)
-        return obj[0]
+        u = Unpacker(copy_bin,0)
+        u.buf = data
+        u.pos = offs
+        return u._unpack()
     return None
 
-def _unpack(data, pos, obj):
-    c = __byte_get(data, pos)
-    
-    pos+=1
-    if c <= 0x7f:
-        dp = c
-    elif c>=0b11100000:
-        dp = struct.unpack('b',c)[0]
-    elif c == 0xc0:
-        dp = None
-    elif c == 0xc2:
-        dp = False
-    elif c == 0xc3:
-        dp = True
-    
-    elif c >= 0xcc and c <= 0xce:
-        if c == 0xcc:
-            dp = __byte_get(data,pos)
-            pos += 1
-        elif c == 0xcd:
-            dp = struct.unpack('>H', data[pos:pos+2])[0]
-            pos += 2
-        else:
-            dp = struct.unpack('>I', data[pos: pos+4])[0]
-            pos += 4
-    elif c >= 0xd0 and c <= 0xd2:
-        if c == 0xd0:
-            dp = struct.unpack("b",data[pos])[0]
-            pos += 1
-        elif c == 0xd1:
-            dp = struct.unpack(">h", data[pos : pos+2])[0]
-            pos += 2
-        else:
-            dp = struct.unpack(">i", data[pos : pos+4])[0]
-            pos += 4
-    elif c == 0xca:
-        dp = struct.unpack(">f", data[pos : pos+4])[0]
-        pos += 4
-    elif c >= 0b10100000 and c <= 0b10111111:
-        dp = c-0b10100000
-        pos += dp
-        dp = str(data[pos-dp:pos])
-    elif c == 0xd9:
-        dp = data[pos]
-        pos += 1+dp
-        dp = str(data[pos-dp:pos])
-    elif c == 0xda:
-        dp = struct.unpack(">H",data[pos:pos+2])[0]
-        pos += 2+dp
-        dp = str(data[pos-dp:pos])
-    elif c == 0xc4:
-        dp = __byte_get(data,pos)
-        pos += 1+dp
-        dp = bytes(data[pos-dp:pos])
-    elif c==0xc5:
-        dp = struct.unpack(">H",data[pos:pos+2])[0]
-        pos+=2+dp
-        dp=bytes(data[pos-dp:pos])
-    elif c>=0b10010000 and c<=0b10011111:
-        dp = []
-        pos = _unpack_array(data,pos,c-0b10010000,dp)
-    elif c==0xdc:
-        dp = []
-        pos =_unpack_array(data, pos+2, struct.unpack(">H",data[pos:pos+2])[0], dp)
-    elif c >= 0b10000000 and c <= 0b10001111:
-        dp = {}
-        pos = _unpack_map(data, pos, c-0b10000000, dp)
-    elif c == 0xde:
-        dp = {}
-        pos = _unpack_map(data, pos+2, struct.unpack(">H",data[pos:pos+2])[0], dp)
-    else: 
-        raise MsgUnpackError
-    obj.append(dp)
-    return pos
 
+# normalize a slice index of a View of n bytes, as Python does for sequences
+def _view_index(i, default, n):
+    if i==None:
+        return default
+    if i<0:
+        i+=n
+        if i<0:
+            return 0
+    elif i>n:
+        return n
+    return i
 
-def _unpack_array(data, pos, n, obj):
-    for i in range(0, n):
-        pos = _unpack(data, pos, obj)
-    return pos
+class View():
+    """
+==========
+View class
+==========
 
-def _unpack_map(data, pos, n, obj):
-    key = []
-    val = []
-    for i in range(0, n):
-        pos = _unpack(data, pos, key)
-        pos = _unpack(data, pos, val)
-        obj[key[0]] = val[0]
-        key.clear()
-        val.clear()
-    return pos
+.. class:: View(buf,start,end)
+
+    A read only view of the bytes of *buf* between *start* and *end*. It is returned by :func:`unpack` and :class:`Unpacker`
+    in place of binary fields when *copy_bin* is ``False``, so that big payloads are not copied.
+
+    A View supports ``len()``, indexing and slicing (slicing returns a copy, steps other than 1 raise ``UnsupportedError``). Its content is valid as long as the source buffer is not modified.
+
+    """
+    def __init__(self, buf, start, end):
+        self.buf = buf
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end-self.start
+
+    def __getitem__(self, key):
+        if type(key)==PSLICE:
+            if key[2]!=1:
+                raise UnsupportedError
+            n = self.end-self.start
+            st = _view_index(key[0], 0, n)
+            sp = _view_index(key[1], n, n)
+            if sp<st:
+                sp = st
+            return self.buf[self.start+st:self.start+sp]
+        if key<0:
+            key+=self.end-self.start
+        if key<0 or key>=self.end-self.start:
+            raise IndexError
+        return __byte_get(self.buf,self.start+key)
+
+    def tobytes(self):
+        """
+.. method:: tobytes()
+
+    Returns a copy of the viewed bytes.
+        """
+        return bytes(self.buf[self.start:self.end])
+
+
+new_exception(MsgOutOfData, MsgUnpackError)
+
+class Unpacker():
+    """
+==============
+Unpacker class
+==============
+
+.. class:: Unpacker(copy_bin=True, size=64)
+
+    Create a streaming Unpacker. Chunks of msgpack data of any size are given to the Unpacker with :meth:`feed` and complete objects
+    are returned as soon as all their bytes have arrived. It is useful to decode framed msgpack messages received from a serial port or a socket: ::
+
+        u = msgpack.Unpacker()
+        while True:
+            u.feed(ser.read(ser.available() or 1))
+            for obj in u:
+                print(obj)
+
+    Pending bytes are kept in an internal bytearray of initial capacity *size*, that is compacted and reused at every :meth:`feed`.
+    If *copy_bin* is ``False``, binary fields are returned as :class:`View` instances referencing the internal buffer: they are valid only until the next call to :meth:`feed`.
+
+    """
+    def __init__(self, copy_bin=True, size=64):
+        self.buf = bytearray(size)
+        __elements_set(self.buf,0)
+        self.pos = 0
+        self.copy_bin = copy_bin
+
+    def feed(self, data):
+        """
+.. method:: feed(data)
+
+    Append the bytes in *data* to the pending ones.
+        """
+        if self.pos:
+            # drop consumed bytes, moving the pending ones at the start of the buffer
+            n = ___len(self.buf)-self.pos
+            if n:
+                self.buf[0:n] = self.buf[self.pos:]
+            __elements_set(self.buf,n)
+            self.pos = 0
+        self.buf.extend(data)
 
+    def unpack(self):
+        """
+.. method:: unpack()
+
+    Returns the next complete object. Raises ``MsgOutOfData`` if more bytes are needed: in this case the pending bytes are kept and
+    decoding restarts from the beginning of the object at the next call.
+
+    Raises ``MsgUnpackError`` when the data is not valid msgpack.
+        """
+        pos = self.pos
+        try:
+            return self._unpack()
+        except MsgOutOfData as e:
+            self.pos = pos
+            raise e
+
+    def pending(self):
+        """
+.. method:: pending()
+
+    Returns the number of bytes received and not yet decoded.
+        """
+        return ___len(self.buf)-self.pos
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.unpack()
+        except MsgOutOfData:
+            raise StopIteration
+
+    def _need(self, n):
+        if self.pos+n > ___len(self.buf):
+            raise MsgOutOfData
+
+    def _uint(self, n):
+        self._need(n)
+        pos = self.pos
+        self.pos = pos+n
+        if n == 1:
+            return __byte_get(self.buf,pos)
+        elif n == 2:
+            return (__byte_get(self.buf,pos)<<8)|__byte_get(self.buf,pos+1)
+        elif n == 8:
+            hi, lo = struct.unpack_from('>II', self.buf, pos)
+            if hi >= 0x80000000:
+                # does not fit in a signed 64 bit integer
+                raise MsgUnpackError
+            return _int64(hi, lo)
+        return struct.unpack_from('>I', self.buf, pos)[0]
+
+    def _int(self, n):
+        if n == 1:
+            v = self._uint(1)
+            if v >= 0x80:
+                v -= 0x100
+            return v
+        self._need(n)
+        pos = self.pos
+        self.pos = pos+n
+        if n == 8:
+            hi, lo = struct.unpack_from('>II', self.buf, pos)
+            return _int64(hi, lo)
+        return struct.unpack_from(_ifmt[n], self.buf, pos)[0]
+
+    def _float(self, n):
+        self._need(n)
+        pos = self.pos
+        self.pos = pos+n
+        return struct.unpack_from(_ffmt[n], self.buf, pos)[0]
+
+    def _ext(self, n):
+        code = self._int(1)
+        self._need(n)
+        data = self.buf[self.pos:self.pos+n]
+        self.pos += n
+        if type(data) != PBYTES:
+            data = bytes(data)
+        if code in _ext_decoders:
+            return _ext_decoders[code](data)
+        return ExtType(code, data)
+
+    def _str(self, n):
+        self._need(n)
+        s = self.buf[self.pos:self.pos+n]
+        self.pos += n
+        if type(s)==PSTRING:
+            return s
+        return str(s)
+
+    def _bin(self, n):
+        self._need(n)
+        st = self.pos
+        self.pos += n
+        if not self.copy_bin:
+            return View(self.buf,st,st+n)
+        s = self.buf[st:st+n]
+        if type(s)==PBYTES:
+            return s
+        return bytes(s)
+
+    def _array(self, n):
+        res = [None]*n
+        for i in range(0, n):
+            res[i] = self._unpack()
+        return res
+
+    def _map(self, n):
+        res = {}
+        for i in range(0, n):
+            k = self._unpack()
+            res[k] = self._unpack()
+        return res
+
+    def _unpack(self):
+        self._need(1)
+        c = __byte_get(self.buf, self.pos)
+        self.pos += 1
+        if c <= 0x7f:
+            return c
+        elif c >= 0xe0:
+            return c-256
+        elif c >= 0xa0 and c <= 0xbf:
+            return self._str(c-0xa0)
+        elif c >= 0x90 and c <= 0x9f:
+            return self._array(c-0x90)
+        elif c >= 0x80 and c <= 0x8f:
+            return self._map(c-0x80)
+        elif c == 0xc0:
+            return None
+        elif c == 0xc2:
+            return False
+        elif c == 0xc3:
+            return True
+        elif c >= 0xcc and c <= 0xcf:
+            return self._uint(1<<(c-0xcc))
+        elif c >= 0xd0 and c <= 0xd3:
+            return self._int(1<<(c-0xd0))
+        elif c == 0xca:
+            return self._float(4)
+        elif c == 0xcb:
+            return self._float(8)
+        elif c >= 0xd9 and c <= 0xdb:
+            return self._str(self._uint(1<<(c-0xd9)))
+        elif c >= 0xc4 and c <= 0xc6:
+            return self._bin(self._uint(1<<(c-0xc4)))
+        elif c == 0xdc or c == 0xdd:
+            return self._array(self._uint(2<<(c-0xdc)))
+        elif c == 0xde or c == 0xdf:
+            return self._map(self._uint(2<<(c-0xde)))
+        elif c >= 0xd4 and c <= 0xd8:
+            return self._ext(1<<(c-0xd4))
+        elif c >= 0xc7 and c <= 0xc9:
+            return self._ext(self._uint(1<<(c-0xc7)))
+        raise MsgUnpackError
 
+_ifmt = {2:">h", 4:">i"}
+_ffmt = {4:">f", 8:">d"}
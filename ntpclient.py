@@ -10,6 +10,7 @@ NTPClient Library
     """
 
 import socket
+import dnscache
 
 class NTPClient():
     """
@@ -42,12 +43,15 @@ NTPClient class
         """
         sock = socket.socket(type=socket.SOCK_DGRAM)
         sock.settimeout(1000)
+        # failed tries on the current address of the server
+        fails = 0
         for i in range(0, 10):
+            ip_string = None
             try:
                 pkt = bytearray([0] * 48)
                 pkt[0] = 0x1B
                 
-                ip_string = self._conn.gethostbyname(self._server)
+                ip_string = dnscache.gethostbyname(self._server,self._conn.gethostbyname)
                 ip = socket.ip_to_tuple(ip_string)
 
                 addr = (ip[0], ip[1], ip[2], ip[3], 123)
@@ -62,6 +66,12 @@ NTPClient class
                 return ts
      
             except Exception as e:
+                # a failed resolution is cached as negative: forget it to resolve again at the next try.
+                # Timeouts retry the cached address, moving to another server of the pool only after 3 of them
+                fails+=1
+                if ip_string is None or fails>=3:
+                    dnscache.flush(self._server)
+                    fails = 0
                 sleep(100)
         else:
             sock.close()
@@ -14,10 +14,13 @@ the driver to access the underlying hardware.
     """
 
 
+import threading
+import timers
+
 # should be builtin
 
-def open(path, mode):
-    return FileIO(path, mode)
+def open(path, mode, buffering = 0, sync_size = 0, sync_time = 0):
+    return FileIO(path, mode, buffering, sync_size, sync_time)
 
 # should be os.path
 
@@ -127,8 +130,10 @@ def listdir(path):
 
     """
     n = __default_fs.get_available_fd_n('dirs')
+    if n is None:
+        raise OSError
     if __default_fs.__f_opendir(path, n) == -1:
-        __default_fs.free_fd_n('dirs')
+        __default_fs.free_fd_n('dirs', n)
         raise OSError
     dir_list = []
     while True:
@@ -143,6 +148,194 @@ def listdir(path):
     __default_fs.free_fd_n('dirs', n)
     return dir_list
 
+ATTR_READONLY = 0x01
+ATTR_HIDDEN = 0x02
+ATTR_SYSTEM = 0x04
+ATTR_DIR = 0x10
+ATTR_ARCHIVE = 0x20
+
+def _join(dirpath, name):
+    if dirpath and not dirpath.endswith("/") and not dirpath.endswith(":"):
+        return dirpath + "/" + name
+    return dirpath + name
+
+class DirEntry():
+    """
+==================
+The DirEntry class
+==================
+
+.. class:: DirEntry
+
+    An entry of a directory, returned by :func:`scandir`. It is not meant to be created directly.
+    Its attributes are read from the directory entry itself while scanning, without accessing the file:
+
+        * *name*: the entry name
+        * *path*: the entry path, *name* joined to the path given to :func:`scandir`
+        * *size*: the file size in bytes (0 for directories)
+        * *attrib*: the attributes, a combination of ``os.ATTR_READONLY``, ``os.ATTR_HIDDEN``, ``os.ATTR_SYSTEM``, ``os.ATTR_DIR`` and ``os.ATTR_ARCHIVE``
+
+    """
+    def __init__(self, dirpath, info):
+        self.name = info[0]
+        self.path = _join(dirpath, info[0])
+        self.size = info[1]
+        self.attrib = info[2]
+        self._date = info[3]
+        self._time = info[4]
+
+    def is_dir(self):
+        """
+.. method:: is_dir()
+
+        Return True if the entry is a directory.
+        """
+        return (self.attrib & ATTR_DIR) != 0
+
+    def is_file(self):
+        """
+.. method:: is_file()
+
+        Return True if the entry is a file.
+        """
+        return (self.attrib & ATTR_DIR) == 0
+
+    def mtime(self):
+        """
+.. method:: mtime()
+
+        Return the last modification time as a tuple *(year, month, day, hours, minutes, seconds)*, with a resolution of 2 seconds.
+        Files written by a filesystem driver without a real time clock carry the fixed date configured in the driver.
+        """
+        d = self._date
+        t = self._time
+        return (1980 + (d >> 9), (d >> 5) & 0x0f, d & 0x1f, t >> 11, (t >> 5) & 0x3f, (t & 0x1f) * 2)
+
+class _ScandirIterator():
+    def __init__(self, path):
+        self._path = path
+        self._n = __default_fs.get_available_fd_n('dirs')
+        if self._n is None:
+            raise OSError
+        if __default_fs.__f_opendir(path, self._n) == -1:
+            __default_fs.free_fd_n('dirs', self._n)
+            self._n = None
+            raise OSError
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._n is None:
+            raise StopIteration
+        res = __default_fs.__f_readdir_info(self._n)
+        if res == 0:
+            self.close()
+            raise StopIteration
+        if res == -1:
+            self.close()
+            raise OSError
+        return DirEntry(self._path, res)
+
+    def close(self):
+        if self._n is not None:
+            __default_fs.__f_closedir(self._n)
+            __default_fs.free_fd_n('dirs', self._n)
+            self._n = None
+
+def scandir(path):
+    """
+.. function:: scandir(path)
+
+    Return an iterator of :class:`DirEntry` objects for the entries in the directory given by path, in arbitrary order.
+    It does not include the special entries '.' and '..'.
+
+    Entries are read one at a time while iterating, with their size, attributes and modification time: unlike :func:`listdir`, the names of the whole
+    directory are never kept in memory, and no further access to the disk is needed to tell files from directories or to get their size. ::
+
+        # remove the log files older than 2020
+        for entry in os.scandir("0:logs"):
+            if entry.is_file() and entry.mtime()[0] < 2020:
+                os.remove(entry.path)
+
+    The directory stays open, taking one of the directory descriptors of the driver, until the iterator is exhausted:
+    if the loop is interrupted early, the ``close()`` method of the iterator must be called.
+
+    """
+    return _ScandirIterator(path)
+
+class _Walk():
+    def __init__(self, top, topdown):
+        self._topdown = topdown
+        # top down: paths still to be scanned; bottom up: [path, dirnames, filenames] with None lists until scanned
+        if topdown:
+            self._stack = [top]
+        else:
+            self._stack = [[top, None, None]]
+        self._last = None
+
+    def _scan(self, path):
+        dirnames = []
+        filenames = []
+        for entry in scandir(path):
+            if entry.is_dir():
+                dirnames.append(entry.name)
+            else:
+                filenames.append(entry.name)
+        return dirnames, filenames
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._topdown:
+            if self._last is not None:
+                # dirnames may have been pruned by the caller
+                path, dirnames = self._last
+                self._last = None
+                i = len(dirnames) - 1
+                while i >= 0:
+                    self._stack.append(_join(path, dirnames[i]))
+                    i -= 1
+            if not self._stack:
+                raise StopIteration
+            path = self._stack.pop()
+            dirnames, filenames = self._scan(path)
+            self._last = (path, dirnames)
+            return (path, dirnames, filenames)
+        while self._stack:
+            e = self._stack[-1]
+            if e[1] is not None:
+                self._stack.pop()
+                return (e[0], e[1], e[2])
+            dirnames, filenames = self._scan(e[0])
+            e[1] = dirnames
+            e[2] = filenames
+            i = len(e[1]) - 1
+            while i >= 0:
+                self._stack.append([_join(e[0], e[1][i]), None, None])
+                i -= 1
+        raise StopIteration
+
+def walk(top, topdown = True):
+    """
+.. function:: walk(top, topdown = True)
+
+    Return an iterator over the directory tree rooted at *top*, yielding a tuple *(dirpath, dirnames, filenames)* for each directory:
+    *dirpath* is the path of the directory, *dirnames* and *filenames* the lists of the names of its subdirectories and files.
+
+    If *topdown* is True, a directory is yielded before its subdirectories, and *dirnames* can be modified in place to prune the walk
+    or change its order; otherwise a directory is yielded after all its subdirectories.
+
+    Each directory is read with a single :func:`scandir` pass and closed before being yielded, so that a single directory descriptor is used
+    whatever the depth of the tree. ::
+
+        for dirpath, dirnames, filenames in os.walk("0:"):
+            print(dirpath, len(filenames), "files")
+
+    """
+    return _Walk(top, topdown)
+
 # should be shutil
 
 def copyfile(src, dst):
@@ -153,7 +346,12 @@ def copyfile(src, dst):
 
     """
     n_src = __default_fs.get_available_fd_n('files')
+    if n_src is None:
+        raise OSError
     n_dst = __default_fs.get_available_fd_n('files')
+    if n_dst is None:
+        __default_fs.free_fd_n('files', n_src)
+        raise OSError
     res = __default_fs.__f_copy(src, dst, n_src, n_dst)
     __default_fs.free_fd_n('files', n_src)
     __default_fs.free_fd_n('files', n_dst)
@@ -162,13 +360,23 @@ def copyfile(src, dst):
 
 # should be io
 
+SECTOR_SIZE = 512
+
+def _sync_due(f):
+    # timer callback of buffered files
+    f._lock.acquire()
+    f._armed = False
+    if not f.closed:
+        f._sync()
+    f._lock.release()
+
 class FileIO():
     """
 ================
 The FileIO class
 ================
 
-.. class:: FileIO(path, mode = 'r')
+.. class:: FileIO(path, mode = 'r', buffering = 0, sync_size = 0, sync_time = 0)
 
     Main class to handle files.
 
@@ -180,28 +388,93 @@ The FileIO class
             * 'a' 	open for writing, appending to the end of the file if it exists
             * 'b' 	binary mode
             * '+' 	open a disk file for updating (reading and writing)
+
+    A positive *buffering* enables the buffered write mode, meant for data loggers. Written bytes are collected in a buffer of *buffering* bytes
+    (rounded up to a multiple of ``os.SECTOR_SIZE``) and passed to the driver in chunks ending on a sector boundary, so that whole sectors are written
+    straight from the buffer. The file is synced to disk (data, FAT and directory entry):
+
+        * when at least *sync_size* bytes have been passed to the driver since the last sync, if *sync_size* is positive (checked each time the buffer is full)
+        * at most *sync_time* milliseconds after the first write following a sync, if *sync_time* is positive, even if no more writes happen (a :class:`timers.timer` is used)
+        * when :meth:`flush` or :meth:`close` are called, or :meth:`write` is called with *sync* set
+
+    Writing with ``sync = True`` at every record rewrites the FAT and directory sectors each time, while a file that is never synced loses
+    everything written since it was opened on a power loss: the buffered mode bounds the loss to *sync_size* plus *buffering* bytes or *sync_time* milliseconds
+    of data with a few sector writes per sync. ::
+
+        # sync at least every 4 KB and every 2 seconds
+        log = os.FileIO("0:log.csv", "a", buffering=1024, sync_size=4096, sync_time=2000)
+        while True:
+            log.write(read_sensors())
+            sleep(100)
+
     """
-    def __init__(self, path, mode = 'r'):
+    def __init__(self, path, mode = 'r', buffering = 0, sync_size = 0, sync_time = 0):
         self.closed = False
         self._read_mode = 0
-        self._n = __default_fs.get_available_fd_n('files')
+        self._buf = None
         do_seek = False
 
         if 'b' in mode:
             self._read_mode = 1
         mode = mode.replace('b','')
         if 'a' in mode:
-            if not exists(path):
-                mode = mode.replace('a','w')
-            else:
-                do_seek = True
+            # the driver creates the file if it does not exist
+            do_seek = True
         mode = __default_fs.to_b_mode(mode)
 
-        r = __default_fs.__f_open(path, mode, self._n)
-        if r == -1:
+        self._n = __default_fs.open_file(path, mode)
+        if self._n == -1:
+            self.closed = True
             raise OSError
         if do_seek:
             self.seek(0, 2)
+        if buffering > 0:
+            self._size = (buffering + SECTOR_SIZE - 1) // SECTOR_SIZE * SECTOR_SIZE
+            self._buf = bytearray(self._size)
+            self._pos = 0
+            self._unsynced = 0
+            self._sync_size = sync_size
+            self._sync_time = sync_time
+            self._lock = threading.Lock()
+            self._timer = None
+            self._armed = False
+            if sync_time > 0:
+                self._timer = timers.timer()
+
+    # buffered mode, called with _lock held
+
+    def _align(self):
+        # called when the buffer is empty: the next chunk ends on a sector boundary
+        self._limit = self._size - __default_fs.__f_tell(self._n) % SECTOR_SIZE
+
+    def _flush_buffer(self):
+        if not self._pos:
+            return 0
+        __elements_set(self._buf, self._pos)
+        r = __default_fs.__f_write(self._buf, False, self._n)
+        __elements_set(self._buf, self._size)
+        if r != self._pos:
+            return -1
+        self._unsynced += self._pos
+        self._pos = 0
+        return 0
+
+    def _sync(self):
+        if self._flush_buffer() == -1:
+            return -1
+        if self._unsynced:
+            self._unsynced = 0
+            return __default_fs.__f_sync(self._n)
+        return 0
+
+    def _drain(self):
+        # pending bytes are written before any other operation
+        if self._buf is not None and self._pos:
+            self._lock.acquire()
+            r = self._flush_buffer()
+            self._lock.release()
+            if r == -1:
+                raise OSError
 
     def read(self, n_bytes = -1):
         """
@@ -215,6 +488,7 @@ The FileIO class
         """
         if self.closed:
             raise ValueError
+        self._drain()
         if n_bytes == -1:
             n_bytes = self.size()
         return __default_fs.__f_read(n_bytes, self._read_mode, self._n)
@@ -226,24 +500,84 @@ The FileIO class
         Write to_w object (string or bytes) to the stream and return the number of characters written.
 
         *sync* parameter allows to write changes to disk immediately, without waiting :meth:`close` call.
+
+        In buffered mode, bytes are written to disk when the buffer is full or the file is synced; ``OSError`` is raised if writing them fails.
+        """
+        if self.closed:
+            raise ValueError
+        if self._buf is None:
+            return __default_fs.__f_write(to_w, sync, self._n)
+        n = len(to_w)
+        ofs = 0
+        r = 0
+        self._lock.acquire()
+        while ofs < n and r != -1:
+            if not self._pos:
+                self._align()
+            k = self._limit - self._pos
+            if k > n - ofs:
+                k = n - ofs
+            if k == n:
+                self._buf[self._pos:self._pos + k] = to_w
+            else:
+                self._buf[self._pos:self._pos + k] = to_w[ofs:ofs + k]
+            self._pos += k
+            ofs += k
+            if self._pos == self._limit:
+                r = self._flush_buffer()
+                if r != -1 and self._sync_size > 0 and self._unsynced >= self._sync_size:
+                    # synced at chunk boundaries only, keeping writes sector aligned
+                    r = self._sync()
+        if r != -1:
+            if sync:
+                r = self._sync()
+            elif self._timer is not None and not self._armed:
+                self._armed = True
+                self._timer.one_shot(self._sync_time, _sync_due, self)
+        self._lock.release()
+        if r == -1:
+            raise OSError
+        return n
+
+    def flush(self):
+        """
+.. method:: flush()
+
+        Write the buffered bytes and sync the file to disk.
         """
         if self.closed:
             raise ValueError
-        return __default_fs.__f_write(to_w, sync, self._n)
+        if self._buf is None:
+            r = __default_fs.__f_sync(self._n)
+        else:
+            self._lock.acquire()
+            r = self._sync()
+            self._lock.release()
+        if r == -1:
+            raise OSError
 
     def close(self):
         """
 .. method:: close()
 
         Close file stream.
+
+        If the handle cache of the filesystem driver is enabled (see :func:`fatfs.set_handle_cache`), the file is synced to disk and kept open by the driver,
+        so that opening it again with the same path and mode is faster.
         """
         if self.closed:
             raise ValueError
-        r = __default_fs.__f_close(self._n)
-        if r == -1:
-            raise OSError
-        __default_fs.free_fd_n('files', self._n)
+        r = 0
+        if self._buf is not None:
+            self._lock.acquire()
+            if self._timer is not None:
+                self._timer.destroy()
+            r = self._flush_buffer()
+            self.closed = True
+            self._lock.release()
         self.closed = True
+        if __default_fs.close_file(self._n) == -1 or r == -1:
+            raise OSError
 
     def size(self):
         """
@@ -253,6 +587,7 @@ The FileIO class
         """
         if self.closed:
             raise ValueError
+        self._drain()
         return __default_fs.__f_size(self._n)
 
     def tell(self):
@@ -263,6 +598,7 @@ The FileIO class
         """
         if self.closed:
             raise ValueError
+        self._drain()
         return __default_fs.__f_tell(self._n)
 
     def seek(self, offset, whence = 0):
@@ -280,6 +616,7 @@ The FileIO class
         """
         if self.closed:
             raise ValueError
+        self._drain()
         if whence == 1:
             whence = self.tell()
         elif whence == 2:
@@ -297,28 +634,81 @@ The FileIO class
         """
         if self.closed:
             raise ValueError
+        self._drain()
         if size != None:
             self.seek(size)
         if __default_fs.__f_truncate(self._n) == -1:
             raise OSError
 
-    def readline(self):
+    def readline(self, size = -1):
         """
-.. method:: readline()
+.. method:: readline(size = -1)
 
-        Read until newline or EOF and return a single str.
+        Read until newline or EOF and return a single line, newline included. If *size* is given, at most *size* bytes are read.
+        Return type can be string or bytes depending on chosen mode.
         If the stream is already at EOF, an empty string is returned.
+
+        The line is read and searched for the newline by the filesystem driver in chunks, using the read-ahead sector buffer of the file.
         """
-        if self.closed or self._read_mode == 'b':
+        if self.closed:
             raise ValueError
-        res = ""
-        n_chr = None
-        while n_chr != '\n' and n_chr != '':
-            n_chr = self.read(1)
-            res += n_chr
+        self._drain()
+        res = __default_fs.__f_readline(self._read_mode, size, self._n)
+        if res == -1:
+            raise OSError
+        return res
+
+    def readlines(self, hint = -1):
+        """
+.. method:: readlines(hint = -1)
+
+        Read and return a list of lines from the stream. If *hint* is given, no more lines are read once the total size of the lines read exceeds *hint*.
+        """
+        res = []
+        total = 0
+        while hint < 0 or total < hint:
+            line = self.readline()
+            if not line:
+                break
+            res.append(line)
+            total += len(line)
+        return res
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def readinto(self, buffer, n_bytes = -1, offset = 0):
+        """
+.. method:: readinto(buffer, n_bytes = -1, offset = 0)
+
+        Read up to *n_bytes* bytes (``len(buffer) - offset`` if *n_bytes* is -1) into the bytearray *buffer* starting at *offset*,
+        and return the number of bytes read, 0 at EOF.
+
+        Bytes are read by the filesystem driver straight into *buffer*: no memory is allocated, so a loop reading a file in chunks can reuse the same buffer. ::
+
+            buf = bytearray(512)
+            n = f.readinto(buf)
+            while n:
+                sock.sendall(buf[0:n])
+                n = f.readinto(buf)
+
+        """
+        if self.closed:
+            raise ValueError
+        self._drain()
+        res = __default_fs.__f_readinto(buffer, n_bytes, offset, self._n)
+        if res == -1:
+            raise OSError
         return res
 
     def __eof(self):
         if self.closed:
             raise ValueError
+        self._drain()
         return __default_fs.__f_eof(self._n)
@@ -11,6 +11,7 @@ The queue module implements multi-producer, multi-consumer queues. It is especia
    """
 
 import threading
+import timers
 
 new_exception(QueueFull,Exception,"Queue is full")
 new_exception(QueueEmpty,Exception,"Queue is empty")
@@ -21,21 +22,96 @@ class Queue():
 Queue class
 ==========
 
-.. class:: Queue(maxsize=0)
+.. class:: Queue(maxsize=0,name=None)
 
     Constructor for a FIFO queue.  *maxsize* is an integer that sets the upperbound
     limit on the number of items that can be placed in the queue.  Insertion will
     block once this size has been reached, until queue items are consumed.  If
     *maxsize* is less than or equal to zero, the queue size is infinite.
 
+    Items are stored in a ring preallocated with *maxsize* slots (or doubled when needed for infinite queues), therefore
+    insertion and removal take constant time regardless of the number of queued items.
+
+    *name* identifies the queue in the statistics returned by :func:`threading.stats`: its lock is reported as *name* and
+    its conditions as ``<name>:not_empty`` and ``<name>:not_full``.
+
     """
-    def __init__(self,maxsize=0):
+    def __init__(self,maxsize=0,name=None):
         self.maxsize=maxsize
-        self.mutex = threading.Lock()
-        self.not_empty = threading.Condition(self.mutex)
-        self.not_full = threading.Condition(self.mutex)
-        self.q=[]
-    
+        self.mutex = threading.Lock(name)
+        if name is None:
+            self.not_empty = threading.Condition(self.mutex)
+            self.not_full = threading.Condition(self.mutex)
+        else:
+            self.not_empty = threading.Condition(self.mutex,name+":not_empty")
+            self.not_full = threading.Condition(self.mutex,name+":not_full")
+        # preallocated ring of items: head is the index of the oldest one
+        if maxsize>0:
+            self.q=[None]*maxsize
+        else:
+            self.q=[None]*8
+        self.head=0
+        self.n=0
+
+    # the following helpers must be called with the mutex held
+
+    def _isfull(self):
+        return self.maxsize > 0 and self.n>=self.maxsize
+
+    def _put(self,obj):
+        size = len(self.q)
+        if self.n==size:
+            # unbounded queue: double the ring
+            q=[None]*(2*size)
+            j=self.head
+            for i in range(self.n):
+                q[i]=self.q[j]
+                j+=1
+                if j==size:
+                    j=0
+            self.q=q
+            self.head=0
+            size*=2
+        i = self.head+self.n
+        if i>=size:
+            i-=size
+        self.q[i]=obj
+        self.n+=1
+
+    def _get(self):
+        res = self.q[self.head]
+        self.q[self.head]=None
+        self.head+=1
+        if self.head==len(self.q):
+            self.head=0
+        self.n-=1
+        return res
+
+    def _first(self):
+        return self.q[self.head]
+
+    def _ready(self):
+        return self.n>0
+
+    def _wait_item(self,timeout):
+        # wait for an item with not_empty acquired; release it and raise on timeout
+        while self.n==0:
+            if not self.not_empty.wait(timeout):
+                self.not_empty.release()
+                raise QueueEmpty
+
+    def _wait_room(self,block,timeout,wake=False):
+        # wait for a free slot with not_full acquired; release it and raise on timeout
+        while self._isfull():
+            if wake:
+                # let consumers make room
+                self.not_empty.notify_all()
+            if block:
+                block = self.not_full.wait(timeout)
+            if not block:
+                self.not_full.release()
+                raise QueueFull
+
     def qsize(self):
         """
 .. method:: qsize()
@@ -46,7 +122,7 @@ Queue class
 
         """
         self.mutex.acquire()
-        res = len(self.q)
+        res = self.n
         self.mutex.release()
         return res
 
@@ -60,7 +136,7 @@ Queue class
     guarantee that a subsequent call to put() will not block.        
         """
         self.mutex.acquire()
-        res = self.maxsize > 0 and len(self.q)>=self.maxsize
+        res = self._isfull()
         self.mutex.release()
         return res
     
@@ -75,7 +151,7 @@ Queue class
 
         """
         self.mutex.acquire()
-        res = len(self.q)==0
+        res = self.n==0
         self.mutex.release()
         return res
     
@@ -88,15 +164,26 @@ Queue class
 
         """
         self.not_full.acquire()
-        while self.maxsize > 0 and len(self.q)>=self.maxsize:
-            if block:
-                block = self.not_full.wait(timeout)
-            if not block:
-                self.not_full.release()
-                raise QueueFull
-        self.q.append(obj)
+        self._wait_room(block,timeout)
+        self._put(obj)
         self.not_empty.notify()
         self.not_full.release()
+
+    def put_many(self,objs,block=True,timeout=-1):
+        """
+.. method:: put_many(objs,block=True,timeout=-1)
+
+    Insert all the items of the sequence *objs* into the queue, in order, acquiring the lock once for all the items that fit.
+    When the queue is full, the behaviour is the same of :meth:`put`: if *block* is False or the *timeout* expires, QueueFull is raised
+    and the items inserted so far are left in the queue.
+
+        """
+        self.not_full.acquire()
+        for obj in objs:
+            self._wait_room(block,timeout,True)
+            self._put(obj)
+        self.not_empty.notify_all()
+        self.not_full.release()
     
     def get(self,timeout=-1):
         """
@@ -108,28 +195,39 @@ Queue class
 
         """
         self.not_empty.acquire()
-        while len(self.q)==0:
-            block = self.not_empty.wait(timeout)
-            if not block:
-                self.not_empty.release()
-                raise QueueEmpty
-        res = self.q[0]
-        self.q=self.q[1:]
+        self._wait_item(timeout)
+        res = self._get()
         self.not_full.notify()
         self.not_empty.release()
         return res
 
-    def peek(self):
+    def get_many(self,max_items,timeout=-1):
         """
-.. method:: peek()
+.. method:: get_many(max_items,timeout=-1)
 
-    Return the object at the head of the queue without removing it. If the queue is empty, wait until an item is available.
+    Remove and return a list of at most *max_items* objects out of the queue, oldest first. If the queue is empty, block until at least an item is available or
+    *timeout* occurred (in this case QueueEmpty is raised); then return the items available without waiting for more.
 
         """
         self.not_empty.acquire()
-        while len(self.q)==0:
-            self.not_empty.wait()
-        res = self.q[0]
+        self._wait_item(timeout)
+        res = []
+        while len(res)<max_items and self._ready():
+            res.append(self._get())
+        self.not_full.notify_all()
+        self.not_empty.release()
+        return res
+
+    def peek(self,timeout=-1):
+        """
+.. method:: peek(timeout=-1)
+
+    Return the object at the head of the queue without removing it. If the queue is empty, wait until an item is available or *timeout* occurred (in this case QueueEmpty is raised).
+
+        """
+        self.not_empty.acquire()
+        self._wait_item(timeout)
+        res = self._first()
         self.not_empty.release()
         return res
 
@@ -141,6 +239,187 @@ Queue class
 
         """
         self.mutex.acquire()
-        self.q = []
-        self.not_full.notify()
+        while self.n:
+            self._get()
+        self.head=0
+        self.not_full.notify_all()
         self.mutex.release()
+
+
+class _HeapQueue(Queue):
+    # a Queue whose items are kept in a binary heap ordered by key, then by insertion order
+    def __init__(self,maxsize=0,name=None):
+        Queue.__init__(self,maxsize,name)
+        self.keys=[None]*len(self.q)
+        self.seqs=[None]*len(self.q)
+        self.seq=0
+
+    def _before(self,i,j):
+        ki = self.keys[i]
+        kj = self.keys[j]
+        return ki<kj or (ki==kj and self.seqs[i]<self.seqs[j])
+
+    def _swap(self,i,j):
+        q = self.q
+        x = q[i]
+        q[i] = q[j]
+        q[j] = x
+        q = self.keys
+        x = q[i]
+        q[i] = q[j]
+        q[j] = x
+        q = self.seqs
+        x = q[i]
+        q[i] = q[j]
+        q[j] = x
+
+    def _push(self,obj,key):
+        i = self.n
+        size = len(self.q)
+        if i==size:
+            q=[None]*(2*size)
+            keys=[None]*(2*size)
+            seqs=[None]*(2*size)
+            for j in range(size):
+                q[j]=self.q[j]
+                keys[j]=self.keys[j]
+                seqs[j]=self.seqs[j]
+            self.q=q
+            self.keys=keys
+            self.seqs=seqs
+        self.q[i]=obj
+        self.keys[i]=key
+        self.seqs[i]=self.seq
+        self.seq+=1
+        self.n+=1
+        # sift up
+        while i>0:
+            p = (i-1)//2
+            if not self._before(i,p):
+                break
+            self._swap(i,p)
+            i = p
+
+    def _get(self):
+        res = self.q[0]
+        self.n-=1
+        last = self.n
+        if last:
+            self._swap(0,last)
+        self.q[last]=None
+        # sift down
+        i = 0
+        while True:
+            c = 2*i+1
+            if c>=last:
+                break
+            if c+1<last and self._before(c+1,c):
+                c+=1
+            if not self._before(c,i):
+                break
+            self._swap(i,c)
+            i = c
+        return res
+
+    def _first(self):
+        return self.q[0]
+
+    def clear(self):
+        self.mutex.acquire()
+        for i in range(self.n):
+            self.q[i]=None
+        self.n=0
+        self.not_full.notify_all()
+        self.mutex.release()
+
+
+class PriorityQueue(_HeapQueue):
+    """
+===================
+PriorityQueue class
+===================
+
+.. class:: PriorityQueue(maxsize=0,name=None)
+
+    Constructor for a priority queue. Items are sequences (typically tuples) whose first element is the priority: the item with the lowest priority
+    is retrieved first, and items with the same priority are retrieved in insertion order. ::
+
+        q.put((10,telemetry))
+        q.put((0,alarm))    # retrieved before telemetry
+
+    Items are kept in a binary heap, so insertion and removal take logarithmic time. *maxsize*, *name* and the other methods behave as in :class:`Queue`.
+
+    """
+    def _put(self,obj):
+        self._push(obj,obj[0])
+
+
+class DelayQueue(_HeapQueue):
+    """
+================
+DelayQueue class
+================
+
+.. class:: DelayQueue(maxsize=0,name=None)
+
+    Constructor for a delay queue. Each item is inserted with a delay in milliseconds and can be retrieved only after the delay expired:
+    :meth:`get`, :meth:`get_many` and :meth:`peek` return the item with the earliest deadline, waiting for it if needed. Items with the same
+    deadline are retrieved in insertion order. Deadlines are measured with :func:`timers.now`.
+
+    Items are kept in a binary heap, so insertion and removal take logarithmic time. *maxsize*, *name* and the other methods behave as in :class:`Queue`.
+
+    """
+    def _put(self,obj):
+        self._push(obj,timers.now())
+
+    def _ready(self):
+        return self.n>0 and self.keys[0]<=timers.now()
+
+    def _wait_item(self,timeout):
+        # timeout>=0 is a bound (0: poll without waiting), -1 waits forever
+        if timeout>=0:
+            end = timers.now()+timeout
+        while True:
+            now = timers.now()
+            left = -1
+            if self.n:
+                left = self.keys[0]-now
+                if left<=0:
+                    return
+            if timeout>=0:
+                if end<=now:
+                    self.not_empty.release()
+                    raise QueueEmpty
+                if left<0 or end-now<left:
+                    left = end-now
+            # woken by a timeout or by a new, possibly earlier, item
+            self.not_empty.wait(left)
+
+    def put(self,obj,delay=0,block=True,timeout=-1):
+        """
+.. method:: put(obj,delay=0,block=True,timeout=-1)
+
+    Insert *obj* into the queue, making it available after *delay* milliseconds. *block* and *timeout* behave as in :meth:`Queue.put`.
+
+        """
+        self.not_full.acquire()
+        self._wait_room(block,timeout)
+        self._push(obj,timers.now()+delay)
+        # waiters may be sleeping until a later deadline
+        self.not_empty.notify_all()
+        self.not_full.release()
+
+    def put_many(self,objs,delay=0,block=True,timeout=-1):
+        """
+.. method:: put_many(objs,delay=0,block=True,timeout=-1)
+
+    Insert all the items of the sequence *objs* into the queue, making them available after *delay* milliseconds. *block* and *timeout* behave as in :meth:`Queue.put_many`.
+
+        """
+        self.not_full.acquire()
+        deadline = timers.now()+delay
+        for obj in objs:
+            self._wait_room(block,timeout,True)
+            self._push(obj,deadline)
+        self.not_empty.notify_all()
+        self.not_full.release()
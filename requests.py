@@ -15,10 +15,15 @@ import socket
 import streams
 import json as json_encoder
 import ssl
+import threading
+import timers
+import dnscache
 
 new_exception(HTTPError,Exception)
 new_exception(HTTPConnectionError,HTTPError)
 new_exception(HTTPResponseError,HTTPError)
+# a reused connection failed before any byte of the response: the request can be sent again
+new_exception(_StaleConnection,HTTPConnectionError)
 
 zverbs = ("GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH", "HEAD")
 
@@ -37,9 +42,9 @@ def get_pdata(data,json):
 
 
 
-def get(url,params=None,headers=None, connection=None,ctx=None,stream_callback=None,stream_chunk=512):
+def get(url,params=None,headers=None, connection=None,ctx=None,stream_callback=None,stream_chunk=512,stream=False):
     """
-.. function:: get(url,params=None,headers=None,connection=None,stream_callback=None,stream_chunk=512)    
+.. function:: get(url,params=None,headers=None,connection=None,stream_callback=None,stream_chunk=512,stream=False)    
 
     Implements the GET method of the HTTP protocol. A tcp connection is made to the host:port given in the url using the default net driver.
     
@@ -58,9 +63,11 @@ def get(url,params=None,headers=None, connection=None,ctx=None,stream_callback=N
 
     If the parameter *stream_callback* is given, the HTTP body data will be retrieved in chunk s of *stream_chunk* size and passed as arguments to *stream_callback* one by one. If *stream_callback* is used, the content of :class:`Response` instance is the last chunk.
 
+    If *stream* is True, the body is not read: it can be read afterwards, without keeping it whole in memory, with :meth:`Response.iter_content` or :meth:`Response.readinto`.
+
 
     """
-    return _verb(url,None,params,headers,connection,"GET",ctx, stream_callback,stream_chunk)
+    return _verb(url,None,params,headers,connection,"GET",ctx, stream_callback,stream_chunk,None,stream)
 
 
 def post(url,data=None,json=None,headers=None,ctx=None):
@@ -220,7 +227,7 @@ def upload(url,fd,ctx=None,mime_type="application/octet-stream",method="POST"):
 def _connect(host,port,scheme,ctx):
     try:
         #print("_connect",host,port,scheme)
-        ip = __default_net["sock"][0].gethostbyname(host)
+        ip = dnscache.gethostbyname(host)
         #print(ip)
         if port: # port
             port = int(port)
@@ -261,22 +268,125 @@ def _readline(ssock,buffer,ofs,size):
 
 BUFFER_LEN = 2048
 
-def add_to_buffer(buffer,what,pos):
-    l =len(what)
-    npos = pos+l
-    if l>0 and npos<BUFFER_LEN:
-        npos = pos+l
-        l=0
-        #TODO: use buffer[pos:npos]=what
-        while pos<npos:
-            buffer[pos]=__byte_get(what,l)
-            l+=1
-            pos+=1
-        return npos
-    return pos 
-
-
-def _verb(url,data=None,params=None,headers=None,connection=None,verb=None,ctx=None,stream_callback=None,stream_chunk=512,fd=None):
+
+class _RequestWriter():
+    # bytes are collected in a fixed size buffer that is sent when full; objects bigger than the buffer are sent directly
+    def __init__(self,sock,n):
+        self.data = bytearray(n)
+        self.size = n
+        self.pos = 0
+        self.sock = sock
+    def flush(self):
+        if self.pos:
+            __elements_set(self.data,self.pos)
+            self.sock.sendall(self.data)
+            __elements_set(self.data,self.size)
+            self.pos = 0
+    def extend(self,obj):
+        lb = len(obj)
+        npos = self.pos+lb
+        if npos<=self.size:
+            self.data[self.pos:npos]=obj
+            self.pos=npos
+            return
+        self.flush()
+        if lb>=self.size:
+            self.sock.sendall(obj)
+        else:
+            self.data[0:lb]=obj
+            self.pos=lb
+
+
+class _Body():
+    # reads a response body from a buffered socket stream; the body is delimited by its length, by chunks or by the connection close (length -1)
+    def __init__(self,ssock,length,chunked,headers):
+        self.ssock = ssock
+        # bytes left in the body or in the current chunk
+        self.left = length
+        self.chunked = chunked
+        self.headers = headers
+        self.done = not chunked and length==0
+        # the connection has been closed before the end of the body
+        self.broken = False
+        self.first = True
+        self.line = bytearray(32)
+
+    def _line(self):
+        # read a line keeping only its first bytes
+        line = self.ssock.readline("\n",self.line,32,0)
+        l = len(line)
+        if l==0:
+            raise HTTPResponseError
+        if line[l-1]!=__ORD("\n"):
+            tail = self.ssock.readline()
+            if len(tail)==0:
+                raise HTTPResponseError
+        return line
+
+    def _next_chunk(self):
+        if not self.first:
+            # end of the previous chunk data
+            self._line()
+        self.first = False
+        line = self._line()
+        # drop chunk extensions
+        i = line.find(__ORD(";"))
+        if i<0:
+            i = len(line)
+        try:
+            self.left = int(line[0:i].strip(" \t\r\n"),16)
+        except Exception as e:
+            raise HTTPResponseError
+        if not self.left:
+            # last chunk: trailer fields are added to the headers
+            while True:
+                tr = self.ssock.readline()
+                if len(tr)==0 or tr=="\r\n" or tr=="\n":
+                    break
+                idx = tr.find(__ORD(":"))
+                if idx>0:
+                    self.headers[str(tr[0:idx].lower())]=str(tr[idx+1:].strip(" \t\r\n"))
+            self.done = True
+
+    def readinto(self,buf,size,ofs):
+        while not self.done:
+            if self.chunked and not self.left:
+                self._next_chunk()
+                continue
+            if self.left>=0 and size>self.left:
+                size = self.left
+            n = self.ssock.readinto(buf,size,ofs)
+            if not n:
+                self.done = True
+                self.broken = self.chunked or self.left>0
+                return 0
+            if self.left>0:
+                self.left-=n
+                if not self.left and not self.chunked:
+                    self.done = True
+            return n
+        return 0
+
+
+class _ContentIterator():
+    def __init__(self,rr,size):
+        self.rr = rr
+        self.buf = bytearray(size)
+        self.size = size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        __elements_set(self.buf,self.size)
+        n = self.rr.readinto(self.buf)
+        if not n:
+            raise StopIteration
+        __elements_set(self.buf,n)
+        return self.buf
+
+
+def _verb(url,data=None,params=None,headers=None,connection=None,verb=None,ctx=None,stream_callback=None,stream_chunk=512,fd=None,stream=False,reused=False):
     urlp = urlparse.parse(url)
     netl = urlparse.parse_netloc(urlp[1])
     host = netl[2]
@@ -287,54 +397,33 @@ def _verb(url,data=None,params=None,headers=None,connection=None,verb=None,ctx=N
         sock = _connect(host,netl[3],urlp[0],ctx)
 
     # print("CREATED SOCKET",sock.channel)
-    #Generate and send Request Line
-    msg = bytearray(BUFFER_LEN)
-    p = 0
+    # the whole request is serialized in a single buffer: it is sent when full or at the end
+    req = _RequestWriter(sock,BUFFER_LEN)
     endline = "\r\n"
-    p = add_to_buffer(msg,verb,p)
-    p = add_to_buffer(msg," ",p)
-
+    #Generate Request Line
+    req.extend(verb)
+    req.extend(" ")
     if not urlp[2]:
-        p = add_to_buffer(msg,"/",p)
+        req.extend("/")
     else:
-        p = add_to_buffer(msg,urlp[2],p)
+        req.extend(urlp[2])
     if (verb in zverbs) and (urlp[-2] or params):
-        p = add_to_buffer(msg,"?",p)
+        req.extend("?")
         if urlp[-2]:
-            p = add_to_buffer(msg,urlp[-2],p)
+            req.extend(urlp[-2])
             if params:
-                p = add_to_buffer(msg,"&",p)
+                req.extend("&")
         if params:
-            p = add_to_buffer(msg,urlparse.urlencode(params),p)
-
-    if msg[p-1]!=__ORD(" "):
-        p = add_to_buffer(msg," ",p)
-    p = add_to_buffer(msg,"HTTP/1.1",p)
-    p = add_to_buffer(msg,endline,p)
-    __elements_set(msg,p) #clamp buffer
-    #send cmd
-    try:
-        # print(">>",msg)
-        sock.sendall(msg)
-    except Exception as e:
-        sock.close()
-        raise HTTPConnectionError
+            req.extend(urlparse.urlencode(params))
+    req.extend(" HTTP/1.1\r\n")
 
-    __elements_set(msg,BUFFER_LEN)
-    p = 0
-    #Generated and send Request headers
-    p = add_to_buffer(msg,"Host: ",p)
-    p = add_to_buffer(msg,host,p)
+    #Generate Request headers
+    req.extend("Host: ")
+    req.extend(host)
     if netl[3]:
-        p = add_to_buffer(msg,":",p)
-        p = add_to_buffer(msg,netl[3],p)
-            
-    p = add_to_buffer(msg,endline,p)
-    __elements_set(msg,p)
-    # print(">>",msg)
-    sock.sendall(msg)
-    __elements_set(msg,BUFFER_LEN)
-    p = 0
+        req.extend(":")
+        req.extend(netl[3])
+    req.extend(endline)
 
     rh = {}
     if headers:
@@ -351,163 +440,126 @@ def _verb(url,data=None,params=None,headers=None,connection=None,verb=None,ctx=N
     if fd is not None:
         rh["content-length"] = str(fd.size())
 
-
-
     for k,v in rh.items():
-        p = add_to_buffer(msg,k,p)
-        p = add_to_buffer(msg,": ",p)
-        p = add_to_buffer(msg,v,p)
-        p = add_to_buffer(msg,endline,p)
-        __elements_set(msg,p)
-        # print(">>",msg)
-        sock.sendall(msg)
-        __elements_set(msg,BUFFER_LEN)
-        p = 0
-
-    # Generate and send Body
-    p = add_to_buffer(msg,endline,p)
+        req.extend(k)
+        req.extend(": ")
+        req.extend(v)
+        req.extend(endline)
+    req.extend(endline)
 
-    if data is not None:
-        p = add_to_buffer(msg,data[0],p)
-    
-    __elements_set(msg,p)
-    # print(">>",msg)
-    sock.sendall(msg)
+    try:
+        # small bodies are sent together with the headers
+        if data is not None:
+            req.extend(data[0])
+        # stream body
+        if fd is not None:
+            while True:
+                rd = fd.read(512)
+                if len(rd)>0:
+                    req.extend(rd)
+                else:
+                    break
+        req.flush()
+    except Exception as e:
+        sock.close()
+        if reused:
+            raise _StaleConnection
+        raise HTTPConnectionError
+    msg = req.data
     __elements_set(msg,BUFFER_LEN)
-    # stream body
-    if fd is not None:
-        while True:
-            rd = fd.read(512)
-            if len(rd)>0:
-                sock.sendall(rd)
-            else:
-                break
-    p = 0
-
 
     #Parse Response
     rr = Response()
 
-    ssock = streams.SocketStream(sock)
-    buffer = msg
-    msg = _readline(ssock,buffer,0,BUFFER_LEN)
-    # print("<<",msg)
+    # status line, headers and chunk sizes are parsed out of a read-ahead buffer: body reads must go through ssock too
+    ssock = streams.SocketStream(sock).buffered(512)
+    if reused:
+        # wait for the first byte: only a failure here means the server closed the connection before processing the request
+        try:
+            first = ssock.peek(1)
+        except TimeoutError as e:
+            sock.close()
+            raise e
+        except IOError as e:
+            first = None
+        if not first:
+            sock.close()
+            raise _StaleConnection
+    rr.connection=sock
+    try:
+        buffer = msg
+        msg = _readline(ssock,buffer,0,BUFFER_LEN)
+        # print("<<",msg)
     
-    if msg.startswith("HTTP/1."):
-        rr.status = int(msg[9:12])
+        http11 = msg.startswith("HTTP/1.1")
+        if msg.startswith("HTTP/1."):
+            rr.status = int(msg[9:12])
 
-    __elements_set(msg,BUFFER_LEN)
-    msg = _readline(ssock,buffer,0,BUFFER_LEN)
-    # print("<<",msg)
-    #print(msg)
-
-    #print(">[",msg,"]",msg=="\n",msg==endline)
-    while not (msg==endline or msg=="\n"):
-        idx_cl = msg.find(__ORD(":"))
-        if idx_cl<0:
-            sock.close()
-            raise HTTPResponseError
-        rr.headers[str(msg[0:idx_cl].lower())]=str(msg[idx_cl+1:-2].strip(endline))
         __elements_set(msg,BUFFER_LEN)
         msg = _readline(ssock,buffer,0,BUFFER_LEN)
         # print("<<",msg)
-        # print(msg)
+        #print(msg)
+
         #print(">[",msg,"]",msg=="\n",msg==endline)
+        while not (msg==endline or msg=="\n"):
+            idx_cl = msg.find(__ORD(":"))
+            if idx_cl<0:
+                raise HTTPResponseError
+            rr.headers[str(msg[0:idx_cl].lower())]=str(msg[idx_cl+1:-2].strip(endline))
+            __elements_set(msg,BUFFER_LEN)
+            msg = _readline(ssock,buffer,0,BUFFER_LEN)
+            # print("<<",msg)
+            # print(msg)
+            #print(">[",msg,"]",msg=="\n",msg==endline)
    
-    #print(rr.headers)
-    rr.connection=sock
-
-    if verb != "HEAD":
-        # read response body
-        if "content-length" in rr.headers:
-            bodysize=int(rr.headers["content-length"])
-            #print("bodysize",bodysize)
-            contentsize = bodysize
-            reset_content = False
-            if stream_callback is not None:
-                reset_content = True
-                contentsize = stream_chunk
-
-            rr.content = bytearray(contentsize)
-            tmp = 0
+        #print(rr.headers)
+
+        # the body ends at a known position, so the connection can be reused afterwards
+        delimited = True
+        chunked = False
+        length = 0
+        if verb != "HEAD" and rr.status!=204 and rr.status!=304:
+            if "content-length" in rr.headers:
+                length = int(rr.headers["content-length"])
+            elif "chunked" in rr.headers.get("transfer-encoding","").lower():
+                chunked = True
+            else:
+                # body delimited by the connection close
+                delimited = False
+                length = -1
+
+        # handle connection close or keep-alive: HTTP/1.1 connections are persistent unless closed by either side
+        rconn = rr.headers.get("connection","").lower()
+        rr._keep = delimited and (rconn=="keep-alive" or (http11 and rconn!="close" and rh["connection"].lower()!="close"))
+        rr._body = _Body(ssock,length,chunked,rr.headers)
+
+        if stream:
+            if rr._body.done:
+                rr._finish()
+        elif stream_callback is not None:
+            # the content of the response is the last chunk
+            rr.content = bytearray(stream_chunk)
             rdr = 0
-            while bodysize>0:
-                if reset_content:
-                    ofs=0
-                else:
-                    ofs=tmp
-                rdr = sock.recv_into(rr.content,min(bodysize,contentsize),ofs=ofs)
-                if rdr and stream_callback:
-                    __elements_set(rr.content,rdr)
-                    stream_callback(rr.content)
-                #print(rdr,rr.content[tmp:tmp+rdr])
-                tmp+=rdr
-                bodysize-=rdr
-                if not rdr:
-                    break
-            #print("CLOSED SOCKET A",sock.channel,rdr,tmp,bodysize)
-        elif "transfer-encoding" in rr.headers:
-            if stream_callback:
-                chbuf = bytearray(stream_chunk)
-            last_term = False
             while True:
-                __elements_set(msg,BUFFER_LEN)
-                msg = _readline(ssock,buffer,0,BUFFER_LEN)
-                # print(">>",msg,len(msg),[hex(x) for x in msg])
-                if len(msg)==0:
-                    # print("breaking out of loop")
+                __elements_set(rr.content,stream_chunk)
+                n = rr.readinto(rr.content)
+                if not n:
+                    __elements_set(rr.content,rdr)
                     break
-                if msg=="\r\n":
-                    # print("received terminator",last_term)
-                    if last_term:
-                        break
-                    else:
-                        continue
-                chsize = int(msg,16)
-                # print("chsize",chsize)
-                if chsize:
-                    if stream_callback:
-                        while chsize>0:
-                            rdr = sock.recv_into(chbuf,min(chsize,stream_chunk),ofs=0)
-                            chsize-=rdr
-                            # print("rdr",rdr,chsize)
-                            __elements_set(chbuf,rdr)
-                            stream_callback(chbuf)
-                            __elements_set(chbuf,stream_chunk)
-                    else:
-                        chbuf = sock.recv(chsize)
-                        # print(msg)
-                        # if msg:
-                        rr.content.extend(chbuf)
-                        # else:
-                            # break
-                        # __elements_set(buffer,BUFFER_LEN)
-                        # msg = _readline(ssock,buffer,0,BUFFER_LEN)
-                else:
-                    last_term=True
-                # else:
-                #     print("Read terminator")
-                #     __elements_set(buffer,BUFFER_LEN)
-                #     msg = _readline(ssock,buffer,0,2) #terminator
-                    # break
-            #print("CLOSED SOCKET B",sock.channel)
+                rdr = n
+                __elements_set(rr.content,rdr)
+                stream_callback(rr.content)
         else:
-            while True:
-                tmp = sock.recv(32)
-                if tmp:
-                    rr.content.extend(tmp)
-                    #print(tmp)
-                else:
-                    break
-            #print("CLOSED SOCKET C",sock.channel)
-
-    # handle connection close or keep-alive
-    if "connection" in rr.headers and rr.headers["connection"] == "keep-alive":
-        rr.connection = sock
-    else:
-        sock.close()
-        rr.connection = None
-
+            rr._read_all()
+    except Exception as e:
+        # headers, body or stream_callback failed: the connection can't be reused and the caller never gets the response
+        if rr.connection is not None:
+            try:
+                rr.connection.close()
+            except Exception as e2:
+                pass
+            rr.connection = None
+        raise e
     return rr
 
 
@@ -535,12 +587,92 @@ class Response():
 
         the connection used to communicate with the server, or None if it has been closed.
 
+    When the request is made with *stream* set to True, only the status line and the headers are read and :attr:`content` is empty:
+    the body is read from the connection, a piece at a time, with :meth:`readinto` or :meth:`iter_content`. Chunked bodies are decoded
+    on the fly and their trailer fields are added to :attr:`headers` at the end. ::
+
+        rr = requests.get(url,stream=True)
+        for chunk in rr.iter_content(1024):
+            fw.write(chunk)
+
+    When the whole body has been read, the connection is closed or, if the server allows it, kept open for further requests. A body that is
+    not read until the end must be discarded with :meth:`close`.
+
     """
     def __init__(self):
         self.status = 0
         self.content = bytearray()
         self.headers = {}
         self.connection = None
+        self._body = None
+        self._keep = False
+        # (session,key) of the pool owning the connection
+        self._pool = None
+
+    def _finish(self):
+        body = self._body
+        self._body = None
+        if self.connection is not None and (body.broken or not (self._keep and body.done)):
+            self.connection.close()
+            self.connection = None
+        if self._pool is not None:
+            self._pool[0]._release(self._pool[1],self.connection)
+            self._pool = None
+
+    def _read_all(self):
+        if not self._body.chunked and self._body.left>0:
+            # known length: read in place
+            self.content = bytearray(self._body.left)
+            pos = 0
+            while self._body is not None:
+                pos+=self.readinto(self.content,-1,pos)
+            __elements_set(self.content,pos)
+        else:
+            buf = bytearray(512)
+            while self._body is not None:
+                n = self.readinto(buf,512)
+                if n:
+                    self.content.extend(buf[0:n])
+
+    def readinto(self,buf,size=-1,ofs=0):
+        """
+.. method:: readinto(buffer,size=-1,ofs=0)
+
+    Reads at most *size* bytes of the body (``len(buffer)-ofs`` if *size* is negative) into the bytearray *buffer* starting at offset *ofs*.
+    Returns the number of bytes read, 0 when the body is over.
+
+        """
+        if self._body is None:
+            return 0
+        if size<0:
+            size = len(buf)-ofs
+        if size<=0:
+            return 0
+        n = self._body.readinto(buf,size,ofs)
+        if self._body.done:
+            self._finish()
+        return n
+
+    def iter_content(self,chunk_size=512):
+        """
+.. method:: iter_content(chunk_size=512)
+
+    Returns an iterator over the body, in pieces of at most *chunk_size* bytes. All the pieces are returned in the same bytearray,
+    that is overwritten at each iteration.
+
+        """
+        return _ContentIterator(self,chunk_size)
+
+    def close(self):
+        """
+.. method:: close()
+
+    Discards the rest of the body, closing the connection if the body has not been read until the end.
+
+        """
+        if self._body is not None:
+            self._body.broken = True
+            self._finish()
     def text(self):
         """
 .. method:: text()
@@ -551,3 +683,205 @@ class Response():
     
     def json(self):
         return json_encoder.loads(self.content)
+
+
+class Session():
+    """
+.. class:: Session(max_connections=2,idle_timeout=30000,ctx=None)
+
+    A Session sends HTTP requests reusing connections: after a response, the connection is kept in a per host pool if the server allows it,
+    and the next request to the same scheme, host and port is sent on it, skipping the connection step and, for https, the TLS handshake.
+    Requests are sent with "Connection: keep-alive" unless a different value is given in *headers*.
+
+    At most *max_connections* connections are open at the same time, pooled or in use: when the limit is reached, the oldest pooled connection is closed
+    to make room, or the request waits for a connection in use to be released. Pooled connections unused for more than *idle_timeout* milliseconds are closed.
+    If a pooled connection turns out to be closed by the server (the request can't be sent or the connection is closed before any byte of the response),
+    the request is retried once on a new connection; any other error, including the ones raised by *stream_callback*, is raised without retrying.
+
+    *ctx* is the ssl context used for https connections. The dictionary :attr:`headers` contains headers sent with every request.
+
+    A Session can be shared by multiple threads. ::
+
+        s = requests.Session()
+        while True:
+            s.post("https://example.com/data",json=sample)
+            sleep(1000)
+
+    """
+    def __init__(self,max_connections=2,idle_timeout=30000,ctx=None):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.ctx = ctx
+        self.headers = {}
+        # pooled connections as [key,socket,last use], least recently used first
+        self._idle = []
+        self._busy = 0
+        self._cond = threading.Condition()
+
+    def _evict(self):
+        now = timers.now()
+        i = 0
+        while i<len(self._idle):
+            if now-self._idle[i][2]>=self.idle_timeout:
+                self._close(self._idle.pop(i)[1])
+            else:
+                i+=1
+
+    def _close(self,sock):
+        try:
+            sock.close()
+        except Exception as e:
+            pass
+
+    def _acquire(self,key):
+        # returns a pooled connection for key or None; in the latter case a slot for a new connection is reserved
+        self._cond.acquire()
+        self._evict()
+        while True:
+            for i in range(len(self._idle)-1,-1,-1):
+                if self._idle[i][0]==key:
+                    sock = self._idle.pop(i)[1]
+                    self._busy+=1
+                    self._cond.release()
+                    return sock
+            if self._busy+len(self._idle)<self.max_connections:
+                break
+            if self._idle:
+                # make room closing the least recently used connection to another host
+                self._close(self._idle.pop(0)[1])
+                break
+            self._cond.wait()
+        self._busy+=1
+        self._cond.release()
+        return None
+
+    def _release(self,key,sock):
+        self._cond.acquire()
+        self._busy-=1
+        if sock is not None:
+            self._idle.append([key,sock,timers.now()])
+        self._cond.notify()
+        self._cond.release()
+
+    def request(self,method,url,data=None,json=None,params=None,headers=None,stream_callback=None,stream_chunk=512,stream=False):
+        """
+.. method:: request(method,url,data=None,json=None,params=None,headers=None,stream_callback=None,stream_chunk=512,stream=False)
+
+    Send a request with HTTP *method* to *url* and return a :class:`Response` instance. The other parameters have the same meaning as in the module functions (:func:`get`, :func:`post`, ...).
+
+    The connection of the returned response is managed by the session and must not be closed by the caller. With *stream* set to True, the connection
+    goes back to the pool when the body has been read until the end or discarded with :meth:`Response.close`.
+
+        """
+        rh = {}
+        for k in self.headers:
+            rh[k.lower()]=self.headers[k]
+        if headers:
+            for k in headers:
+                rh[k.lower()]=headers[k]
+        if "connection" not in rh:
+            rh["connection"]="keep-alive"
+        pdata = get_pdata(data,json)
+        urlp = urlparse.parse(url)
+        key = urlp[0]+"://"+urlp[1]
+        sock = self._acquire(key)
+        try:
+            if sock is not None:
+                try:
+                    rr = _verb(url,pdata,params,rh,sock,method,self.ctx,stream_callback,stream_chunk,None,stream,True)
+                    return self._returned(key,rr)
+                except _StaleConnection as e:
+                    # closed by the server while pooled, before any response byte: retry on a new connection
+                    self._close(sock)
+                except Exception as e:
+                    self._close(sock)
+                    raise e
+            rr = _verb(url,pdata,params,rh,None,method,self.ctx,stream_callback,stream_chunk,None,stream)
+        except Exception as e:
+            self._release(key,None)
+            raise e
+        return self._returned(key,rr)
+
+    def _returned(self,key,rr):
+        if rr._body is not None:
+            # body still to be read: the response releases the connection when done
+            rr._pool = (self,key)
+        else:
+            self._release(key,rr.connection)
+        return rr
+
+    def get(self,url,params=None,headers=None,stream_callback=None,stream_chunk=512,stream=False):
+        """
+.. method:: get(url,params=None,headers=None,stream_callback=None,stream_chunk=512,stream=False)
+
+    Same as :func:`get`, on a pooled connection.
+
+        """
+        return self.request("GET",url,None,None,params,headers,stream_callback,stream_chunk,stream)
+
+    def post(self,url,data=None,json=None,headers=None):
+        """
+.. method:: post(url,data=None,json=None,headers=None)
+
+    Same as :func:`post`, on a pooled connection.
+
+        """
+        return self.request("POST",url,data,json,None,headers)
+
+    def put(self,url,data=None,json=None,headers=None):
+        """
+.. method:: put(url,data=None,json=None,headers=None)
+
+    Same as :func:`put`, on a pooled connection.
+
+        """
+        return self.request("PUT",url,data,json,None,headers)
+
+    def patch(self,url,data=None,json=None,headers=None):
+        """
+.. method:: patch(url,data=None,json=None,headers=None)
+
+    Same as :func:`patch`, on a pooled connection.
+
+        """
+        return self.request("PATCH",url,data,json,None,headers)
+
+    def delete(self,url,headers=None):
+        """
+.. method:: delete(url,headers=None)
+
+    Same as :func:`delete`, on a pooled connection.
+
+        """
+        return self.request("DELETE",url,None,None,None,headers)
+
+    def head(self,url,headers=None):
+        """
+.. method:: head(url,headers=None)
+
+    Same as :func:`head`, on a pooled connection.
+
+        """
+        return self.request("HEAD",url,None,None,None,headers)
+
+    def options(self,url,headers=None):
+        """
+.. method:: options(url,headers=None)
+
+    Same as :func:`options`, on a pooled connection.
+
+        """
+        return self.request("OPTIONS",url,None,None,None,headers)
+
+    def close(self):
+        """
+.. method:: close()
+
+    Close all the pooled connections. The session can still be used afterwards.
+
+        """
+        self._cond.acquire()
+        for c in self._idle:
+            self._close(c[1])
+        self._idle = []
+        self._cond.release()
@@ -0,0 +1,239 @@
+"""
+.. module:: selectors
+
+*********
+Selectors
+*********
+
+This module allows to multiplex many sockets from a single thread, waiting until one or more of them are ready for I/O.
+The API is inspired by the Python module `selectors <https://docs.python.org/3/library/selectors.html>`_.
+
+Sockets are registered once in a :class:`DefaultSelector`, together with the events to wait for and an optional piece of data (e.g. the state of a client).
+The selector keeps the registered file descriptors in a prebuilt map: each call to :meth:`~DefaultSelector.select` passes the prebuilt lists to the net driver
+and maps ready descriptors back to their registration with a dictionary lookup, instead of rebuilding the lists and scanning them at every call. ::
+
+    import socket
+    import selectors
+
+    sel = selectors.DefaultSelector()
+    server = socket.socket()
+    server.bind(80)
+    server.listen()
+    sel.register(server,selectors.EVENT_READ)
+
+    while True:
+        for key, events in sel.select():
+            if key.fileobj is server:
+                client, addr = server.accept()
+                sel.register(client,selectors.EVENT_READ,bytearray(64))
+            else:
+                # read what is there; without partial reads only one byte is surely available
+                flags = key.fileobj.partial_recv()
+                n = key.fileobj.recv_into(key.data,64 if flags else 1,flags)
+                if n:
+                    key.fileobj.sendall(key.data[0:n])
+                else:
+                    sel.unregister(key.fileobj)
+                    key.fileobj.close()
+
+The following constants are defined:
+
+    * ``EVENT_READ`` = 1: the socket is ready for reading (for listening sockets: a connection can be accepted)
+    * ``EVENT_WRITE`` = 2: the socket is ready for writing
+
+    """
+
+EVENT_READ = 1
+EVENT_WRITE = 2
+
+
+def _fileno(fileobj):
+    if type(fileobj)==PSMALLINT:
+        fd = fileobj
+    else:
+        fd = fileobj.fileno()
+    if fd<0:
+        raise ValueError
+    return fd
+
+
+class SelectorKey():
+    """
+=================
+SelectorKey class
+=================
+
+.. class:: SelectorKey(fileobj,fd,events,data)
+
+    The registration of a file object in a selector, returned by :meth:`DefaultSelector.register` and :meth:`DefaultSelector.select`.
+    It has the following attributes:
+
+        * *fileobj*: the registered socket (or file descriptor)
+        * *fd*: its file descriptor
+        * *events*: the events waited for, a combination of ``EVENT_READ`` and ``EVENT_WRITE``
+        * *data*: the data given at registration
+
+    """
+    def __init__(self,fileobj,fd,events,data):
+        self.fileobj = fileobj
+        self.fd = fd
+        self.events = events
+        self.data = data
+
+
+class DefaultSelector():
+    """
+=====================
+DefaultSelector class
+=====================
+
+.. class:: DefaultSelector(netdrv=None)
+
+    Creates a selector on top of the *select* function of the net driver *netdrv*. If *netdrv* is not given, the driver of the default sockets is used.
+
+    A selector should be used by a single thread.
+
+    """
+    def __init__(self,netdrv=None):
+        self.netdrv = netdrv
+        # fd -> SelectorKey
+        self._map = {}
+        # prebuilt descriptor lists passed to the driver
+        self._rfds = []
+        self._wfds = []
+
+    def _add(self,key):
+        if key.events&EVENT_READ:
+            self._rfds.append(key.fd)
+        if key.events&EVENT_WRITE:
+            self._wfds.append(key.fd)
+
+    def _remove(self,key):
+        if key.events&EVENT_READ:
+            self._rfds.remove(key.fd)
+        if key.events&EVENT_WRITE:
+            self._wfds.remove(key.fd)
+
+    def register(self,fileobj,events,data=None):
+        """
+.. method:: register(fileobj,events,data=None)
+
+    Registers *fileobj* (a socket or a file descriptor) waiting for *events*, a combination of ``EVENT_READ`` and ``EVENT_WRITE``. *data* is stored in the returned :class:`SelectorKey`.
+
+    Raises ``ValueError`` if *events* is not valid and ``KeyError`` if *fileobj* is already registered.
+
+        """
+        if not events or events&~(EVENT_READ|EVENT_WRITE):
+            raise ValueError
+        fd = _fileno(fileobj)
+        if fd in self._map:
+            raise KeyError
+        key = SelectorKey(fileobj,fd,events,data)
+        self._map[fd] = key
+        self._add(key)
+        return key
+
+    def unregister(self,fileobj):
+        """
+.. method:: unregister(fileobj)
+
+    Unregisters *fileobj* and returns its :class:`SelectorKey`. A socket must be unregistered before being closed.
+
+    Raises ``KeyError`` if *fileobj* is not registered.
+
+        """
+        fd = _fileno(fileobj)
+        if fd not in self._map:
+            raise KeyError
+        key = self._map.pop(fd)
+        self._remove(key)
+        return key
+
+    def modify(self,fileobj,events,data=None):
+        """
+.. method:: modify(fileobj,events,data=None)
+
+    Changes the *events* waited for by the registered *fileobj* and its *data*. Returns the :class:`SelectorKey`.
+
+    Raises ``ValueError`` if *events* is not valid and ``KeyError`` if *fileobj* is not registered.
+
+        """
+        if not events or events&~(EVENT_READ|EVENT_WRITE):
+            raise ValueError
+        fd = _fileno(fileobj)
+        if fd not in self._map:
+            raise KeyError
+        key = self._map[fd]
+        if events!=key.events:
+            self._remove(key)
+            key.events = events
+            self._add(key)
+        key.data = data
+        return key
+
+    def get_key(self,fileobj):
+        """
+.. method:: get_key(fileobj)
+
+    Returns the :class:`SelectorKey` of *fileobj*. Raises ``KeyError`` if *fileobj* is not registered.
+
+        """
+        return self._map[_fileno(fileobj)]
+
+    def get_map(self):
+        """
+.. method:: get_map()
+
+    Returns the dictionary mapping file descriptors to their :class:`SelectorKey`. It must not be modified.
+
+        """
+        return self._map
+
+    def select(self,timeout=None):
+        """
+.. method:: select(timeout=None)
+
+    Waits until some of the registered file objects are ready, or *timeout* milliseconds elapse. If *timeout* is None, it blocks until
+    at least a file object is ready; if *timeout* is zero, it polls without blocking.
+
+    Returns a list of tuples *(key, events)*, one for each ready file object: *key* is its :class:`SelectorKey` (with the file object in *key.fileobj*)
+    and *events* are the ready events among the ones waited for. The list is empty when the timeout expires.
+
+        """
+        if not self._map:
+            if timeout:
+                sleep(timeout)
+            return []
+        if self.netdrv is None:
+            self.netdrv = __default_net["sock"][0]
+        rl,wl,xl = self.netdrv.select(self._rfds,self._wfds,[],timeout)
+        res = []
+        for fd in rl:
+            key = self._map.get(fd)
+            if key is not None:
+                res.append((key,EVENT_READ))
+        if wl:
+            # sockets both readable and writable are reported once
+            ready = {}
+            for i in range(len(res)):
+                ready[res[i][0].fd] = i
+            for fd in wl:
+                key = self._map.get(fd)
+                if key is not None:
+                    i = ready.get(fd)
+                    if i is None:
+                        res.append((key,EVENT_WRITE))
+                    else:
+                        res[i] = (key,EVENT_READ|EVENT_WRITE)
+        return res
+
+    def close(self):
+        """
+.. method:: close()
+
+    Unregisters all the file objects. The sockets are not closed.
+
+        """
+        self._map = {}
+        self._rfds = []
+        self._wfds = []
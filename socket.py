@@ -47,6 +47,10 @@ TCP_KEEPCNT=0x05
 IPPROTO_TCP=6
 IPPROTO_UDP=17
 
+# recv flag: return as soon as some bytes are received instead of waiting for bufsize bytes.
+# Net drivers honoring it (the ones built on the zsockets natives) advertise it by defining MSG_PARTIAL in their module, see socket.partial_recv
+MSG_PARTIAL=0x8000
+
 
 # def _address_to_address(address):
 #     if type(address)==PSTRING:
@@ -123,6 +127,21 @@ The socket class
             self.channel = fileno
             self.type = type
 
+    def partial_recv(self):
+        """
+.. method:: partial_recv()
+
+        Return ``MSG_PARTIAL`` if the net driver of the socket honors it, 0 otherwise. Drivers not honoring the flag ignore it, and :meth:`recv_into` blocks until *bufsize* bytes are received.
+        The result can be passed as *flags* to :meth:`recv_into`: ::
+
+            flags = sock.partial_recv()
+            n = sock.recv_into(buf,len(buf) if flags else 1,flags)
+
+        """
+        if hasattr(self.netdrv,"MSG_PARTIAL"):
+            return MSG_PARTIAL
+        return 0
+
     def fileno(self):
         """
 .. method:: fileno()
@@ -172,6 +191,7 @@ The socket class
 .. method:: recv_into(buffer,bufsize=-1,flags=0)
 
         Reads at most *bufsize* bytes from the underlying socket into *buffer*. It blocks until *bufsize* bytes are received or an error occurs.
+        If *flags* contains ``MSG_PARTIAL`` and the net driver supports it (see :meth:`partial_recv`), it returns as soon as some bytes are received.
 
         Returns the number of received bytes.
         """
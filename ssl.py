@@ -320,12 +320,27 @@ The sslsocket class
         ch = __default_net["ssl"].secure_socket(family, type, proto, ctx)
         socket.socket.__init__(self, family, type, proto, ch)
 
+    def handshake_info(self):
+        """
+.. method:: handshake_info()
+
+        Returns a tuple *(time, resumed)* describing the TLS handshake performed by :meth:`connect`: *time* is the duration of the handshake in milliseconds
+        and *resumed* is True if the server accepted to resume a cached session (see :samp:`ssl.SESSION_RESUME`), skipping the key exchange and the certificate verification.
+
+        Raises :samp:`UnsupportedError` if the net driver does not provide this information.
+        """
+        drv = __default_net["ssl"]
+        if not hasattr(drv,"secure_socket_info"):
+            raise UnsupportedError
+        return drv.secure_socket_info(self.channel)
+
 
 CERT_NONE = 1
 CERT_OPTIONAL = 2
 CERT_REQUIRED = 4
 CLIENT_AUTH = 8
 SERVER_AUTH = 16
+SESSION_RESUME = 32
 
 
 def create_ssl_context(cacert="",clicert="",pkey="",hostname="",options=17):
@@ -354,6 +369,11 @@ def create_ssl_context(cacert="",clicert="",pkey="",hostname="",options=17):
             * :samp:`ssl.CERT_REQUIRED`: certificate verification is mandatory. If verification fails, :samp:`ConnectionAborted` is raised during TLS handshake.
             * :samp:`ssl.SERVER_AUTH`: indicates that the context may be used to authenticate servers therefore, it will be used to create client-side sockets (default).
             * :samp:`ssl.CLIENT_AUTH`: indicates that the context may be used to authenticate clients therefore, it will be used to create server-side sockets.
+            * :samp:`ssl.SESSION_RESUME`: client-side sockets save the negotiated TLS session (session id and, if the TLS stack supports them, session tickets) and offer it again to the same server at the next connection.
+              If the server accepts it, the abbreviated handshake skips the key exchange and the certificate verification, saving seconds of computation and several KB of heap.
+              Sessions are cached by server address, up to ``ZERYNTH_SSL_SESSION_CACHE`` servers (2 by default). Use :meth:`sslsocket.handshake_info` to check if a session has been resumed. ::
+
+                ctx = ssl.create_ssl_context(cacert=cacert,options=ssl.CERT_REQUIRED|ssl.SERVER_AUTH|ssl.SESSION_RESUME)
 
     Returns a tuple to be passed as parameter during secure socket creation.
 
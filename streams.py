@@ -21,6 +21,7 @@ Every stream instance implements the following methods:
     * :class:`streams.SocketStream`
     * :class:`streams.FileStream`
     * :class:`streams.ResourceStream`
+    * :class:`streams.BufferedStream`
 """
 
 
@@ -123,6 +124,19 @@ The stream class
                     __elements_set(line,pos)
                     return line
 
+    def _readsome(self,buf,size,ofs=0):
+        # read at least one byte and at most size, without waiting for more bytes than needed
+        return self._readbuf(buf,size,ofs)
+
+    def buffered(self,size=256):
+        """
+.. method:: buffered(size=256)
+
+        Returns a :class:`BufferedStream` reading from this stream with a read-ahead buffer of *size* bytes.
+        Once the buffered stream is created, reads should be performed only through it.
+        """
+        return BufferedStream(self,size)
+
 PARITY_NONE = 0
 PARITY_EVEN = 1
 
@@ -190,6 +204,9 @@ The serial class
         """
         return self.channel.__ctl__(DRV_CMD_AVAILABLE,self.hidx)
 
+    def _readsome(self,buf,size,ofs=0):
+        return self._readbuf(buf,max(1,min(size,self.available())),ofs)
+
     def close(self):
         """
 .. method:: close()        
@@ -211,14 +228,27 @@ The SocketStream class
         This class implements a stream that has a socket as a source of data.
         It inhertis all of its methods from :class:`stream`.
 
+        For line oriented protocols, use :meth:`~stream.buffered` to read through a :class:`BufferedStream`: ::
+
+            ss = streams.SocketStream(sock).buffered()
+            line = ss.readline()
+
     """
     def __init__(self,sock):
         stream.__init__(self)
         self.socket = sock
+        # recv flag for partial reads, 0 if the net driver does not support them
+        self._partial = sock.partial_recv() if hasattr(sock,"partial_recv") else 0
 
     def _readbuf(self,buf,size=1,ofs=0):
         return self.socket.recv_into(buf,size,0,ofs)
 
+    def _readsome(self,buf,size,ofs=0):
+        if self._partial:
+            return self.socket.recv_into(buf,size,self._partial,ofs)
+        # the driver would wait for size bytes: read one byte at a time, never blocking on bytes that are not coming
+        return self.socket.recv_into(buf,1,0,ofs)
+
     def write(self,buf):
         """
 .. method:: write(buffer)        
@@ -333,3 +363,214 @@ The ResourceStream class
     def write(self,buf):
         raise UnsupportedError
 
+
+
+class BufferedStream(stream):
+    """
+========================
+The BufferedStream class
+========================
+
+.. class:: BufferedStream(raw,size=256)
+
+        This class implements a stream that reads from the stream *raw* through a read-ahead buffer of *size* bytes.
+        It inherits all of its methods from :class:`stream`, writes are passed to *raw*.
+
+        Every time the buffer is empty, a single read on *raw* fetches all the bytes available, up to *size*: lines and
+        delimited tokens are then searched in memory, instead of reading *raw* one byte at a time. Reads bigger than the buffer bypass it.
+
+        A BufferedStream is usually obtained with :meth:`stream.buffered`.
+    """
+    def __init__(self,raw,size=256):
+        stream.__init__(self)
+        self.raw = raw
+        self.buf = bytearray(size)
+        self.size = size
+        self.pos = 0
+        # the elements of buf are always the valid bytes
+        __elements_set(self.buf,0)
+
+    def _fill(self):
+        # append bytes to the buffer with a single read on raw; returns the number of bytes read
+        end = len(self.buf)
+        if self.pos==end:
+            self.pos = 0
+            end = 0
+        elif self.pos and end==self.size:
+            n = end-self.pos
+            self.buf[0:n] = self.buf[self.pos:end]
+            self.pos = 0
+            end = n
+        __elements_set(self.buf,self.size)
+        try:
+            n = self.raw._readsome(self.buf,self.size-end,end)
+        except Exception as e:
+            __elements_set(self.buf,end)
+            raise e
+        if n<0:
+            __elements_set(self.buf,end)
+            raise IOError
+        __elements_set(self.buf,end+n)
+        return n
+
+    def _take(self,n):
+        # remove n buffered bytes
+        res = self.buf[self.pos:self.pos+n]
+        self.pos+=n
+        return res
+
+    def _readbuf(self,buf,size=1,ofs=0):
+        avail = len(self.buf)-self.pos
+        if not avail:
+            if size>=self.size:
+                return self.raw._readsome(buf,size,ofs)
+            if self._fill()<=0:
+                return 0
+            avail = len(self.buf)-self.pos
+        n = min(size,avail)
+        buf[ofs:ofs+n] = self.buf[self.pos:self.pos+n]
+        self.pos+=n
+        return n
+
+    def _readsome(self,buf,size,ofs=0):
+        return self._readbuf(buf,size,ofs)
+
+    def readinto(self,buf,size=-1,ofs=0):
+        """
+.. method:: readinto(buffer,size=-1,ofs=0)
+
+        Reads at most *size* bytes (``len(buffer)-ofs`` if *size* is negative) into the bytearray *buffer* starting at offset *ofs*.
+        It blocks until at least a byte is available.
+
+        Returns the number of bytes read, 0 if the underlying stream is disconnected.
+        """
+        if size<0:
+            size = len(buf)-ofs
+        if size<=0:
+            return 0
+        return self._readbuf(buf,size,ofs)
+
+    def peek(self,size=1):
+        """
+.. method:: peek(size=1)
+
+        Returns a bytearray with the next *size* bytes of the stream, without removing them. It blocks until *size* bytes are available; 
+        less bytes are returned if the underlying stream is disconnected. *size* can't be greater than the buffer size.
+        """
+        if size>self.size:
+            raise ValueError
+        while len(self.buf)-self.pos<size:
+            if self.pos and self.pos+size>self.size:
+                # make room at the end
+                n = len(self.buf)-self.pos
+                self.buf[0:n] = self.buf[self.pos:self.pos+n]
+                self.pos = 0
+                __elements_set(self.buf,n)
+            if self._fill()<=0:
+                break
+        return self.buf[self.pos:min(self.pos+size,len(self.buf))]
+
+    def readline(self,sep="\n",buffer=None,size=0,ofs=0):
+        """
+.. method:: readline(sep="\\\\n",buffer=None,size=0,ofs=0)
+
+        Same as :meth:`stream.readline`, but the line is searched in the read-ahead buffer.
+        """
+        if buffer is None:
+            line = bytearray()
+            lb = -1
+            pos = 0
+        else:
+            line = buffer
+            __elements_set(buffer,size)
+            lb = size
+            pos = ofs
+        sep = ord(sep)
+        while True:
+            if self.pos==len(self.buf) and self._fill()<=0:
+                break
+            i = self.buf.find(sep,self.pos)
+            if i<0:
+                n = len(self.buf)-self.pos
+            else:
+                n = i+1-self.pos
+            if lb>=0 and pos+n>lb:
+                n = lb-pos
+                i = -1
+            if buffer is None:
+                line.extend(self._take(n))
+            else:
+                line[pos:pos+n] = self.buf[self.pos:self.pos+n]
+                self.pos+=n
+            pos+=n
+            if i>=0 or pos==lb:
+                break
+        if buffer is not None:
+            __elements_set(line,pos)
+        return line
+
+    def read_until(self,sep):
+        """
+.. method:: read_until(sep)
+
+        Reads bytes from the stream until the byte sequence *sep* is encountered and returns them as a bytearray, with *sep* included.
+        The length of *sep* can't be greater than the buffer size.
+
+        If the underlying stream is disconnected before *sep* is found, the bytes read so far are returned.
+        """
+        ls = len(sep)
+        if not ls or ls>self.size:
+            raise ValueError
+        first = __byte_get(sep,0)
+        res = bytearray()
+        while True:
+            end = len(self.buf)
+            if self.pos==end:
+                if self._fill()<=0:
+                    return res
+                continue
+            i = self.buf.find(first,self.pos)
+            if i<0:
+                res.extend(self._take(end-self.pos))
+                continue
+            if i+ls>end:
+                # candidate not complete: keep it buffered and read more
+                res.extend(self._take(i-self.pos))
+                if self.pos+ls>self.size:
+                    n = end-self.pos
+                    self.buf[0:n] = self.buf[self.pos:end]
+                    self.pos = 0
+                    __elements_set(self.buf,n)
+                if self._fill()<=0:
+                    res.extend(self._take(len(self.buf)-self.pos))
+                    return res
+                continue
+            j = 1
+            while j<ls and __byte_get(self.buf,i+j)==__byte_get(sep,j):
+                j+=1
+            if j==ls:
+                res.extend(self._take(i+ls-self.pos))
+                return res
+            res.extend(self._take(i+1-self.pos))
+
+    def available(self):
+        """
+.. method:: available()
+
+        Returns the number of buffered bytes, plus the bytes available in the underlying stream if it supports :meth:`available`.
+        """
+        n = len(self.buf)-self.pos
+        if hasattr(self.raw,"available"):
+            n+=self.raw.available()
+        return n
+
+    def write(self,buf):
+        return self.raw.write(buf)
+
+    def close(self):
+        """
+.. method:: close()
+
+        Closes the underlying stream.
+        """
+        self.raw.close()
@@ -16,6 +16,8 @@ such primitives to make them easy to use:
     * :class:`Event`
     * :class:`Condition`
 
+The operations on the native primitives can be traced for profiling, see :func:`trace_drain`, and contention statistics can be collected, see :func:`instrument`.
+
     """
 
 
@@ -34,12 +36,206 @@ __define(RTOS__EVT_CLEAR,11)
 __define(RTOS__EVT_WAIT,12)
 __define(RTOS__EVT_GETFLAG,13)
 __define(RTOS__SEM_SIGNALCAP,14)
+__define(RTOS__TRACE_DRAIN,15)
+
+import timers
 
 @native_c("__rtos_do",["csrc/threading/*"])
 def __rtos_do(code,*args):
     pass
 
 
+TRACE_SEM = 1<<21
+TRACE_WAIT = 1<<22
+TRACE_EVT = 1<<23
+
+TRACE_OPS = ("sem_create","sem_signal","sem_wait","sem_reset","sem_trylock","sem_signal_wait","sem_signal_if_waiting","sem_signal_all","","evt_create","evt_set","evt_clear","evt_wait","","sem_signalcap")
+
+def trace_drain():
+    """
+.. function:: trace_drain()
+
+    Returns the operations on the native semaphores and events recorded since the last call, as a tuple *(records, lost)*.
+
+    Recording is enabled per category by the VM trace mask, combining the following constants with :func:`vm.set_tracemask`:
+
+        * ``TRACE_SEM``: creation, signaling and reset of semaphores (used by :class:`Lock`, :class:`Semaphore`, :class:`Condition`, :class:`Thread`)
+        * ``TRACE_WAIT``: waits on semaphores and events, with their duration
+        * ``TRACE_EVT``: creation, set and clear of events (used by :class:`Event`)
+
+    When no category is enabled, the primitives only pay for a test of the mask.
+
+    *records* is a tuple of records *(time, op, obj, thread, value, waited)*, oldest first:
+
+        * *time*: milliseconds since the start of the program
+        * *op*: the operation, whose name is ``TRACE_OPS[op]``
+        * *obj*: the address of the native primitive, the same for all the operations on it
+        * *thread*: the identifier of the calling thread
+        * *value*: for waits, the result (zero if successful); for the others, the initial value, the number of woken threads or the cap
+        * *waited*: for waits, the milliseconds spent waiting (at most 65535)
+
+    Records are kept in a ring buffer in RAM (32 records by default, configurable with the ``ZERYNTH_THREADING_TRACE`` C macro): when it is full, the oldest records are overwritten and
+    *lost* counts them. ::
+
+        import vm
+        import threading
+
+        vm.set_tracemask(threading.TRACE_WAIT)
+        # ... run the program for a while
+        recs, lost = threading.trace_drain()
+        for t, op, obj, th, value, waited in recs:
+            if waited:
+                print(t,threading.TRACE_OPS[op],hex(obj),th,waited)
+
+    Raises ``UnsupportedError`` if tracing has been disabled at compile time.
+
+    """
+    return __rtos_do(RTOS__TRACE_DRAIN)
+
+
+# statistics of the instrumented primitives, None when instrumentation is disabled.
+# At most _max_instrumented are listed: a dropped one keeps counting in its primitive, unreported
+_instrumented = None
+_max_instrumented = 32
+_ninstrumented = 0
+
+class _Stats():
+    def __init__(self,kind,name):
+        global _ninstrumented
+        _ninstrumented+=1
+        if name is None:
+            name = kind+"-"+str(_ninstrumented)
+        self.kind = kind
+        self.name = name
+        self.owner = -1
+        self.reset()
+
+    def reset(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.failures = 0
+        self.wait_total = 0
+        self.wait_max = 0
+
+    def acquire(self,sem,blocking,timeout):
+        # try without blocking first, to tell contended acquisitions apart
+        if __rtos_do(RTOS__SEM_TRYLOCK,sem)>=0:
+            waited = -1
+        elif not blocking:
+            self.failures+=1
+            return False
+        else:
+            t = timers.now()
+            if __rtos_do(RTOS__SEM_WAIT,sem,timeout)<0:
+                self.failures+=1
+                return False
+            waited = timers.now()-t
+        # counters are updated holding the semaphore
+        self.acquisitions+=1
+        if waited>=0:
+            self.contended+=1
+            self.wait_total+=waited
+            if waited>self.wait_max:
+                self.wait_max = waited
+        self.owner = __rtos_do(RTOS__THD_CURRENT)
+        return True
+
+    def wait_event(self,evt,timeout):
+        if __rtos_do(RTOS__EVT_GETFLAG,evt):
+            self.acquisitions+=1
+            return True
+        t = timers.now()
+        ret = __rtos_do(RTOS__EVT_WAIT,evt,timeout)
+        waited = timers.now()-t
+        if ret:
+            self.acquisitions+=1
+        else:
+            self.failures+=1
+        self.contended+=1
+        self.wait_total+=waited
+        if waited>self.wait_max:
+            self.wait_max = waited
+        self.owner = __rtos_do(RTOS__THD_CURRENT)
+        return ret
+
+def _new_stats(kind,name):
+    if _instrumented is None:
+        return None
+    if len(_instrumented)>=_max_instrumented:
+        # drop the least waited primitive, the oldest among equals
+        j = 0
+        for i in range(1,len(_instrumented)):
+            if _instrumented[i].wait_total<_instrumented[j].wait_total:
+                j = i
+        _instrumented.pop(j)
+    st = _Stats(kind,name)
+    _instrumented.append(st)
+    return st
+
+def instrument(enabled=True,limit=32):
+    """
+.. function:: instrument(enabled=True,limit=32)
+
+    Enables or disables the collection of contention statistics. While enabled, every :class:`Lock`, :class:`Semaphore`, :class:`Condition` and :class:`Event` created
+    (including the ones inside other modules, e.g. :class:`queue.Queue`) records:
+
+        * *acquisitions*: the successful acquisitions (for events, the successful waits)
+        * *contended*: the acquisitions that had to wait because the primitive was not available (for events, the waits on a flag not set)
+        * *failures*: the acquisitions failed because non blocking or timed out
+        * *wait_total*, *wait_max*: the total and maximum milliseconds spent waiting
+        * *owner*: for locks and conditions, the identifier of the thread holding the lock (-1 if not held); for semaphores and events, the one of the last thread that acquired or waited
+
+    Statistics of at most *limit* primitives are kept. When a primitive is created and *limit* is reached, the one with the lowest *wait_total* is no longer reported,
+    so that memory stays bounded even if primitives are created continuously (e.g. by temporary queues) while the contended ones remain visible.
+
+    Primitives created while instrumentation is disabled pay no cost; instrumented ones pay an additional non blocking attempt before waiting.
+    Disabling instrumentation drops the statistics collected.
+
+    Counters of :class:`Lock` and :class:`Condition` are updated holding the lock; the ones of :class:`Semaphore` and :class:`Event` may miss some updates when many threads access them at once.
+
+    """
+    global _instrumented, _max_instrumented
+    if enabled:
+        _max_instrumented = max(1,limit)
+        if _instrumented is None:
+            _instrumented = []
+        while len(_instrumented)>_max_instrumented:
+            _instrumented.pop(0)
+    else:
+        _instrumented = None
+
+def stats(reset=False):
+    """
+.. function:: stats(reset=False)
+
+    Returns the statistics of the primitives created since :func:`instrument` was called, as a list of tuples
+    *(name, kind, acquisitions, contended, failures, wait_total, wait_max, owner)* ordered by decreasing *wait_total*, so that the hot primitives come first.
+    See :func:`instrument` for the meaning of the fields. If *reset* is ``True``, the counters are set to zero after being read.
+
+    *name* is the one given to the primitive constructor or, if missing, the kind of the primitive followed by a progressive number. ::
+
+        threading.instrument()
+        lock = threading.Lock("sensor bus")
+        # ... run the program for a while
+        for name, kind, acq, cont, fail, wtot, wmax, owner in threading.stats():
+            print(name,acq,"acquisitions,",cont,"contended, waited",wtot,"ms (max",wmax,"ms)")
+
+    """
+    res = []
+    if _instrumented is None:
+        return res
+    for st in _instrumented:
+        x = (st.name,st.kind,st.acquisitions,st.contended,st.failures,st.wait_total,st.wait_max,st.owner)
+        # insertion by decreasing wait_total
+        i = len(res)
+        while i>0 and res[i-1][5]<x[5]:
+            i-=1
+        res.insert(i,x)
+        if reset:
+            st.reset()
+    return res
+
+
 def __looper(fun,*args):
   while True:
     fun(*args)
@@ -216,7 +412,7 @@ class Lock():
 Lock class
 ==========
 
-.. class:: Lock()
+.. class:: Lock(name=None)
 
     A Lock object can be in two states: *locked* or *unlocked*. When a Lock object is created it starts *unlocked*.
     
@@ -257,9 +453,12 @@ Lock class
 
     Both threads in the example will compete to call ``print(msg)``. The Lock object ensure that while one thread is printing on the serial port, the other one is blocked, waiting for the message to be printed.
 
+    *name* identifies the lock in the statistics returned by :func:`stats`.
+
     """
-    def __init__(self):
+    def __init__(self,name=None):
         self.lck = __rtos_do(RTOS__SEM_CREATE,1)
+        self._st = _new_stats("Lock",name)
     #timeout in milliseconds
     def acquire(self,blocking=True,timeout=-1):
         """
@@ -283,6 +482,8 @@ Lock class
     The return value is ``True`` if the lock is acquired successfully,
     ``False`` if not (for example if the *timeout* expired).        
         """
+        if self._st is not None:
+            return self._st.acquire(self.lck,blocking,timeout)
         if blocking:
             return __rtos_do(RTOS__SEM_WAIT,self.lck,timeout)>=0
         else:
@@ -299,6 +500,8 @@ Lock class
       are blocked waiting for the lock to become unlocked, allow exactly one of them
       to proceed.
         """
+        if self._st is not None:
+            self._st.owner = -1
         __rtos_do(RTOS__SEM_SIGNALCAP,self.lck)
 
 
@@ -308,7 +511,7 @@ class Semaphore():
 Semaphore class
 ===============
 
-.. class:: Semaphore(value=1)
+.. class:: Semaphore(value=1,name=None)
 
     This class implements semaphore objects.  A semaphore manages a counter
     representing the number of :meth:`release` calls minus the number of
@@ -319,9 +522,12 @@ Semaphore class
     The optional argument gives the initial *value* for the internal counter; it
     defaults to ``1``. If the *value* given is less than 0, :exc:`ValueError` is
     raised.
+
+    *name* identifies the semaphore in the statistics returned by :func:`stats`.
     """
-    def __init__(self,value=1):
+    def __init__(self,value=1,name=None):
         self.lck = __rtos_do(RTOS__SEM_CREATE,value);
+        self._st = _new_stats("Semaphore",name)
     def acquire(self,blocking=True,timeout=-1):
         """
  .. method:: acquire(blocking=True, timeout=-1)
@@ -347,6 +553,8 @@ Semaphore class
       that interval, return false.  Return true otherwise.
 
         """        
+        if self._st is not None:
+            return self._st.acquire(self.lck,blocking,timeout)
         if blocking:
             return __rtos_do(RTOS__SEM_WAIT,self.lck,timeout)>=0
         else:
@@ -367,15 +575,18 @@ class Event():
 Event class
 ===========
 
-.. class:: Event()
+.. class:: Event(name=None)
 
    Class implementing event objects.  An event manages a flag that can be set to
    true with the :meth:`~Event.set` method and reset to false with the
    :meth:`clear` method.  The :meth:`wait` method blocks until the flag is true.
    The flag is initially false.
+
+   *name* identifies the event in the statistics returned by :func:`stats`.
    """   
-    def __init__(self):
+    def __init__(self,name=None):
         self.evt = __rtos_do(RTOS__EVT_CREATE)
+        self._st = _new_stats("Event",name)
     def set(self):
         """
 .. method:: set()
@@ -418,6 +629,8 @@ Event class
       always return ``True`` except if a timeout is given and the operation
       times out.
         """
+        if self._st is not None:
+            return self._st.wait_event(self.evt,timeout)
         ret = __rtos_do(RTOS__EVT_WAIT,self.evt,timeout)
         return ret
 
@@ -498,7 +711,7 @@ but this is not guaranteed for every VM.
 Condition class
 ===============
 
-.. class:: Condition(lock=None)
+.. class:: Condition(lock=None,name=None)
 
    This class implements condition variable objects.  A condition variable
    allows one or more threads to wait until they are notified by another thread.
@@ -507,14 +720,18 @@ Condition class
    and it is used as the underlying lock.  Otherwise,
    a new :class:`Lock` object is created and used as the underlying lock.
 
+   *name* identifies the condition in the statistics returned by :func:`stats`: they count the acquisitions of the underlying lock made through the condition,
+   including the ones made by :meth:`wait` when awakened.
+
    """   
-    def __init__(self,lock=None):
+    def __init__(self,lock=None,name=None):
         if lock is None:
             self._lock = __rtos_do(RTOS__SEM_CREATE,1)
         else:
             self._lock = lock.lck
         self._q = __rtos_do(RTOS__SEM_CREATE,0)
         self.th=-1
+        self._st = _new_stats("Condition",name)
     def acquire(self,blocking=True,timeout=-1):
         """
 .. method:: acquire(blocking=True,timeout=-1)
@@ -523,7 +740,9 @@ Condition class
       the underlying lock; the return value is whatever that method returns.
 
         """
-        if blocking:
+        if self._st is not None:
+            ret=self._st.acquire(self._lock,blocking,timeout)
+        elif blocking:
             ret=__rtos_do(RTOS__SEM_WAIT,self._lock,timeout)>=0
         else:
             ret= __rtos_do(RTOS__SEM_TRYLOCK,self._lock)>=0
@@ -538,6 +757,8 @@ Condition class
       the underlying lock; there is no return value.
         """
         self.th=-1
+        if self._st is not None:
+            self._st.owner = -1
         __rtos_do(RTOS__SEM_SIGNAL,self._lock)
 
     def wait(self, timeout=-1):
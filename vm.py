@@ -99,6 +99,12 @@ def decrypt(bin,nonce=0):
     return buf
 
 def set_tracemask(mask):
+    """
+.. function:: set_tracemask(mask)
+
+    Set the VM trace mask: each bit of :samp:`mask` enables the tracing of a category of events. Bits 21 to 23 enable the tracing of threading primitives, see :func:`threading.trace_drain`.
+
+    """
     return __vmctrl(VM_TRACEMASK,mask,0,0)
 
 def trace(msg):
@@ -32,6 +32,8 @@ The following constants are defined:
 
     """
 
+import dnscache
+
 
 def gethostbyname(hostname):
     """
@@ -39,8 +41,10 @@ def gethostbyname(hostname):
 
         Translate a host name to IPv4 address format. The IPv4 address is returned as a string, such as "192.168.0.5".
 
+        Resolutions are cached, see :mod:`dnscache`.
+
     """
-    return __default_net["gsm"].gethostbyname(hostname)
+    return dnscache.gethostbyname(hostname,__default_net["gsm"].gethostbyname)
 
 
 AUTH_NONE   = 0
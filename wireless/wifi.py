@@ -25,6 +25,8 @@ This module defines the following constants:
 
     """
 
+import dnscache
+
 WIFI_OPEN = 0
 WIFI_WEP = 1
 WIFI_WPA = 2
@@ -35,10 +37,12 @@ def gethostbyname(hostname):
     """
 .. function:: gethostbyname(hostname)        
 
-        Translate a host name to IPv4 address format. The IPv4 address is returned as a string, such as "192.168.0.5". 
-                
+        Translate a host name to IPv4 address format. The IPv4 address is returned as a string, such as "192.168.0.5".
+
+        Resolutions are cached, see :mod:`dnscache`.
+
     """
-    return __default_net["wifi"].gethostbyname(hostname)
+    return dnscache.gethostbyname(hostname,__default_net["wifi"].gethostbyname)
 
 
 def select(rlist,wlist,xlist,timeout=None):